@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class Busy(Exception):
+    """A resource had no room within its wait deadline (or its wait queue was full)."""
+
+    def __init__(self, resource: str, reason: str, retry_after: int):
+        super().__init__(f"{resource} at capacity ({reason})")
+        self.resource = resource
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def message(self) -> dict:
+        """The ``busy`` message sent to the browser."""
+        return {
+            "type": "busy",
+            "resource": self.resource,
+            "retry_after": self.retry_after,
+            "message": "Brevix is handling a lot of conversations right now. Please try again in a moment.",
+        }
+
+
+class Permit:
+    """One admitted unit of a resource; ``release`` is idempotent."""
+
+    def __init__(self, limiter: "ResourceLimiter", key: str):
+        self.limiter = limiter
+        self.key = key
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.limiter._release(self.key)
+
+
+class ResourceLimiter:
+    """Caps concurrent use of one upstream resource, shared fairly between API keys.
+
+    While there is room, ``acquire`` admits immediately. When the cap is reached callers queue
+    for at most ``wait_timeout`` seconds, and at most ``max_waiting`` of them; past either
+    limit they get ``Busy`` right away rather than a slow turn. Freed slots go to the waiting
+    key that currently holds the fewest, oldest waiter first, so one busy key can't starve
+    the others. A ``capacity`` of 0 or less means unlimited.
+    """
+
+    def __init__(self, name: str, capacity: int, max_waiting: int = 16, wait_timeout: float = 2.0):
+        self.name = name
+        self.capacity = capacity
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.in_use = 0
+        self._held: Dict[str, int] = {}
+        self._waiters: deque = deque()  # (key, future, enqueued_at)
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "peak_in_use": 0,
+            "max_wait_ms": 0.0,
+        }
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.wait_timeout * 2))
+
+    def _has_room(self) -> bool:
+        return self.capacity <= 0 or self.in_use < self.capacity
+
+    def _grant(self, key: str) -> Permit:
+        self.in_use += 1
+        self._held[key] = self._held.get(key, 0) + 1
+        self.stats["admitted"] += 1
+        self.stats["peak_in_use"] = max(self.stats["peak_in_use"], self.in_use)
+        return Permit(self, key)
+
+    def _reject(self, reason: str):
+        self.stats[f"rejected_{reason}"] += 1
+        logging.warning(
+            f"🚦 {self.name} at capacity ({self.in_use}/{self.capacity} in use, "
+            f"{len(self._waiters)} waiting): rejected ({reason.replace('_', ' ')})"
+        )
+        raise Busy(self.name, reason, self.retry_after)
+
+    async def acquire(self, key: str) -> Permit:
+        permit = self.try_acquire(key)
+        if permit is not None:
+            return permit
+        if len(self._waiters) >= self.max_waiting:
+            self._reject("queue_full")
+
+        waiter: Tuple[str, asyncio.Future, float] = (key, asyncio.get_running_loop().create_future(), time.monotonic())
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        try:
+            await asyncio.wait({waiter[1]}, timeout=self.wait_timeout)
+        except asyncio.CancelledError:
+            if waiter[1].done():
+                waiter[1].result().release()  # admitted just as the caller went away
+            else:
+                self._waiters.remove(waiter)
+            raise
+        waited_ms = (time.monotonic() - waiter[2]) * 1000
+        self.stats["max_wait_ms"] = round(max(self.stats["max_wait_ms"], waited_ms), 1)
+        if not waiter[1].done():
+            self._waiters.remove(waiter)
+            self._reject("timeout")
+        return waiter[1].result()
+
+    def try_acquire(self, key: str) -> Optional[Permit]:
+        """A permit only if one is free right now and nobody is waiting; never queues."""
+        if self._has_room() and not self._waiters:
+            return self._grant(key)
+        return None
+
+    def _release(self, key: str):
+        self.in_use -= 1
+        held = self._held.get(key, 0) - 1
+        if held > 0:
+            self._held[key] = held
+        else:
+            self._held.pop(key, None)
+        self._admit_waiters()
+
+    def _admit_waiters(self):
+        while self._waiters and self._has_room():
+            # The key holding the fewest slots goes next; deque order breaks ties (oldest first).
+            waiter = min(self._waiters, key=lambda w: self._held.get(w[0], 0))
+            self._waiters.remove(waiter)
+            waiter[1].set_result(self._grant(waiter[0]))
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "waiting": len(self._waiters),
+            "occupancy": round(self.in_use / self.capacity, 3) if self.capacity > 0 else 0.0,
+            "keys": len(self._held),
+            "max_per_key": max(self._held.values(), default=0),
+        }
+
+
+class AdmissionController:
+    """Per-process caps on sessions and on each upstream resource they use.
+
+    Resources are named (``sessions``, ``stt``, ``gemini``, ``murf``); callers hold a
+    ``Permit`` for as long as they use one and release it when done, or use ``slot``.
+    """
+
+    def __init__(self, capacities: Dict[str, int], max_waiting: int = 16, wait_timeout: float = 2.0):
+        self.limiters = {
+            name: ResourceLimiter(name, capacity, max_waiting=max_waiting, wait_timeout=wait_timeout)
+            for name, capacity in capacities.items()
+        }
+
+    async def acquire(self, resource: str, key: Optional[str]) -> Permit:
+        """Admit ``key`` (an API key, or a client address for sessions) or raise ``Busy``."""
+        return await self.limiters[resource].acquire(key or "default")
+
+    def try_acquire(self, resource: str, key: Optional[str]) -> Optional[Permit]:
+        """For optional extra work (e.g. a hedged request): admitted only if it takes nobody's turn."""
+        return self.limiters[resource].try_acquire(key or "default")
+
+    async def acquire_all(self, requests: Iterable[Tuple[str, Optional[str]]]) -> Tuple[Permit, ...]:
+        """Several resources for one unit of work: all of them, or ``Busy`` holding none."""
+        permits = []
+        try:
+            for resource, key in requests:
+                permits.append(await self.acquire(resource, key))
+        except BaseException:
+            for permit in permits:
+                permit.release()
+            raise
+        return tuple(permits)
+
+    @asynccontextmanager
+    async def slot(self, resource: str, key: Optional[str]):
+        permit = await self.acquire(resource, key)
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+    def metrics(self) -> dict:
+        return {name: limiter.metrics() for name, limiter in self.limiters.items()}
@@ -0,0 +1,107 @@
+import base64
+import itertools
+import json
+import struct
+
+from fastapi import WebSocket
+
+
+# Binary audio frame: version, turn id, sequence number (network byte order), then the
+# raw encoded audio bytes exactly as Murf produced them.
+AUDIO_FRAME_VERSION = 1
+AUDIO_FRAME_HEADER = struct.Struct("!BII")
+
+
+def pack_audio_frame(turn_id: int, seq: int, audio: bytes) -> bytes:
+    return AUDIO_FRAME_HEADER.pack(AUDIO_FRAME_VERSION, turn_id & 0xFFFFFFFF, seq & 0xFFFFFFFF) + audio
+
+
+def unpack_audio_frame(frame: bytes):
+    """Return ``(turn_id, seq, audio)`` for a frame built by ``pack_audio_frame``."""
+    version, turn_id, seq = AUDIO_FRAME_HEADER.unpack_from(frame)
+    if version != AUDIO_FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version: {version}")
+    return turn_id, seq, frame[AUDIO_FRAME_HEADER.size:]
+
+
+class AudioChannel:
+    """Delivers TTS audio to one browser session.
+
+    Clients that announce ``binary_audio`` in their ``client_hello`` get raw audio bytes in
+    binary websocket frames prefixed with a small header; older clients keep receiving the
+    base64 ``{"type": "audio"}`` JSON messages. Control messages are JSON either way.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.binary = False
+        self.turn_id = 0
+        self.seq = 0
+        self._turn_ids = itertools.count(1)
+        self.timer = None  # TurnTimer of the turn currently speaking, if any
+        self.barge_in = None  # BargeInController told when replies start/stop, and muting them
+
+    def negotiate(self, hello: dict) -> dict:
+        """Apply a ``client_hello`` and return the ``audio_format`` reply for the client."""
+        self.binary = int(hello.get("binary_audio") or 0) >= AUDIO_FRAME_VERSION
+        return {
+            "type": "audio_format",
+            "binary": self.binary,
+            "version": AUDIO_FRAME_VERSION if self.binary else 0,
+            "header_bytes": AUDIO_FRAME_HEADER.size if self.binary else 0,
+        }
+
+    def derive(self, websocket) -> "AudioChannel":
+        """A channel over another websocket (e.g. a gated one) sharing this session's turn ids."""
+        channel = AudioChannel(websocket)
+        channel.binary = self.binary
+        channel._turn_ids = self._turn_ids
+        channel.barge_in = self.barge_in
+        return channel
+
+    def start_turn(self) -> int:
+        self.turn_id = next(self._turn_ids)
+        self.seq = 0
+        return self.turn_id
+
+    async def send_start(self):
+        await self.websocket.send_text(json.dumps({"type": "audio_start", "turn_id": self.turn_id}))
+        if self.barge_in:
+            self.barge_in.playback_started(self.turn_id)
+
+    async def send_audio(self, audio_b64: str):
+        """Forward one Murf audio chunk (base64 as received from Murf)."""
+        if self.barge_in and self.barge_in.is_muted(self.turn_id):
+            return
+        if self.binary:
+            await self.send_audio_bytes(base64.b64decode(audio_b64))
+        else:
+            await self.websocket.send_text(json.dumps({"type": "audio", "data": audio_b64}), on_sent=self._on_sent())
+            self.seq += 1
+
+    async def send_audio_bytes(self, audio: bytes):
+        """Forward one chunk of already-decoded audio, e.g. replayed from the TTS cache."""
+        if self.barge_in and self.barge_in.is_muted(self.turn_id):
+            return
+        if self.binary:
+            await self.websocket.send_bytes(pack_audio_frame(self.turn_id, self.seq, audio), on_sent=self._on_sent())
+        else:
+            await self.websocket.send_text(
+                json.dumps({"type": "audio", "data": base64.b64encode(audio).decode("ascii")}),
+                on_sent=self._on_sent(),
+            )
+        self.seq += 1
+
+    def _on_sent(self):
+        """For a turn's first frame: marks ``client_first_audio`` once the writer puts it on the wire."""
+        if self.seq == 0 and self.timer:
+            timer = self.timer
+            return lambda: timer.mark("client_first_audio")
+        return None
+
+    async def send_end(self):
+        await self.websocket.send_text(json.dumps({"type": "audio_end", "turn_id": self.turn_id}))
+        if self.timer:
+            self.timer.mark("audio_end")
+        if self.barge_in:
+            self.barge_in.audio_ended(self.turn_id)
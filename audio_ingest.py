@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+
+ingest_stats = {
+    "sessions": 0,
+    "packets_sent": 0,
+    "bytes_received": 0,
+    "dropped_packets": 0,
+    "sink_errors": 0,
+}
+_active = set()
+_stats_lock = threading.Lock()
+
+
+def audio_ingest_metrics() -> dict:
+    """Process-wide ingest counters plus the current backlog across live sessions."""
+    with _stats_lock:
+        ingests = list(_active)
+        stats = dict(ingest_stats)
+    depths = [ingest.depth_ms for ingest in ingests]
+    return {
+        **stats,
+        "active_sessions": len(ingests),
+        "queue_depth_ms_total": sum(depths),
+        "queue_depth_ms_max": max(depths, default=0),
+    }
+
+
+class AudioIngest:
+    """Per-session microphone audio path to a blocking STT sink, run off the event loop.
+
+    ``push`` is called on the event loop for every browser frame and never blocks: audio is
+    re-framed into fixed ``packet_ms`` packets and queued in a ring of at most
+    ``max_buffered_ms``. A dedicated worker thread drains the ring into ``sink`` (e.g.
+    ``StreamingClient.stream``), taking everything that is ready on each wake-up. If the sink
+    falls behind and the ring is full, the oldest packets are dropped: for live transcription
+    the newest speech is worth more than a complete backlog. An optional ``gate`` (e.g. a
+    ``VoiceActivityGate``) sees each batch on the worker and returns the packets to send.
+    """
+
+    def __init__(self, sink: Callable[[bytes], None], sample_rate: int = 16000, packet_ms: int = 50,
+                 max_buffered_ms: int = 2000, sample_width: int = 2,
+                 gate: Optional[Callable[[List[bytes]], List[bytes]]] = None):
+        self.sink = sink
+        self.gate = gate
+        self.packet_ms = packet_ms
+        self.packet_bytes = sample_rate * sample_width * packet_ms // 1000
+        self.max_packets = max(1, max_buffered_ms // packet_ms)
+        self._packets: deque = deque()
+        self._partial = bytearray()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flush_on_close = True
+        self._last_drop_warning = 0.0
+        self.stats = {
+            "packets_sent": 0,
+            "bytes_received": 0,
+            "dropped_packets": 0,
+            "sink_errors": 0,
+            "max_depth_ms": 0,
+            "max_sink_ms": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="audio-ingest", daemon=True)
+        self._thread.start()
+        with _stats_lock:
+            _active.add(self)
+            ingest_stats["sessions"] += 1
+
+    @property
+    def depth_ms(self) -> int:
+        return len(self._packets) * self.packet_ms
+
+    def push(self, data: bytes):
+        with self._cond:
+            if self._closed:
+                return
+            self._partial += data
+            self.stats["bytes_received"] += len(data)
+            dropped = 0
+            while len(self._partial) >= self.packet_bytes:
+                self._packets.append(bytes(self._partial[:self.packet_bytes]))
+                del self._partial[:self.packet_bytes]
+                if len(self._packets) > self.max_packets:
+                    self._packets.popleft()
+                    dropped += 1
+            if dropped:
+                self.stats["dropped_packets"] += dropped
+            self.stats["max_depth_ms"] = max(self.stats["max_depth_ms"], self.depth_ms)
+            if self._packets:
+                self._cond.notify()
+        with _stats_lock:
+            ingest_stats["bytes_received"] += len(data)
+            ingest_stats["dropped_packets"] += dropped
+        if dropped and time.monotonic() - self._last_drop_warning > 5.0:
+            self._last_drop_warning = time.monotonic()
+            logging.warning(f"🎙️ STT is falling behind, dropping audio ({self.stats['dropped_packets'] * self.packet_ms} ms so far)")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._packets and not self._closed:
+                    self._cond.wait()
+                batch = list(self._packets)
+                self._packets.clear()
+                closing = self._closed
+                if closing and self._flush_on_close and self._partial:
+                    batch.append(bytes(self._partial))
+                    self._partial.clear()
+                if closing and not self._flush_on_close:
+                    batch = []
+            if self.gate and batch:
+                try:
+                    batch = self.gate(batch)
+                except Exception as e:
+                    # Never lose audio to a gate bug; send the batch ungated.
+                    logging.error(f"Audio gate failed: {e}")
+            for packet in batch:
+                self._send(packet)
+            if closing:
+                return
+
+    def _send(self, packet: bytes):
+        started = time.perf_counter()
+        try:
+            self.sink(packet)
+        except Exception as e:
+            self.stats["sink_errors"] += 1
+            with _stats_lock:
+                ingest_stats["sink_errors"] += 1
+            logging.error(f"Error streaming audio data: {e}")
+            return
+        self.stats["packets_sent"] += 1
+        self.stats["max_sink_ms"] = max(self.stats["max_sink_ms"], (time.perf_counter() - started) * 1000)
+        with _stats_lock:
+            ingest_stats["packets_sent"] += 1
+
+    def close(self, flush: bool = True):
+        """Stop the worker; with ``flush`` it first sends whatever audio is still queued."""
+        with self._cond:
+            self._closed = True
+            self._flush_on_close = flush
+            self._cond.notify()
+        with _stats_lock:
+            _active.discard(self)
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def metrics(self) -> dict:
+        return {**self.stats, "queue_depth_ms": self.depth_ms}
@@ -0,0 +1,78 @@
+import logging
+import time
+from typing import Optional
+
+
+barge_in_stats = {
+    "triggered": 0,
+    "ignored_short": 0,
+}
+
+
+class BargeInController:
+    """Decides when the user is talking over Brevix, from partial AssemblyAI turns.
+
+    The ``AudioChannel`` reports when a reply's audio starts (``playback_started``) and when
+    the server has sent all of it (``audio_ended``); the browser reports when it has actually
+    finished playing (``playback_ended``). While a reply is audible, the first partial turn
+    with at least ``min_words`` words spanning ``min_speech_ms`` of speech counts as a
+    barge-in. ``interrupt`` then mutes that reply so no further audio is forwarded. Browsers
+    that never report the end of playback are assumed done ``playback_tail`` seconds after
+    the last audio was sent.
+    """
+
+    def __init__(self, min_words: int = 1, min_speech_ms: int = 300, playback_tail: float = 15.0):
+        self.min_words = min_words
+        self.min_speech_ms = min_speech_ms
+        self.playback_tail = playback_tail
+        self.playing_turn: Optional[int] = None
+        self.muted_turn: Optional[int] = None
+        self._audio_ended_at: Optional[float] = None
+
+    @property
+    def speaking(self) -> bool:
+        if self.playing_turn is None:
+            return False
+        if self._audio_ended_at is not None and time.monotonic() - self._audio_ended_at > self.playback_tail:
+            self.playing_turn = None
+            return False
+        return True
+
+    def playback_started(self, turn_id: int):
+        self.playing_turn = turn_id
+        self._audio_ended_at = None
+
+    def audio_ended(self, turn_id: int):
+        if turn_id == self.playing_turn:
+            self._audio_ended_at = time.monotonic()
+
+    def playback_ended(self, turn_id: int):
+        if turn_id == self.playing_turn:
+            self.playing_turn = None
+
+    def reset(self):
+        """A new reply is starting; whatever played before has been interrupted."""
+        self.playing_turn = None
+
+    def is_muted(self, turn_id: int) -> bool:
+        return turn_id == self.muted_turn
+
+    def is_barge_in(self, event) -> bool:
+        """True if this partial ``TurnEvent`` should interrupt the reply being played."""
+        if event.end_of_turn or not self.speaking:
+            return False
+        words = event.words or []
+        word_count = len(words) if words else len(event.transcript.split())
+        speech_ms = words[-1].end - words[0].start if words else self.min_speech_ms
+        if word_count < self.min_words or speech_ms < self.min_speech_ms:
+            barge_in_stats["ignored_short"] += 1
+            return False
+        return True
+
+    def interrupt(self) -> Optional[int]:
+        """Mute the reply being played; returns its turn id."""
+        turn_id, self.playing_turn = self.playing_turn, None
+        self.muted_turn = turn_id
+        barge_in_stats["triggered"] += 1
+        logging.info(f"🗣️ Barge-in: user started speaking over turn {turn_id}")
+        return turn_id
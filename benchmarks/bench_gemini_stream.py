@@ -0,0 +1,94 @@
+"""Time-to-first-audio under concurrency: blocking Gemini iteration vs. the thread bridge.
+
+Each simulated session issues a fake streaming LLM request (blocking sleeps stand in for
+network waits), then hands the first chunk to a fake TTS that "plays" after a fixed delay.
+With the old code path every ``next()`` on the stream ran on the event loop, so sessions
+queue behind each other; with ``iterate_in_thread`` the loop stays free and per-session
+time-to-first-audio stays flat as sessions grow.
+
+Usage:
+    python benchmarks/bench_gemini_stream.py [--sessions 1,4,16,32] [--ttft 0.3] [--chunks 8]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stream_bridge import iterate_in_thread  # noqa: E402
+
+
+def fake_gemini_stream(ttft: float, chunks: int, gap: float):
+    time.sleep(ttft)
+    for i in range(chunks):
+        if i:
+            time.sleep(gap)
+        yield f"chunk {i}. "
+
+
+async def fake_tts_first_audio(delay: float, start: float) -> float:
+    await asyncio.sleep(delay)
+    return time.perf_counter() - start
+
+
+async def session_blocking(args) -> float:
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    stream = await loop.run_in_executor(None, lambda: fake_gemini_stream(args.ttft, args.chunks, args.gap))
+    tts = None
+    for _ in stream:  # the pre-fix code path: iteration on the event loop
+        if tts is None:
+            tts = asyncio.ensure_future(fake_tts_first_audio(args.tts, start))
+        await asyncio.sleep(0)
+    return await tts
+
+
+async def session_bridge(args) -> float:
+    start = time.perf_counter()
+    tts = None
+    async for _ in iterate_in_thread(lambda: fake_gemini_stream(args.ttft, args.chunks, args.gap)):
+        if tts is None:
+            tts = asyncio.ensure_future(fake_tts_first_audio(args.tts, start))
+    return await tts
+
+
+async def run(mode, n, args):
+    runner = session_blocking if mode == "blocking" else session_bridge
+    lags = []
+    stop = asyncio.Event()
+
+    async def lag_probe():
+        while not stop.is_set():
+            t = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - t - 0.01)
+
+    probe = asyncio.create_task(lag_probe())
+    results = await asyncio.gather(*(runner(args) for _ in range(n)))
+    stop.set()
+    await probe
+    return results, max(lags) if lags else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,2,4,8,16,32")
+    parser.add_argument("--ttft", type=float, default=0.3, help="simulated LLM time-to-first-token (s)")
+    parser.add_argument("--gap", type=float, default=0.05, help="simulated gap between chunks (s)")
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--tts", type=float, default=0.1, help="simulated TTS first-audio delay (s)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'sessions':>9}{'p50 TTFA':>11}{'max TTFA':>11}{'max loop lag':>14}")
+    for mode in ("blocking", "bridge"):
+        for n in (int(x) for x in args.sessions.split(",")):
+            results, lag = asyncio.run(run(mode, n, args))
+            print(f"{mode:<10}{n:>9}{statistics.median(results) * 1000:>9.0f}ms"
+                  f"{max(results) * 1000:>9.0f}ms{lag * 1000:>12.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Skill routing cost per turn: the legacy detector chain vs. the compiled IntentRouter.
+
+The legacy path is a verbatim copy of the detectors ``main.py`` used before the router (eight
+website regexes plus the weather regex, each looked up per call, with logging in between).
+Both paths run over a corpus of realistic transcripts; the script first checks that they
+agree on every transcript, then reports time per routed turn.
+
+Usage:
+    python benchmarks/bench_intent_router.py [--rounds 2000]
+"""
+import argparse
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intent_router import build_default_router  # noqa: E402
+
+
+CORPUS = [
+    "Open YouTube.",
+    "Can you please open Gmail for me?",
+    "Go to the GitHub website.",
+    "Take me to Stack Overflow.",
+    "Show me the news.",
+    "Launch Spotify!",
+    "Navigate to google maps.",
+    "Visit amazon.in",
+    "What's the weather in Delhi?",
+    "Weather in London.",
+    "What is the temperature in New York right now?",
+    "Forecast for the Bay Area.",
+    "Tell me a joke.",
+    "What is artificial intelligence?",
+    "Who built you?",
+    "Who are you?",
+    "Can you explain how neural networks learn in simple terms?",
+    "I was thinking about what we should cook for dinner tonight.",
+    "Summarize the plot of the Lord of the Rings in two sentences.",
+    "How far is the moon from the earth?",
+    "What's the capital of Australia?",
+    "Remind me what we were talking about earlier.",
+    "Thanks, that's all for now.",
+    "Open",
+    # Anchored search phrasings that belong to other skills (or to plain Gemini)
+    "Look up the weather in Paris.",
+    "Can you google the forecast for Berlin?",
+    "Search the temperature in Mumbai.",
+    "Google maps.",
+    "Google drive please.",
+]
+
+
+def legacy_weather(user_text: str) -> Optional[str]:
+    if not user_text:
+        return None
+    text = user_text.lower().strip()
+    match = re.search(r"(weather|temperature|forecast)\s+(in|at|for)\s+(.+)$", text)
+    if match:
+        location = match.group(3).strip().rstrip("?.!")
+        location = re.sub(r"^(the|a|an)\s+", "", location)
+        return location if location else None
+    return None
+
+
+def legacy_website(user_text: str) -> Optional[str]:
+    if not user_text:
+        return None
+    text = user_text.lower().strip()
+    logging.info(f"🔍 Checking website intent for: '{text}'")
+    patterns = [
+        r"^open\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
+        r"^go\s+to\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
+        r"^visit\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
+        r"^navigate\s+to\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
+        r"^(?:can\s+you\s+)?(?:please\s+)?open\s+(.+?)(?:\s+(?:website|site|page))?(?:\s+for\s+me)?(?:\.|!|\?|$)",
+        r"^take\s+me\s+to\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
+        r"^show\s+me\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
+        r"^launch\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
+    ]
+    for i, pattern in enumerate(patterns):
+        match = re.search(pattern, text)
+        if match:
+            website = match.group(1).strip().rstrip(",.!?")
+            website = re.sub(r"^(the\s+|a\s+|an\s+)", "", website)
+            website = re.sub(r"\s+(website|site|page)$", "", website)
+            if website:
+                logging.info(f"✅ Website intent matched with pattern {i+1}: '{website}'")
+                return website
+    logging.info("❌ No website intent detected")
+    return None
+
+
+def legacy_route(text):
+    website = legacy_website(text)
+    if website:
+        return ("website", {"website": website})
+    location = legacy_weather(text)
+    if location:
+        return ("weather", {"location": location})
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Production logs at INFO; route handler output nowhere so we time formatting, not the terminal.
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+    router = build_default_router()
+
+    for text in CORPUS:
+        expected = legacy_route(text)
+        got = router.route(text)
+        got = (got.skill, got.slots) if got else None
+        if got != expected:
+            sys.exit(f"Mismatch for {text!r}: legacy={expected} router={got}")
+    print(f"router agrees with legacy detectors on all {len(CORPUS)} transcripts")
+
+    for name, fn in (("legacy", legacy_route), ("router", router.route)):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for text in CORPUS:
+                fn(text)
+        elapsed = time.perf_counter() - start
+        per_turn = elapsed / (args.rounds * len(CORPUS)) * 1e6
+        print(f"{name:<8}{per_turn:8.2f} µs/turn")
+
+
+if __name__ == "__main__":
+    main()
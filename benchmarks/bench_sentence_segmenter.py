@@ -0,0 +1,124 @@
+"""Sentence segmentation for TTS: the old re.split-per-chunk loop vs. SentenceSegmenter.
+
+Replays simulated Gemini responses chunk by chunk through both splitters and reports CPU time
+per response plus how many words have to stream in before the first text can go to Murf (a
+direct proxy for time-to-first-audio). Before timing, a set of edge cases (abbreviations,
+decimals, URLs, chunk boundaries) is checked against the expected segments.
+
+Usage:
+    python benchmarks/bench_sentence_segmenter.py [--responses 300]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sentence_segmenter import SentenceSegmenter  # noqa: E402
+
+
+CASES = [
+    ("Dr. Smith is here. He says hi.", ["Dr. Smith is here.", "He says hi."]),
+    ("Pi is 3.14 and e is 2.71. Nice.", ["Pi is 3.14 and e is 2.71.", "Nice."]),
+    ("See example.com/a?b=1 for details. Bye.", ["See example.com/a?b=1 for details.", "Bye."]),
+    ("Sure, that works. Anything else?", ["Sure, that works.", "Anything else?"]),
+    ("Of course, I can help with that, my friend.", ["Of course, I can help with that,", "my friend."]),
+    ("Yes. " + "This sentence is short. " * 4, ["Yes.", "This sentence is short. This sentence is short. This sentence is short.", "This sentence is short."]),
+]
+
+SENTENCES = [
+    "I am Brevix, a super-advanced robot and younger brother of Shiv.",
+    "The weather in Delhi is 31 degrees with partly cloudy skies, so carry some water if you head out.",
+    "Neural networks learn by adjusting millions of weights, e.g. using gradient descent, until their predictions improve.",
+    "That is about 3.5 kilometres from the city centre.",
+    "You can read more at en.wikipedia.org/wiki/Artificial_intelligence if you like.",
+    "Sure!",
+    "Is there anything else you would like to know?",
+    "In short, it depends on what you want to build, how much time you have, and which tools you already know.",
+]
+
+
+def chunked(text, rng):
+    i = 0
+    while i < len(text):
+        n = rng.randint(3, 30)
+        yield text[i:i + n]
+        i += n
+
+
+def legacy_segments(chunks):
+    segments, sentence_buffer = [], ""
+    for chunk in chunks:
+        sentence_buffer += chunk
+        sentences = re.split(r'(?<=[.?!])\s+', sentence_buffer)
+        if len(sentences) > 1:
+            segments.extend(s.strip() for s in sentences[:-1] if s.strip())
+            sentence_buffer = sentences[-1]
+    if sentence_buffer.strip():
+        segments.append(sentence_buffer.strip())
+    return segments
+
+
+def new_segments(chunks, segmenter=None):
+    segmenter = segmenter or SentenceSegmenter()
+    segments = []
+    for chunk in chunks:
+        segments.extend(segmenter.feed(chunk))
+    remainder = segmenter.flush()
+    if remainder:
+        segments.append(remainder)
+    return segments
+
+
+def words_before_first_flush(chunks, splitter):
+    """Words streamed in before the splitter hands its first segment to TTS."""
+    seen = ""
+    if splitter == "legacy":
+        buffer = ""
+        for chunk in chunks:
+            seen += chunk
+            buffer += chunk
+            if len(re.split(r'(?<=[.?!])\s+', buffer)) > 1:
+                return len(seen.split())
+    else:
+        segmenter = SentenceSegmenter()
+        for chunk in chunks:
+            seen += chunk
+            if segmenter.feed(chunk):
+                return len(seen.split())
+    return len(seen.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    for text, expected in CASES:
+        for _ in range(20):
+            got = new_segments(list(chunked(text, rng)))
+            if got != expected:
+                sys.exit(f"Segmenter mismatch for {text!r}:\n  expected {expected}\n  got      {got}")
+    print(f"segmenter passes {len(CASES)} edge cases across random chunkings")
+
+    responses = []
+    for _ in range(args.responses):
+        text = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 12)))
+        responses.append(list(chunked(text, rng)))
+
+    for name, fn in (("legacy", legacy_segments), ("segmenter", new_segments)):
+        start = time.perf_counter()
+        for chunks in responses:
+            fn(chunks)
+        per_response = (time.perf_counter() - start) / len(responses) * 1e6
+        first = sorted(words_before_first_flush(c, name) for c in responses)
+        print(f"{name:<10}{per_response:9.1f} µs/response   words before first TTS text: "
+              f"median {first[len(first) // 2]}, p95 {first[int(len(first) * 0.95)]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Search skill latency against a local Tavily stand-in: cold, cached, coalesced and over budget.
+
+Starts ``FakeTavily`` from ``fake_upstreams.py`` and drives ``WebSearchService`` the way the
+search skill does (one ``search`` per turn under a time budget), reporting how long a turn
+waits for results in each case and how many upstream requests were made:
+
+- cold: a new query, paying the full upstream latency
+- cached: the same question asked again (differently punctuated/cased)
+- coalesced: N sessions asking the same new question at once -> one upstream request
+- over budget: upstream slower than the budget -> the turn goes on without results after
+  ``budget`` seconds, and the late result still fills the cache
+
+Usage:
+    python benchmarks/bench_web_search.py [--latency 0.3] [--budget 1.5] [--sessions 16]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_upstreams import FakeTavily, Latency  # noqa: E402
+from web_search import WebSearchService, format_digest  # noqa: E402
+
+
+async def timed(search: WebSearchService, query: str, budget: float):
+    started = time.perf_counter()
+    results = await search.search(query, "fake-tavily-key", budget=budget)
+    return time.perf_counter() - started, results
+
+
+async def main(args):
+    fake = FakeTavily(Latency(args.latency, args.jitter))
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=args.port, log_level="warning", lifespan="off"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    search = WebSearchService(url=f"http://127.0.0.1:{args.port}/search")
+    try:
+        print(f"{'case':<12}  {'wait ms':>8}  {'results':>7}  {'upstream requests':>17}")
+
+        def report(case: str, seconds: float, got: bool, before: int):
+            print(f"{case:<12}  {seconds * 1000:8.1f}  {'yes' if got else 'no':>7}  {fake.requests - before:>17}")
+
+        before = fake.requests
+        seconds, results = await timed(search, "Latest news on the Mars mission", args.budget)
+        report("cold", seconds, bool(results), before)
+
+        before = fake.requests
+        seconds, results = await timed(search, "latest news on the mars mission?", args.budget)
+        report("cached", seconds, bool(results), before)
+
+        before = fake.requests
+        waits = await asyncio.gather(*(timed(search, "population of japan", args.budget) for _ in range(args.sessions)))
+        report(f"coalesced x{args.sessions}", max(w for w, _ in waits), all(r for _, r in waits), before)
+
+        before = fake.requests
+        fake.latency = Latency(args.budget * 2)
+        seconds, results = await timed(search, "a slow question", args.budget)
+        report("over budget", seconds, bool(results), before)
+        await asyncio.sleep(args.budget * 1.2)
+        seconds, results = await timed(search, "a slow question", args.budget)
+        report("  then cached", seconds, bool(results), before)
+
+        digest = format_digest("population of japan", waits[0][1])
+        print(f"\nDigest added to the Gemini prompt ({len(digest)} chars):\n{digest}")
+        print(f"\nService stats: {search.metrics()}")
+    finally:
+        await search.close()
+        server.should_exit = True
+        await serve_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake Tavily response time")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--budget", type=float, default=1.5, help="seconds a turn waits for results")
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--port", type=int, default=9111)
+    asyncio.run(main(parser.parse_args()))
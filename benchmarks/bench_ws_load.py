@@ -0,0 +1,262 @@
+"""Offline load test for /ws: N simulated browsers talking to main.py backed by local fakes.
+
+Starts the fake AssemblyAI, Gemini and Murf servers from ``fake_upstreams.py``, launches the
+app under uvicorn pointed at them, then runs N concurrent clients. Each client negotiates
+binary audio, streams 16 kHz PCM in 20 ms frames (noise while "speaking", silence otherwise)
+and measures time-to-first-audio from the end of its utterance to the first audio frame of
+the reply. At the end it reports turn throughput, TTFA percentiles and the server's event-loop
+lag and per-stage latencies scraped from /metrics. Admission caps come from the environment
+(e.g. ``MAX_GEMINI_STREAMS=4``); turns and sessions turned away with ``busy`` are counted apart
+from failures. With ``--tts-stall-rate`` some Murf contexts answer ``--tts-stall`` late, to
+compare tail latency with ``TTS_HEDGE_ENABLED=true`` and without.
+
+No API keys or network access are needed; nothing leaves 127.0.0.1.
+
+Usage:
+    python benchmarks/bench_ws_load.py [--clients 1,8,32] [--turns 3] [--utterance 1.2]
+        [--llm-first-token 0.4] [--tts-first-audio 0.25] [--tts-stall-rate 0.05] [--jitter 0.1] [--fast]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_upstreams import FakeAssemblyAI, FakeGemini, FakeMurf, FakeUpstreams, Latency  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+FRAME_SECONDS = 0.02
+FRAME_BYTES = int(16000 * FRAME_SECONDS) * 2  # 16 kHz, 16-bit mono
+SPEECH_FRAME = os.urandom(FRAME_BYTES)
+SILENCE_FRAME = bytes(FRAME_BYTES)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def fmt_ms(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:7.0f}" if seconds is not None else "      -"
+
+
+class SimulatedClient:
+    """One browser tab: speaks ``turns`` utterances and waits for each spoken reply."""
+
+    def __init__(self, url: str, args):
+        self.url = url
+        self.args = args
+        self.ttfa: List[float] = []
+        self.turn_seconds: List[float] = []
+        self.timeouts = 0
+        self.errors = 0
+        self.busy = 0
+        self._turn_busy = False
+        self._utterance_end: Optional[float] = None
+        self._first_audio = asyncio.Event()
+        self._audio_end = asyncio.Event()
+
+    async def _reader(self, ws):
+        async for message in ws:
+            if isinstance(message, bytes):
+                # Binary frame header: version (1 byte), turn id, sequence number (4 bytes each)
+                if self._utterance_end is not None and not self._first_audio.is_set():
+                    self.ttfa.append(time.perf_counter() - self._utterance_end)
+                    self._first_audio.set()
+                continue
+            data = json.loads(message)
+            kind = data.get("type")
+            if kind == "audio" and self._utterance_end is not None and not self._first_audio.is_set():
+                self.ttfa.append(time.perf_counter() - self._utterance_end)
+                self._first_audio.set()
+            elif kind == "audio_end":
+                self._audio_end.set()
+            elif kind == "error":
+                self.errors += 1
+            elif kind == "busy":
+                self.busy += 1
+                self._turn_busy = True
+                self._audio_end.set()  # no reply is coming for this turn
+
+    async def _send_frames(self, ws, frame: bytes, seconds: float):
+        frames = max(1, int(seconds / FRAME_SECONDS))
+        delay = 0 if self.args.fast else FRAME_SECONDS
+        for _ in range(frames):
+            await ws.send(frame)
+            await asyncio.sleep(delay)
+
+    async def _send_silence_until(self, ws, event: asyncio.Event, timeout: float) -> bool:
+        deadline = time.perf_counter() + timeout
+        while not event.is_set():
+            if time.perf_counter() > deadline:
+                return False
+            await ws.send(SILENCE_FRAME)
+            await asyncio.sleep(FRAME_SECONDS)
+        return True
+
+    async def run(self):
+        try:
+            await self._converse()
+        except websockets.ConnectionClosed as e:
+            if getattr(e.rcvd, "code", None) != 1013:
+                raise
+            self.busy += 1  # session not admitted (or dropped as too slow)
+
+    async def _converse(self):
+        async with websockets.connect(self.url, max_size=None) as ws:
+            reader = asyncio.create_task(self._reader(ws))
+            try:
+                await ws.send(json.dumps({"type": "client_hello", "binary_audio": 1}))
+                await ws.send(json.dumps({"type": "start_transcription"}))
+                await self._send_frames(ws, SILENCE_FRAME, 0.2)
+                for _ in range(self.args.turns):
+                    self._first_audio.clear()
+                    self._audio_end.clear()
+                    self._utterance_end = None
+                    self._turn_busy = False
+                    await self._send_frames(ws, SPEECH_FRAME, self.args.utterance)
+                    self._utterance_end = time.perf_counter()
+                    # Keep the microphone stream going, like a browser does, while the reply plays.
+                    if not await self._send_silence_until(ws, self._audio_end, self.args.turn_timeout):
+                        self.timeouts += 1
+                        continue
+                    if self._turn_busy:
+                        continue
+                    self.turn_seconds.append(time.perf_counter() - self._utterance_end)
+                    await self._send_frames(ws, SILENCE_FRAME, self.args.think)
+            finally:
+                reader.cancel()
+
+
+def parse_prometheus(text: str) -> Dict[str, float]:
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            values[name] = float(value)
+    return values
+
+
+def histogram_quantile(values: Dict[str, float], name: str, labels: str, q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-quantile, from cumulative Prometheus buckets."""
+    prefix = f"{name}_bucket{{{labels}{',' if labels else ''}le=\""
+    buckets = sorted(
+        (float(key[len(prefix):-2]) if not key.endswith('+Inf"}') else float("inf"), count)
+        for key, count in values.items() if key.startswith(prefix)
+    )
+    if not buckets or not buckets[-1][1]:
+        return None
+    target = q * buckets[-1][1]
+    return next(bound for bound, count in buckets if count >= target)
+
+
+async def wait_for_app(base: str, process: subprocess.Popen):
+    async with httpx.AsyncClient() as http:
+        for _ in range(200):
+            if process.poll() is not None:
+                raise RuntimeError("app exited during startup")
+            try:
+                await http.get(f"{base}/metrics")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("app did not start")
+
+
+async def run_level(clients: int, args, ws_url: str, base: str):
+    sims = [SimulatedClient(ws_url, args) for _ in range(clients)]
+    async with httpx.AsyncClient() as http:
+        before = parse_prometheus((await http.get(f"{base}/metrics")).text)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(sim.run() for sim in sims), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+        after = parse_prometheus((await http.get(f"{base}/metrics")).text)
+    # Histograms are cumulative since app start; diff against the scrape before this level.
+    delta = {key: value - before.get(key, 0.0) for key, value in after.items()}
+    ttfa = [t for sim in sims for t in sim.ttfa]
+    turns = sum(len(sim.turn_seconds) for sim in sims)
+    failed = sum(isinstance(r, Exception) for r in results)
+    lag_p99 = histogram_quantile(delta, "brevix_event_loop_lag_seconds", "", 0.99)
+    llm_p50 = histogram_quantile(delta, "brevix_turn_stage_latency_seconds", 'stage="llm_first_token"', 0.5)
+    print(
+        f"{clients:>7}  {turns:>5}  {turns / elapsed:8.2f}  {fmt_ms(percentile(ttfa, 0.5))}  "
+        f"{fmt_ms(percentile(ttfa, 0.95))}  {fmt_ms(percentile(ttfa, 0.99))}  "
+        f"{fmt_ms(lag_p99)}  {fmt_ms(llm_p50)}  "
+        f"{sum(sim.busy for sim in sims):>5}  {sum(sim.timeouts for sim in sims) + failed:>8}"
+    )
+    if delta.get("brevix_tts_hedging_hedges_fired"):
+        print(f"         TTS hedges: {delta['brevix_tts_hedging_hedges_fired']:.0f} fired, "
+              f"{delta.get('brevix_tts_hedging_hedges_won', 0):.0f} won")
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"         client failed: {result!r}")
+
+
+async def main(args):
+    fakes = FakeUpstreams(
+        args.base_port,
+        stt=FakeAssemblyAI(Latency(args.stt_endpoint, args.jitter), Latency(args.stt_formatting, args.jitter / 2)),
+        llm=FakeGemini(Latency(args.llm_first_token, args.jitter), Latency(args.llm_chunk_gap, args.jitter / 4)),
+        tts=FakeMurf(
+            Latency(args.tts_first_audio, args.jitter, args.tts_stall_rate, args.tts_stall),
+            Latency(args.tts_chunk_gap, args.jitter / 4),
+        ),
+    )
+    await fakes.start()
+    env = {**os.environ, **fakes.env, "TTS_CACHE_DIR": ""}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.app_port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env,
+        stdout=None if args.app_logs else subprocess.DEVNULL,
+        stderr=None if args.app_logs else subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{args.app_port}"
+    try:
+        await wait_for_app(base, process)
+        print(f"{'clients':>7}  {'turns':>5}  {'turns/s':>8}  {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}  "
+              f"{'lag p99':>7}  {'llm p50':>7}  {'busy':>5}  {'failures':>8}")
+        print("                           (time-to-first-audio)       (server)")
+        for clients in args.clients:
+            await run_level(clients, args, f"ws://127.0.0.1:{args.app_port}/ws", base)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        await fakes.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=lambda s: [int(x) for x in s.split(",")], default=[1, 8, 32])
+    parser.add_argument("--turns", type=int, default=3, help="turns per client")
+    parser.add_argument("--utterance", type=float, default=1.2, help="seconds of speech per turn")
+    parser.add_argument("--think", type=float, default=0.3, help="silence between a reply and the next turn")
+    parser.add_argument("--turn-timeout", type=float, default=20.0)
+    parser.add_argument("--fast", action="store_true", help="send speech faster than real time")
+    parser.add_argument("--stt-endpoint", type=float, default=0.3)
+    parser.add_argument("--stt-formatting", type=float, default=0.2)
+    parser.add_argument("--llm-first-token", type=float, default=0.4)
+    parser.add_argument("--llm-chunk-gap", type=float, default=0.05)
+    parser.add_argument("--tts-first-audio", type=float, default=0.25)
+    parser.add_argument("--tts-chunk-gap", type=float, default=0.03)
+    parser.add_argument("--tts-stall-rate", type=float, default=0.0, help="fraction of Murf contexts that stall")
+    parser.add_argument("--tts-stall", type=float, default=2.0, help="extra first-audio delay of a stalled context")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+/- seconds on the upstream latencies")
+    parser.add_argument("--base-port", type=int, default=9101, help="fakes use this port and the next three")
+    parser.add_argument("--app-port", type=int, default=9100)
+    parser.add_argument("--app-logs", action="store_true", help="show the app's own logging")
+    asyncio.run(main(parser.parse_args()))
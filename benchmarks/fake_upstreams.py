@@ -0,0 +1,335 @@
+"""Local stand-ins for AssemblyAI streaming v3, Gemini streaming, Murf stream-input and Tavily search.
+
+Each fake speaks just enough of the real protocol for ``main.py`` to run a full voice turn
+against it, with configurable latency and jitter, so the app can be load-tested without API
+quota. Point the app at them with ``ASSEMBLYAI_STREAMING_HOST``, ``GEMINI_API_ENDPOINT``,
+``MURF_STREAM_URL`` and ``TAVILY_SEARCH_URL`` (``bench_ws_load.py`` does this for you).
+
+Used by ``bench_ws_load.py``; can also be run on its own to poke at the app by hand:
+    python benchmarks/fake_upstreams.py [--base-port 9101]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+import uvicorn
+import websockets
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+# Utterances the fake STT "hears", in order; none of them trigger a skill, so every turn goes
+# through Gemini and Murf.
+PROMPTS = (
+    "What's a fun fact about octopuses?",
+    "Can you explain how rainbows form?",
+    "Tell me something interesting about the moon.",
+    "Why do cats purr?",
+    "How do airplanes stay in the air?",
+)
+
+REPLY = (
+    "Here is a short answer for you, kept brief for voice. Octopuses have three hearts and "
+    "blue blood, which helps them move oxygen in cold water. They can also change colour in a "
+    "fraction of a second. Anything else you would like to know?"
+)
+
+
+@dataclass
+class Latency:
+    """A delay in seconds, with uniform +/- jitter and, ``stall_rate`` of the time, ``stall`` extra."""
+
+    mean: float
+    jitter: float = 0.0
+    stall_rate: float = 0.0
+    stall: float = 0.0
+
+    def sample(self) -> float:
+        delay = max(0.0, self.mean + random.uniform(-self.jitter, self.jitter))
+        return delay + self.stall if random.random() < self.stall_rate else delay
+
+    async def sleep(self):
+        await asyncio.sleep(self.sample())
+
+
+def _unformatted(text: str) -> str:
+    return re.sub(r"[^\w\s']", "", text).lower()
+
+
+class FakeAssemblyAI:
+    """AssemblyAI v3 streaming: ``Begin``, partial and end-of-turn ``Turn`` events, ``Termination``.
+
+    Speech is detected from the audio itself: the simulated clients send non-zero PCM while
+    "talking" and zeros while silent. ``endpoint`` after speech stops, an unformatted
+    end-of-turn is sent, followed ``formatting`` later by the formatted one.
+    """
+
+    def __init__(self, endpoint: Latency, formatting: Latency, partial_after: float = 0.3):
+        self.endpoint = endpoint
+        self.formatting = formatting
+        self.partial_after = partial_after
+        self.sessions = 0
+        self.audio_bytes = 0
+
+    async def handler(self, ws):
+        self.sessions += 1
+        await ws.send(json.dumps({"type": "Begin", "id": str(uuid.uuid4()), "expires_at": int(time.time()) + 3600}))
+        turn_order = 0
+        speech_bytes = 0
+        partial_sent = False
+        pending: List[asyncio.Task] = []
+        try:
+            async for message in ws:
+                if isinstance(message, str):
+                    if json.loads(message).get("type") == "Terminate":
+                        await ws.send(json.dumps({"type": "Termination", "audio_duration_seconds": 0}))
+                        break
+                    continue
+                self.audio_bytes += len(message)
+                if any(message):
+                    speech_bytes += len(message)
+                    # 16 kHz, 16-bit mono: 32 bytes per millisecond
+                    if not partial_sent and speech_bytes >= self.partial_after * 32000:
+                        partial_sent = True
+                        text = _unformatted(PROMPTS[turn_order % len(PROMPTS)]).split()
+                        await ws.send(json.dumps(self._turn(turn_order, " ".join(text[:2]), False, False)))
+                elif speech_bytes:
+                    pending = [t for t in pending if not t.done()]
+                    pending.append(asyncio.create_task(self._end_turn(ws, turn_order)))
+                    turn_order += 1
+                    speech_bytes = 0
+                    partial_sent = False
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _end_turn(self, ws, turn_order: int):
+        text = PROMPTS[turn_order % len(PROMPTS)]
+        try:
+            await self.endpoint.sleep()
+            await ws.send(json.dumps(self._turn(turn_order, _unformatted(text), True, False)))
+            await self.formatting.sleep()
+            await ws.send(json.dumps(self._turn(turn_order, text, True, True)))
+        except websockets.ConnectionClosed:
+            pass
+
+    @staticmethod
+    def _turn(turn_order: int, transcript: str, end_of_turn: bool, formatted: bool) -> dict:
+        return {
+            "type": "Turn",
+            "turn_order": turn_order,
+            "turn_is_formatted": formatted,
+            "end_of_turn": end_of_turn,
+            "transcript": transcript,
+            "end_of_turn_confidence": 0.9 if end_of_turn else 0.1,
+            "words": [],
+        }
+
+
+class FakeGemini:
+    """Gemini REST ``streamGenerateContent`` (JSON array streamed chunk by chunk) and ``generateContent``."""
+
+    def __init__(self, first_token: Latency, chunk_gap: Latency, words_per_chunk: int = 6):
+        self.first_token = first_token
+        self.chunk_gap = chunk_gap
+        self.words_per_chunk = words_per_chunk
+        self.requests = 0
+        self.app = FastAPI()
+        self.app.post("/v1beta/models/{model}:streamGenerateContent")(self.stream_generate)
+        self.app.post("/v1beta/models/{model}:generateContent")(self.generate)
+
+    @staticmethod
+    def _response(text: str, final: bool = False) -> dict:
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if final:
+            candidate["finishReason"] = 1
+        return {"candidates": [candidate], "usageMetadata": {"promptTokenCount": 50}}
+
+    async def stream_generate(self, model: str, request: Request):
+        await request.body()
+        self.requests += 1
+        words = REPLY.split(" ")
+        chunks = [
+            " ".join(words[i:i + self.words_per_chunk]) + " "
+            for i in range(0, len(words), self.words_per_chunk)
+        ]
+
+        async def body():
+            await self.first_token.sleep()
+            for i, text in enumerate(chunks):
+                if i:
+                    await self.chunk_gap.sleep()
+                prefix = "[" if i == 0 else ",\r\n"
+                yield prefix + json.dumps(self._response(text, final=i == len(chunks) - 1))
+            yield "]"
+
+        return StreamingResponse(body(), media_type="application/json")
+
+    async def generate(self, model: str, request: Request):
+        await request.body()
+        self.requests += 1
+        await self.first_token.sleep()
+        return JSONResponse(self._response("The user asked a few general knowledge questions.", final=True))
+
+
+class FakeMurf:
+    """Murf stream-input: per-context text in, base64 audio chunks out, then ``final``.
+
+    The first text of a context answers after ``first_audio``; every text produces one audio
+    chunk per ``chars_per_chunk`` characters, ``chunk_gap`` apart. ``final`` follows the last
+    chunk once ``end`` was sent, or after ``idle_final`` without new text.
+    """
+
+    def __init__(self, first_audio: Latency, chunk_gap: Latency, chars_per_chunk: int = 40,
+                 chunk_bytes: int = 4096, idle_final: float = 0.75):
+        self.first_audio = first_audio
+        self.chunk_gap = chunk_gap
+        self.chars_per_chunk = chars_per_chunk
+        self.idle_final = idle_final
+        self.connections = 0
+        self.audio = base64.b64encode(os.urandom(chunk_bytes)).decode("ascii")
+
+    async def handler(self, ws):
+        self.connections += 1
+        queue: asyncio.Queue = asyncio.Queue()
+        synth = asyncio.create_task(self._synthesize(ws, queue))
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("text") or data.get("end"):  # voice_config messages need no reply
+                    await queue.put(data)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            synth.cancel()
+
+    async def _synthesize(self, ws, queue: asyncio.Queue):
+        context: Optional[str] = None
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=self.idle_final if context else None)
+                except asyncio.TimeoutError:
+                    await ws.send(json.dumps({"final": True, "context_id": context}))
+                    context = None
+                    continue
+                if data.get("context_id") != context:
+                    context = data.get("context_id")
+                    await self.first_audio.sleep()
+                else:
+                    await self.chunk_gap.sleep()
+                text = data.get("text") or ""
+                for i in range(-(-len(text) // self.chars_per_chunk)):
+                    if i:
+                        await self.chunk_gap.sleep()
+                    await ws.send(json.dumps({"audio": self.audio, "context_id": context}))
+                if data.get("end"):
+                    await ws.send(json.dumps({"final": True, "context_id": context}))
+                    context = None
+        except websockets.ConnectionClosed:
+            pass
+
+
+class FakeTavily:
+    """Tavily ``/search``: an answer plus ``max_results`` results derived from the query, after ``latency``."""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.requests = 0
+        self.app = FastAPI()
+        self.app.post("/search")(self.search)
+
+    async def search(self, request: Request):
+        body = await request.json()
+        self.requests += 1
+        await self.latency.sleep()
+        query = body.get("query", "")
+        results = [
+            {
+                "title": f"{query.title()} - result {i}",
+                "url": f"https://example{i}.com/{'-'.join(query.split())}",
+                "content": f"Result {i} about {query}. " + REPLY,
+                "score": round(1.0 - i / 10, 2),
+            }
+            for i in range(1, body.get("max_results", 3) + 1)
+        ]
+        return JSONResponse({"query": query, "answer": f"A short summary about {query}.", "results": results})
+
+
+class FakeUpstreams:
+    """Runs all four fakes on consecutive ports starting at ``base_port``."""
+
+    def __init__(self, base_port: int = 9101, stt: Optional[FakeAssemblyAI] = None,
+                 llm: Optional[FakeGemini] = None, tts: Optional[FakeMurf] = None,
+                 search: Optional[FakeTavily] = None):
+        self.base_port = base_port
+        self.stt = stt or FakeAssemblyAI(Latency(0.3, 0.1), Latency(0.2, 0.05))
+        self.llm = llm or FakeGemini(Latency(0.4, 0.15), Latency(0.05, 0.02))
+        self.tts = tts or FakeMurf(Latency(0.25, 0.08), Latency(0.03, 0.01))
+        self.search = search or FakeTavily(Latency(0.3, 0.1))
+        self._servers = []
+        self._http_servers: List[uvicorn.Server] = []
+        self._http_tasks: List[asyncio.Task] = []
+
+    @property
+    def env(self) -> dict:
+        """Environment that points ``main.py`` at these fakes."""
+        return {
+            "ASSEMBLYAI_STREAMING_HOST": f"ws://127.0.0.1:{self.base_port}",
+            "GEMINI_API_ENDPOINT": f"http://127.0.0.1:{self.base_port + 1}",
+            "MURF_STREAM_URL": f"ws://127.0.0.1:{self.base_port + 2}/v1/speech/stream-input",
+            "TAVILY_SEARCH_URL": f"http://127.0.0.1:{self.base_port + 3}/search",
+            "ASSEMBLYAI_API_KEY": "fake-assemblyai-key",
+            "GEMINI_API_KEY": "fake-gemini-key",
+            "MURF_API_KEY": "fake-murf-key",
+            "TAVILY_API_KEY": "fake-tavily-key",
+        }
+
+    async def start(self):
+        self._servers.append(await websockets.serve(self.stt.handler, "127.0.0.1", self.base_port, max_size=None))
+        self._servers.append(await websockets.serve(self.tts.handler, "127.0.0.1", self.base_port + 2, max_size=None))
+        for app, port in ((self.llm.app, self.base_port + 1), (self.search.app, self.base_port + 3)):
+            server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+            self._http_servers.append(server)
+            self._http_tasks.append(asyncio.create_task(server.serve()))
+        while not all(server.started for server in self._http_servers):
+            await asyncio.sleep(0.01)
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for server in self._http_servers:
+            server.should_exit = True
+        await asyncio.gather(*self._http_tasks)
+
+
+async def _serve_forever(base_port: int):
+    fakes = FakeUpstreams(base_port)
+    await fakes.start()
+    for name, value in fakes.env.items():
+        print(f"{name}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fakes.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-port", type=int, default=9101)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(args.base_port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,306 @@
+"""Replay recorded /ws sessions against local fakes and compare per-turn stage timings between builds.
+
+Sessions are recorded by the app itself when ``SESSION_RECORD_DIR`` is set (see
+``session_recorder.py``). This tool starts the fakes from ``fake_upstreams.py`` and launches the
+build under test (``--app-dir``, default this checkout) pointed at them. It then plays each
+recording back through ``/ws`` at its original pace, or ``--speed`` times faster. The
+browser's control messages and microphone PCM are sent as recorded. A scripted AssemblyAI
+stand-in emits the recorded Turn events (partials, end-of-turns, formatted turns) at their
+recorded times, so speculation and barge-in take the same paths they took in production.
+Gemini and Murf are the usual fakes, without jitter by default, so two runs differ only by
+the build. Faster replays also compress the user's pauses and AssemblyAI's own delays, so
+turns may overlap and interrupt each other; compare runs made at the same speed.
+
+For every turn it measures, from the STT end-of-turn to the browser receiving it: the
+transcription, the first reply text, the first audio and ``audio_end``. The same measures
+are taken from the recording itself (``recorded``: production, with real upstreams). With
+``--save`` the results are written as JSON; ``--baseline`` diffs this run against such a file
+from another build:
+
+    python benchmarks/replay_session.py recordings/ --app-dir ../brevix-main --save main.json
+    python benchmarks/replay_session.py recordings/ --baseline main.json
+
+API keys in recordings are redacted; the app under test uses the fakes' keys. Nothing leaves
+127.0.0.1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_ws_load import fmt_ms, percentile, wait_for_app  # noqa: E402
+from fake_upstreams import FakeAssemblyAI, FakeGemini, FakeMurf, FakeUpstreams, Latency  # noqa: E402
+from session_recorder import (  # noqa: E402
+    CLIENT_AUDIO, CLIENT_TEXT, SERVER_AUDIO, SERVER_TEXT, STT_TURN, SessionRecording,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+STAGES = ("transcription", "first_text", "first_audio", "audio_end")
+
+
+def find_recordings(paths: List[str]) -> List[Path]:
+    """Recording directories named directly, or found one level below a named directory."""
+    found = []
+    for path in map(Path, paths):
+        if (path / "meta.json").exists():
+            found.append(path)
+        else:
+            found.extend(sorted(p.parent for p in path.glob("*/meta.json")))
+    return found
+
+
+def turn_timings(events) -> List[dict]:
+    """Per turn, seconds from the STT end-of-turn until the browser got each of ``STAGES``.
+
+    ``events`` are (seconds, kind, payload) in time order, as ``SessionRecording.events``
+    yields them: STT Turn events plus what was sent to the browser. Each browser message is
+    charged to the latest end-of-turn before it that hasn't reached that stage yet.
+    """
+    turns: List[dict] = []
+    seen = set()
+    for t, kind, payload in events:
+        if kind == STT_TURN:
+            if payload.get("end_of_turn") and payload.get("transcript", "").strip() and payload["turn_order"] not in seen:
+                seen.add(payload["turn_order"])
+                turns.append({"turn_order": payload["turn_order"], "end_of_turn": t, "stages": {}})
+            continue
+        if not turns:
+            continue
+        if kind == SERVER_AUDIO:
+            stage = "first_audio"
+        elif kind == SERVER_TEXT:
+            stage = {
+                "transcription": "transcription",
+                "llm_chunk": "first_text",
+                "audio": "first_audio",
+                "audio_end": "audio_end",
+            }.get(payload.get("type"))
+            if stage == "transcription" and not payload.get("end_of_turn"):
+                stage = None
+        else:
+            stage = None
+        if stage is None:
+            continue
+        turn = turns[-1]
+        if stage not in turn["stages"] and (stage != "audio_end" or "first_audio" in turn["stages"]):
+            turn["stages"][stage] = round(t - turn["end_of_turn"], 6)
+    return turns
+
+
+def summarize(turns: List[dict]) -> Dict[str, dict]:
+    summary = {}
+    for stage in STAGES:
+        values = [turn["stages"][stage] for turn in turns if stage in turn["stages"]]
+        summary[stage] = {"n": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+    return summary
+
+
+class ReplayClock:
+    """Recording time -> wall time, ``speed`` times faster than the original."""
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        self.started = time.monotonic()
+
+    def now(self) -> float:
+        """Wall seconds since the replay started: latencies are measured unscaled."""
+        return time.monotonic() - self.started
+
+    async def until(self, t: float):
+        delay = self.started + t / self.speed - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ScriptedAssemblyAI(FakeAssemblyAI):
+    """AssemblyAI stand-in that sends a recording's Turn events at their recorded times.
+
+    Audio from the app is only counted. What was sent, and when, goes to ``log`` so the
+    replay's turns can be measured exactly like the recording's.
+    """
+
+    def __init__(self):
+        super().__init__(Latency(0.0), Latency(0.0))
+        self.script: List[tuple] = []  # (seconds, Turn payload)
+        self.clock: Optional[ReplayClock] = None
+        self.log: List[tuple] = []
+
+    async def handler(self, ws):
+        self.sessions += 1
+        await ws.send(json.dumps({"type": "Begin", "id": f"replay-{self.sessions}", "expires_at": int(time.time()) + 3600}))
+        player = asyncio.create_task(self._play(ws))
+        try:
+            async for message in ws:
+                if isinstance(message, str):
+                    if json.loads(message).get("type") == "Terminate":
+                        await ws.send(json.dumps({"type": "Termination", "audio_duration_seconds": 0}))
+                        break
+                    continue
+                self.audio_bytes += len(message)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            player.cancel()
+
+    async def _play(self, ws):
+        try:
+            for t, turn in self.script:
+                await self.clock.until(t)
+                await ws.send(json.dumps(self._turn(
+                    turn["turn_order"], turn["transcript"], turn["end_of_turn"], turn["turn_is_formatted"]
+                )))
+                self.log.append((self.clock.now(), STT_TURN, turn))
+        except websockets.ConnectionClosed:
+            pass
+
+
+def client_message(data: dict) -> Optional[str]:
+    """A recorded browser message as the replay sends it, or None to skip it."""
+    kind = data.get("type")
+    if kind == "update_api_keys":
+        data = {**data, "keys": {}}  # redacted in the recording; the app falls back to the fakes' keys
+    elif kind == "client_hello":
+        data = {key: value for key, value in data.items() if key != "session_id"}
+    elif kind == "unparsable":
+        return None
+    return json.dumps(data)
+
+
+async def replay(recording: SessionRecording, stt: ScriptedAssemblyAI, url: str, args) -> List[dict]:
+    """Play one recording through /ws; returns its turns as measured by ``turn_timings``."""
+    stt.script = [(t, payload) for t, _, payload in recording.events(STT_TURN)]
+    stt.log = []
+    received: List[tuple] = []
+    clock = stt.clock = ReplayClock(args.speed)
+
+    async def read(ws):
+        async for message in ws:
+            if isinstance(message, bytes):
+                received.append((clock.now(), SERVER_AUDIO, len(message)))
+            else:
+                received.append((clock.now(), SERVER_TEXT, json.loads(message)))
+
+    async with websockets.connect(url, max_size=None) as ws:
+        reader = asyncio.create_task(read(ws))
+        try:
+            for t, kind, payload in recording.events(CLIENT_TEXT, CLIENT_AUDIO):
+                await clock.until(t)
+                if kind == CLIENT_AUDIO:
+                    await ws.send(payload)
+                else:
+                    text = client_message(payload)
+                    if text is not None:
+                        await ws.send(text)
+            # The reply to the last turn may still be on its way.
+            ends = args.settle + time.monotonic()
+            while time.monotonic() < ends:
+                turns = turn_timings(sorted(stt.log + received, key=lambda e: e[0]))
+                if turns and "audio_end" in turns[-1]["stages"]:
+                    break
+                await asyncio.sleep(0.1)
+        finally:
+            reader.cancel()
+    return turn_timings(sorted(stt.log + received, key=lambda e: e[0]))
+
+
+def print_report(results: List[dict], baseline: Optional[dict]):
+    recorded = summarize([turn for r in results for turn in r["recorded"]])
+    replayed = summarize([turn for r in results for turn in r["replayed"]])
+    base = summarize([turn for r in baseline["recordings"] for turn in r["replayed"]]) if baseline else None
+    header = f"{'stage':<14} {'turns':>5}  {'recorded p50':>12}  {'replay p50':>10}  {'replay p95':>10}"
+    if base:
+        header += f"  {'base p50':>8}  {'base p95':>8}  {'Δ p50':>7}  {'Δ p95':>7}"
+    print(header)
+    for stage in STAGES:
+        now = replayed[stage]
+        line = (f"{stage:<14} {now['n']:>5}  {fmt_ms(recorded[stage]['p50']):>12}  "
+                f"{fmt_ms(now['p50']):>10}  {fmt_ms(now['p95']):>10}")
+        if base:
+            was = base[stage]
+            deltas = [
+                fmt_ms(now[q] - was[q]) if now[q] is not None and was[q] is not None else fmt_ms(None)
+                for q in ("p50", "p95")
+            ]
+            line += f"  {fmt_ms(was['p50']):>8}  {fmt_ms(was['p95']):>8}  {deltas[0]:>7}  {deltas[1]:>7}"
+        print(line)
+    if baseline:
+        print(f"(baseline: {baseline['app_dir']}, speed {baseline['speed']}x)")
+
+
+async def main(args):
+    recordings = find_recordings(args.recordings)
+    if not recordings:
+        sys.exit(f"no recordings found in {', '.join(args.recordings)}")
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    stt = ScriptedAssemblyAI()
+    fakes = FakeUpstreams(
+        args.base_port,
+        stt=stt,
+        llm=FakeGemini(Latency(args.llm_first_token, args.jitter), Latency(args.llm_chunk_gap, args.jitter / 4)),
+        tts=FakeMurf(Latency(args.tts_first_audio, args.jitter), Latency(args.tts_chunk_gap, args.jitter / 4)),
+    )
+    await fakes.start()
+    env = {**os.environ, **fakes.env, "TTS_CACHE_DIR": ""}
+    env.pop("SESSION_RECORD_DIR", None)  # don't record the replay itself
+    app_dir = Path(args.app_dir).resolve()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.app_port),
+         "--log-level", "warning"],
+        cwd=app_dir, env=env,
+        stdout=None if args.app_logs else subprocess.DEVNULL,
+        stderr=None if args.app_logs else subprocess.DEVNULL,
+    )
+    results = []
+    try:
+        await wait_for_app(f"http://127.0.0.1:{args.app_port}", process)
+        for path in recordings:
+            recording = SessionRecording(path)
+            try:
+                recorded = turn_timings(recording.events(STT_TURN, SERVER_TEXT, SERVER_AUDIO))
+                print(f"▶ {path.name}: {recording.duration:.1f} s, {len(recorded)} turns, at {args.speed}x")
+                replayed = await replay(recording, stt, f"ws://127.0.0.1:{args.app_port}/ws", args)
+            finally:
+                recording.close()
+            results.append({"recording": str(path), "recorded": recorded, "replayed": replayed})
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        await fakes.stop()
+
+    print_report(results, baseline)
+    if args.save:
+        Path(args.save).write_text(json.dumps(
+            {"app_dir": str(app_dir), "speed": args.speed, "recordings": results}, indent=2
+        ))
+        print(f"Saved to {args.save}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+", help="recording directories, or directories holding them")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay this many times faster than recorded")
+    parser.add_argument("--app-dir", default=str(ROOT), help="checkout of the build to run")
+    parser.add_argument("--save", help="write this run's timings to a JSON file")
+    parser.add_argument("--baseline", help="JSON from an earlier --save to diff against")
+    parser.add_argument("--settle", type=float, default=10.0, help="seconds to wait for the last reply")
+    parser.add_argument("--llm-first-token", type=float, default=0.4)
+    parser.add_argument("--llm-chunk-gap", type=float, default=0.05)
+    parser.add_argument("--tts-first-audio", type=float, default=0.25)
+    parser.add_argument("--tts-chunk-gap", type=float, default=0.03)
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds on the upstream latencies")
+    parser.add_argument("--base-port", type=int, default=9111, help="fakes use this port and the next three")
+    parser.add_argument("--app-port", type=int, default=9110)
+    parser.add_argument("--app-logs", action="store_true", help="show the app's own logging")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,122 @@
+import difflib
+import json
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+
+# Said around a question without changing it: "hey brevix, who made you please"
+_LEADING_FILLER = {"hey", "hi", "hello", "ok", "okay", "so", "um", "uh", "well", "brevix", "please"}
+_TRAILING_FILLER = {"please", "brevix", "now", "again"}
+_CONTRACTIONS = {
+    "who's": "who is", "what's": "what is", "you're": "you are", "whats": "what is", "whos": "who is",
+    "u": "you", "ur": "your",
+}
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, punctuation-free, contraction-expanded form with filler words trimmed."""
+    words = []
+    for word in _PUNCTUATION.sub(" ", text.lower()).split():
+        words.extend(_CONTRACTIONS.get(word, word).split())
+    while words and words[0] in _LEADING_FILLER:
+        words.pop(0)
+    while words and words[-1] in _TRAILING_FILLER:
+        words.pop()
+    return " ".join(words)
+
+
+def _words_align(question: List[str], query: List[str], min_word_similarity: float = 0.75) -> bool:
+    """True if ``query`` differs from ``question`` only by misheard words and at most one extra or
+    missing word; "who build you" aligns with "who built you", "how are you" doesn't with "who are you".
+    """
+    skipped = 0
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, question, query, autojunk=False).get_opcodes():
+        if op == "equal":
+            continue
+        if op == "replace":
+            if i2 - i1 != j2 - j1:
+                return False
+            for a, b in zip(question[i1:i2], query[j1:j2]):
+                if difflib.SequenceMatcher(None, a, b).ratio() < min_word_similarity:
+                    return False
+        else:
+            skipped += max(i2 - i1, j2 - j1)
+    return skipped <= 1
+
+
+class CannedAnswer(NamedTuple):
+    id: str
+    answer: str
+    score: float
+
+
+class CannedResponses:
+    """Fixed answers to FAQ-style questions, matched against whole transcripts.
+
+    The table (a JSON file of answers, each with the questions that should get it) is
+    matched on normalized text: an exact hit first, otherwise the closest question by
+    ``difflib`` similarity if it reaches ``min_similarity`` and differs from the query only by
+    near-miss words (ASR slips, not different question words). Only whole utterances match,
+    so "who made you and what's the weather" still goes to the model.
+    """
+
+    def __init__(self, path: str, min_similarity: float = 0.88):
+        self.path = path
+        self.min_similarity = min_similarity
+        self._answers: Dict[str, str] = {}
+        self._questions: Dict[str, str] = {}  # normalized question -> answer id
+        self.stats = {"exact_hits": 0, "fuzzy_hits": 0, "misses": 0}
+        self.reload()
+
+    def reload(self) -> bool:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)["answers"]
+            answers = {entry["id"]: entry["answer"] for entry in entries}
+            questions = {}
+            for entry in entries:
+                for question in entry.get("questions", []):
+                    questions.setdefault(normalize_question(question), entry["id"])
+        except FileNotFoundError:
+            logging.info(f"No FAQ table at {self.path}; canned responses disabled")
+            return False
+        except Exception as e:
+            logging.error(f"Could not load FAQ table {self.path}: {e}")
+            return False
+        self._answers, self._questions = answers, questions
+        logging.info(f"Loaded FAQ table with {len(answers)} answers and {len(questions)} questions")
+        return True
+
+    @property
+    def answers(self) -> List[str]:
+        return list(self._answers.values())
+
+    def match(self, transcript: str) -> Optional[CannedAnswer]:
+        query = normalize_question(transcript)
+        if not query or not self._questions:
+            return None
+        answer_id = self._questions.get(query)
+        if answer_id is not None:
+            self.stats["exact_hits"] += 1
+            return CannedAnswer(answer_id, self._answers[answer_id], 1.0)
+
+        best_score, best_id = 0.0, None
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(query)
+        for question, answer_id in self._questions.items():
+            matcher.set_seq1(question)
+            if matcher.real_quick_ratio() < self.min_similarity or matcher.quick_ratio() < self.min_similarity:
+                continue
+            score = matcher.ratio()
+            if score > best_score and _words_align(question.split(), query.split()):
+                best_score, best_id = score, answer_id
+        if best_id is None or best_score < self.min_similarity:
+            self.stats["misses"] += 1
+            return None
+        self.stats["fuzzy_hits"] += 1
+        return CannedAnswer(best_id, self._answers[best_id], round(best_score, 3))
+
+    def metrics(self) -> dict:
+        return {**self.stats, "answers": len(self._answers), "questions": len(self._questions)}
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from typing import Callable, Optional, Union
+
+from metrics import pipeline_metrics
+
+
+writer_stats = {
+    "sessions": 0,
+    "messages_sent": 0,
+    "bytes_sent": 0,
+    "coalesced_chunks": 0,
+    "dropped_audio": 0,
+    "overflows": 0,
+    "slow_client_disconnects": 0,
+    "send_errors": 0,
+}
+_active = set()
+
+_MESSAGE_TYPE = re.compile(r'^\{"type":\s*"([a-z_]+)"')
+# Kept in order with the audio they bracket, so they travel in the audio lane.
+_AUDIO_LANE_TYPES = {"audio", "audio_start", "audio_end"}
+# Not tied to a turn's text, so they may overtake it; everything else keeps its order.
+_CONTROL_LANE_TYPES = {"audio_interrupt", "pong"}
+
+
+def client_writer_metrics() -> dict:
+    """Process-wide outbound counters plus the current backlog across live sessions."""
+    writers = list(_active)
+    audio_bytes = [w.audio_bytes for w in writers]
+    return {
+        **writer_stats,
+        "active_sessions": len(writers),
+        "queued_messages_total": sum(w.depth for w in writers),
+        "queued_audio_bytes_total": sum(audio_bytes),
+        "queued_audio_bytes_max": max(audio_bytes, default=0),
+    }
+
+
+class ClientWriter:
+    """The one task that writes to a browser websocket, fed by a bounded priority queue.
+
+    Producers (the Gemini loop, the Murf receiver, STT callbacks) call ``send_text`` /
+    ``send_bytes`` exactly as on the websocket, but only enqueue; the network is awaited by
+    the writer task alone. Messages go out in three lanes: ``audio_interrupt`` and ``pong``
+    first, then every other JSON message in the order it was sent (consecutive ``llm_chunk``
+    messages still queued are merged into one), then audio. ``audio_start``/``audio_end``
+    travel in the audio lane to stay ordered with the frames they bracket, and
+    ``audio_interrupt`` discards the interrupted turn's audio that is still queued. An audio
+    message's ``on_sent`` callback runs once it is actually written to the socket.
+
+    The audio lane holds at most ``max_audio_bytes``. A producer finding it full waits up to
+    ``stall_timeout`` for room, so a slow client slows the Murf receiver only that long; after
+    that the rest of the turn's audio is dropped (``audio_end`` still goes out). A client that
+    overflows ``max_overflows`` times, or lets ``max_messages`` control/text messages pile up,
+    is disconnected with 1013 (try again later).
+    """
+
+    def __init__(self, websocket, max_audio_bytes: int = 256 * 1024, stall_timeout: float = 2.0,
+                 max_overflows: int = 3, max_messages: int = 500):
+        self.websocket = websocket
+        self.max_audio_bytes = max_audio_bytes
+        self.stall_timeout = stall_timeout
+        self.max_overflows = max_overflows
+        self.max_messages = max_messages
+        self._control: deque = deque()  # (enqueued_at, text)
+        self._text: deque = deque()  # [enqueued_at, text or [llm_chunk texts]]
+        self._audio: deque = deque()  # (enqueued_at, str or bytes, kind, on_sent, turn_id)
+        self.audio_bytes = 0
+        self._audio_turn = 0  # turn id of the last audio_start queued
+        self._ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._skip_audio = False
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+        self.recorder = None  # SessionRecorder, if this session is being recorded
+        self.stats = {
+            "messages_sent": 0,
+            "bytes_sent": 0,
+            "coalesced_chunks": 0,
+            "dropped_audio": 0,
+            "overflows": 0,
+            "max_queue_ms": 0.0,
+            "max_send_ms": 0.0,
+        }
+
+    @property
+    def depth(self) -> int:
+        return len(self._control) + len(self._text) + len(self._audio)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            _active.add(self)
+            writer_stats["sessions"] += 1
+
+    async def send_text(self, data: str, on_sent: Optional[Callable[[], None]] = None):
+        if self._closed:
+            return
+        match = _MESSAGE_TYPE.match(data)
+        kind = match.group(1) if match else None
+        if kind == "llm_chunk":
+            self._queue_llm_chunk(json.loads(data).get("data") or "")
+        elif kind in _AUDIO_LANE_TYPES:
+            await self._queue_audio(data, kind, on_sent)
+        elif kind in _CONTROL_LANE_TYPES:
+            if kind == "audio_interrupt":
+                self._discard_audio(json.loads(data).get("turn_id"))
+            self._control.append((time.monotonic(), data))
+        else:
+            self._text.append([time.monotonic(), data])
+        self._check_backlog()
+        self._ready.set()
+
+    async def send_bytes(self, data: bytes, on_sent: Optional[Callable[[], None]] = None):
+        if self._closed:
+            return
+        await self._queue_audio(data, "audio", on_sent)
+        self._ready.set()
+
+    def _queue_llm_chunk(self, text: str):
+        if self._text and isinstance(self._text[-1][1], list):
+            self._text[-1][1].append(text)
+            self.stats["coalesced_chunks"] += 1
+            writer_stats["coalesced_chunks"] += 1
+        else:
+            self._text.append([time.monotonic(), [text]])
+
+    async def _queue_audio(self, data: Union[str, bytes], kind: str, on_sent: Optional[Callable[[], None]] = None):
+        if kind == "audio":
+            if self._skip_audio:
+                self._count_dropped(1)
+                return
+            if not await self._wait_for_room(len(data)):
+                return
+            turn_id = self._audio_turn
+        else:
+            # A new reply starts, or the skipped one ends: deliver audio again from here on.
+            self._skip_audio = False
+            turn_id = json.loads(data).get("turn_id")
+            if kind == "audio_start":
+                self._audio_turn = turn_id
+        self._audio.append((time.monotonic(), data, kind, on_sent, turn_id))
+        self.audio_bytes += len(data)
+
+    async def _wait_for_room(self, size: int) -> bool:
+        deadline = time.monotonic() + self.stall_timeout
+        while self._audio and self.audio_bytes + size > self.max_audio_bytes and not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._overflow()
+                return False
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        return not self._closed
+
+    def _overflow(self):
+        self._skip_audio = True
+        self._count_dropped(1)
+        self.stats["overflows"] += 1
+        writer_stats["overflows"] += 1
+        logging.warning(
+            f"📶 Client is {self.audio_bytes / 1024:.0f} KB of audio behind; dropping the rest of this reply "
+            f"({self.stats['overflows']}/{self.max_overflows})"
+        )
+        if self.stats["overflows"] >= self.max_overflows:
+            self._disconnect_slow_client()
+
+    def _discard_audio(self, turn_id: Optional[int] = None):
+        """Drop the queued audio of ``turn_id`` (of every turn if None); a later reply's is kept."""
+        # The browser stops playback on audio_interrupt; frames still queued would only be discarded there.
+        kept, dropped = deque(), 0
+        for entry in self._audio:
+            _, _, kind, _, entry_turn = entry
+            if turn_id is not None and entry_turn != turn_id:
+                kept.append(entry)
+            elif kind == "audio":
+                dropped += 1
+        self._audio = kept
+        self.audio_bytes = sum(len(entry[1]) for entry in kept)
+        self._drained.set()
+        self._count_dropped(dropped)
+
+    def _count_dropped(self, n: int):
+        self.stats["dropped_audio"] += n
+        writer_stats["dropped_audio"] += n
+
+    def _check_backlog(self):
+        if len(self._control) + len(self._text) > self.max_messages:
+            logging.warning(f"📶 Client has {self.max_messages}+ unsent messages queued")
+            self._disconnect_slow_client()
+
+    def _disconnect_slow_client(self):
+        if self._closed:
+            return
+        writer_stats["slow_client_disconnects"] += 1
+        self._shutdown()
+
+        async def close():
+            try:
+                await self.websocket.close(code=1013)
+            except Exception as e:
+                logging.debug(f"Error closing slow client: {e}")
+        asyncio.create_task(close())
+
+    def _next(self):
+        """``(enqueued_at, data, kind, on_sent)``; ``kind`` is only set for the audio lane."""
+        if self._control:
+            enqueued_at, data = self._control.popleft()
+            return enqueued_at, data, None, None
+        if self._text:
+            enqueued_at, data = self._text.popleft()
+            if isinstance(data, list):
+                data = json.dumps({"type": "llm_chunk", "data": "".join(data)})
+            return enqueued_at, data, None, None
+        enqueued_at, data, kind, on_sent, _ = self._audio.popleft()
+        return enqueued_at, data, kind, on_sent
+
+    async def _run(self):
+        while True:
+            while not self.depth:
+                if self._closed:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+            enqueued_at, data, kind, on_sent = self._next()
+            started = time.monotonic()
+            try:
+                if isinstance(data, bytes):
+                    await self.websocket.send_bytes(data)
+                else:
+                    await self.websocket.send_text(data)
+            except Exception as e:
+                writer_stats["send_errors"] += 1
+                logging.info(f"Client send failed, stopping writer: {e}")
+                self._shutdown()
+                return
+            now = time.monotonic()
+            if self.recorder is not None:
+                self.recorder.server_message(data, kind)
+            if kind is not None:
+                self.audio_bytes -= len(data)
+                self._drained.set()
+                if on_sent is not None:
+                    on_sent()
+            pipeline_metrics.client_send_latency.observe(now - enqueued_at)
+            self.stats["messages_sent"] += 1
+            self.stats["bytes_sent"] += len(data)
+            self.stats["max_queue_ms"] = max(self.stats["max_queue_ms"], (started - enqueued_at) * 1000)
+            self.stats["max_send_ms"] = max(self.stats["max_send_ms"], (now - started) * 1000)
+            writer_stats["messages_sent"] += 1
+            writer_stats["bytes_sent"] += len(data)
+
+    def _shutdown(self):
+        self._closed = True
+        self._control.clear()
+        self._text.clear()
+        self._audio.clear()
+        self.audio_bytes = 0
+        self._ready.set()
+        self._drained.set()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        _active.discard(self)
+
+    async def close(self, drain_timeout: float = 1.0):
+        """Stop accepting messages; give what's queued up to ``drain_timeout`` to go out."""
+        if self._task is None:
+            self._closed = True
+            return
+        self._closed = True
+        self._ready.set()
+        self._drained.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=drain_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError, Exception):
+            pass
+        self._shutdown()
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "queued_control": len(self._control),
+            "queued_text": len(self._text),
+            "queued_audio": len(self._audio),
+            "queued_audio_bytes": self.audio_bytes,
+        }
@@ -8,6 +8,105 @@ ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
 MURF_API_KEY = os.getenv("MURF_API_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 
+# Synthesized speech cache: in-memory size, plus an optional on-disk tier
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR")
+TTS_CACHE_DISK_MB = int(os.getenv("TTS_CACHE_DISK_MB", "512"))
+
+# Weather skill: geocodes are cached forever (persisted here), unknown places and current
+# conditions for a few minutes
+WEATHER_GEOCODE_CACHE = os.getenv("WEATHER_GEOCODE_CACHE", ".cache/geocodes.json")
+WEATHER_GEOCODE_MISS_TTL = float(os.getenv("WEATHER_GEOCODE_MISS_TTL", "300"))
+WEATHER_FORECAST_TTL = float(os.getenv("WEATHER_FORECAST_TTL", "600"))
+
+# Search skill: Tavily results are awaited at most this long, cached per API key and normalized query
+WEB_SEARCH_BUDGET = float(os.getenv("WEB_SEARCH_BUDGET", "1.5"))
+WEB_SEARCH_CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", "900"))
+WEB_SEARCH_MAX_RESULTS = int(os.getenv("WEB_SEARCH_MAX_RESULTS", "3"))
+
+# Conversation memory: recent exchanges kept verbatim up to this many (estimated) tokens
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500"))
+
+# Start responding on AssemblyAI's unformatted end-of-turn; commit when the formatted turn matches
+SPECULATIVE_LLM = os.getenv("SPECULATIVE_LLM", "true").lower() in ("1", "true", "yes")
+SPECULATION_COMMIT_TIMEOUT = float(os.getenv("SPECULATION_COMMIT_TIMEOUT", "3.0"))
+
+# Text handed to Murf: first clause flushed after at most this many words, then sentence groups
+TTS_FIRST_FLUSH_WORDS = int(os.getenv("TTS_FIRST_FLUSH_WORDS", "8"))
+TTS_GROUP_MIN_CHARS = int(os.getenv("TTS_GROUP_MIN_CHARS", "60"))
+
+# Turn deadline: budget from end-of-turn until the reply reaches the user. With under TURN_SHORT_BELOW seconds
+# left when Gemini is asked, its output is capped at TURN_SHORT_MAX_TOKENS; TTS that can't make it is dropped for text
+TURN_DEADLINE = float(os.getenv("TURN_DEADLINE", "6.0"))
+TURN_SHORT_BELOW = float(os.getenv("TURN_SHORT_BELOW", "3.0"))
+TURN_SHORT_MAX_TOKENS = int(os.getenv("TURN_SHORT_MAX_TOKENS", "60"))
+TURN_TTS_RESERVE = float(os.getenv("TURN_TTS_RESERVE", "0.5"))
+LLM_STALL_TIMEOUT = float(os.getenv("LLM_STALL_TIMEOUT", "10.0"))  # longest gap between Gemini chunks once streaming
+
+# TTS hedging: no audio by the TTS_HEDGE_QUANTILE of recent first-audio latencies -> a second Murf
+# context (on MURF_HEDGE_URL if set), whichever answers first is streamed; at most TTS_HEDGE_MAX_RATE of turns hedge
+TTS_HEDGE_ENABLED = os.getenv("TTS_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+TTS_HEDGE_QUANTILE = float(os.getenv("TTS_HEDGE_QUANTILE", "0.9"))
+TTS_HEDGE_MIN_DELAY = float(os.getenv("TTS_HEDGE_MIN_DELAY", "0.3"))
+TTS_HEDGE_MAX_DELAY = float(os.getenv("TTS_HEDGE_MAX_DELAY", "2.0"))
+TTS_HEDGE_MAX_RATE = float(os.getenv("TTS_HEDGE_MAX_RATE", "0.1"))
+
+# Website skill: alias catalog, re-read automatically when the file changes
+WEBSITE_CATALOG_PATH = os.getenv(
+    "WEBSITE_CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "websites.json")
+)
+
+# Canned answers: FAQ table matched against whole transcripts, their audio kept (and persisted) separately
+FAQ_PATH = os.getenv("FAQ_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "faq.json"))
+FAQ_MIN_SIMILARITY = float(os.getenv("FAQ_MIN_SIMILARITY", "0.88"))
+FAQ_AUDIO_DIR = os.getenv("FAQ_AUDIO_DIR", ".cache/faq_audio")
+
+# Microphone audio to AssemblyAI: re-framed into packets of this size, oldest dropped past the cap
+STT_PACKET_MS = int(os.getenv("STT_PACKET_MS", "50"))
+STT_MAX_BUFFERED_MS = int(os.getenv("STT_MAX_BUFFERED_MS", "2000"))
+
+# Voice activity gate: only speech (plus pre-roll/hangover and keepalives) is sent to AssemblyAI.
+# Hangover must cover AssemblyAI's end-of-turn silence or turns only end at the next keepalive.
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() in ("1", "true", "yes")
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "300"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "1500"))
+
+# Barge-in: a partial transcript this long while Brevix is speaking interrupts the reply
+BARGE_IN_ENABLED = os.getenv("BARGE_IN_ENABLED", "true").lower() in ("1", "true", "yes")
+BARGE_IN_MIN_WORDS = int(os.getenv("BARGE_IN_MIN_WORDS", "1"))
+BARGE_IN_MIN_SPEECH_MS = int(os.getenv("BARGE_IN_MIN_SPEECH_MS", "300"))
+
+# Outbound queue per browser: audio backlog cap, how long TTS may wait for room, overflows before disconnect
+CLIENT_QUEUE_AUDIO_KB = int(os.getenv("CLIENT_QUEUE_AUDIO_KB", "256"))
+CLIENT_STALL_TIMEOUT = float(os.getenv("CLIENT_STALL_TIMEOUT", "2.0"))
+CLIENT_MAX_OVERFLOWS = int(os.getenv("CLIENT_MAX_OVERFLOWS", "3"))
+
+# Admission control: per-process caps (0 = unlimited) on sessions and each upstream resource;
+# past a cap, callers wait up to ADMISSION_WAIT seconds (at most ADMISSION_QUEUE of them) before a "busy" reply
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "200"))
+MAX_STT_STREAMS = int(os.getenv("MAX_STT_STREAMS", "200"))
+MAX_GEMINI_STREAMS = int(os.getenv("MAX_GEMINI_STREAMS", "64"))
+MAX_MURF_STREAMS = int(os.getenv("MAX_MURF_STREAMS", "64"))
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "32"))
+ADMISSION_WAIT = float(os.getenv("ADMISSION_WAIT", "2.0"))
+
+# Session state store: "memory" (per worker) or "sqlite:<path>" shared by workers/nodes on one volume
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+
+# Session recording for offline replay (benchmarks/replay_session.py): unset = off. A fraction
+# SESSION_RECORD_RATE of sessions is recorded; microphone audio past SESSION_RECORD_MAX_MB per session is dropped
+SESSION_RECORD_DIR = os.getenv("SESSION_RECORD_DIR")
+SESSION_RECORD_RATE = float(os.getenv("SESSION_RECORD_RATE", "1.0"))
+SESSION_RECORD_MAX_MB = int(os.getenv("SESSION_RECORD_MAX_MB", "64"))
+
+# Upstream endpoints, overridable to run against local stand-ins (benchmarks/bench_ws_load.py)
+ASSEMBLYAI_STREAMING_HOST = os.getenv("ASSEMBLYAI_STREAMING_HOST", "streaming.assemblyai.com")
+MURF_STREAM_URL = os.getenv("MURF_STREAM_URL", "wss://api.murf.ai/v1/speech/stream-input")
+MURF_HEDGE_URL = os.getenv("MURF_HEDGE_URL")  # unset: hedges go to MURF_STREAM_URL too
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")  # unset: Google's default endpoint
+TAVILY_SEARCH_URL = os.getenv("TAVILY_SEARCH_URL", "https://api.tavily.com/search")
+
 if not GEMINI_API_KEY:
     print("⚠️ Warning: GEMINI_API_KEY not loaded from .env")
 if not ASSEMBLYAI_API_KEY:
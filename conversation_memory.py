@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for budgeting on the hot path."""
+    return max(1, (len(text) + 3) // 4)
+
+
+class ConversationMemory:
+    """Per-session chat history for Gemini, bounded by a token budget.
+
+    Only the raw user text and model replies are stored; the persona lives in the model's
+    system instruction. ``history()`` returns the most recent exchanges that fit in
+    ``token_budget``, preceded by a rolling summary of everything older. Exchanges that slide
+    out of the window are folded into that summary by a background task so the prompt stays
+    roughly constant in size no matter how long the conversation runs.
+    """
+
+    def __init__(self, token_budget: int = 1500, summary_budget: int = 200):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.summary = ""
+        self._turns: List[dict] = []  # {"user": str, "model": str, "tokens": int}
+        self._overflow: List[dict] = []
+        self._compaction: Optional[asyncio.Task] = None
+        self.stats = {"turns": 0, "compactions": 0, "compaction_failures": 0, "last_prompt_tokens": 0}
+
+    def add_exchange(self, user_text: str, model_text: str):
+        self._turns.append({
+            "user": user_text,
+            "model": model_text,
+            "tokens": estimate_tokens(user_text) + estimate_tokens(model_text),
+        })
+        self.stats["turns"] += 1
+        total = sum(t["tokens"] for t in self._turns)
+        # Slide the window, always keeping the latest exchange even if it alone is over budget.
+        while total > self.token_budget and len(self._turns) > 1:
+            oldest = self._turns.pop(0)
+            total -= oldest["tokens"]
+            self._overflow.append(oldest)
+
+    def history(self) -> List[dict]:
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [f"Summary of our conversation so far: {self.summary}"]})
+            contents.append({"role": "model", "parts": ["Understood."]})
+        for turn in self._turns:
+            contents.append({"role": "user", "parts": [turn["user"]]})
+            contents.append({"role": "model", "parts": [turn["model"]]})
+        return contents
+
+    def prompt_tokens(self, user_text: str) -> int:
+        """Estimated history + new message tokens for the next request."""
+        tokens = estimate_tokens(user_text) + sum(t["tokens"] for t in self._turns)
+        if self.summary:
+            tokens += estimate_tokens(self.summary) + 8
+        self.stats["last_prompt_tokens"] = tokens
+        return tokens
+
+    def compact_in_background(self, model):
+        """Fold overflowed exchanges into the summary using ``model``, if not already running."""
+        if not self._overflow or (self._compaction and not self._compaction.done()):
+            return
+        self._compaction = asyncio.create_task(self._compact(model))
+
+    async def _compact(self, model):
+        # The batch stays in _overflow (and so in to_dict snapshots) until its summary is stored.
+        batch = list(self._overflow)
+        transcript = "\n".join(f"User: {t['user']}\nBrevix: {t['model']}" for t in batch)
+        request = (
+            f"Update this running summary of a voice conversation with the new exchanges below. "
+            f"Keep names, facts and open questions; at most {self.summary_budget // 2} words, plain text.\n\n"
+            f"Current summary: {self.summary or '(none)'}\n\nNew exchanges:\n{transcript}"
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(
+                None,
+                lambda: model.generate_content(request, generation_config={"max_output_tokens": self.summary_budget}),
+            )
+            summary = (response.text or "").strip()
+            if summary:
+                self.summary = summary
+            del self._overflow[:len(batch)]
+            self.stats["compactions"] += 1
+            logging.info(f"Compacted {len(batch)} older exchanges into a {estimate_tokens(self.summary)}-token summary")
+        except Exception as e:
+            # Losing old context is preferable to an unbounded prompt; the window is already trimmed.
+            del self._overflow[:len(batch)]
+            self.stats["compaction_failures"] += 1
+            logging.warning(f"Conversation summary update failed: {e}")
+
+    def to_dict(self) -> dict:
+        """Serializable state for a session store; exchanges awaiting compaction stay in the window."""
+        return {
+            "summary": self.summary,
+            "turns": [{"user": t["user"], "model": t["model"]} for t in self._overflow + self._turns],
+        }
+
+    def restore(self, state: dict):
+        self.summary = state.get("summary") or ""
+        self._turns, self._overflow = [], []
+        for turn in state.get("turns") or []:
+            self.add_exchange(turn["user"], turn["model"])
+
+    def cancel(self):
+        if self._compaction and not self._compaction.done():
+            self._compaction.cancel()
@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as google_exceptions
+
+
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+
+
+def is_key_error(error: BaseException) -> bool:
+    """True if Gemini rejected the request because of the API key itself."""
+    if isinstance(error, (google_exceptions.Unauthenticated, google_exceptions.PermissionDenied)):
+        return True
+    if isinstance(error, google_exceptions.InvalidArgument):
+        return "api key" in str(error).lower()
+    return False
+
+
+class GeminiModelCache:
+    """Size-bounded LRU of ``GenerativeModel`` instances, one per API key.
+
+    Each model gets its own ``GenerativeServiceClient`` built with that key, so nothing goes
+    through ``genai.configure`` and concurrent sessions with different keys cannot overwrite
+    each other's credentials. Models (and their HTTP/gRPC channels) are reused across turns
+    and sessions; a key that Gemini rejects should be dropped with ``evict``. ``api_endpoint``
+    points the clients somewhere other than Google (e.g. ``http://127.0.0.1:9102`` for a local
+    stand-in) and switches them to the REST transport.
+    """
+
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME, max_size: int = 64,
+                 api_endpoint: Optional[str] = None, **model_kwargs):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.api_endpoint = api_endpoint
+        self.model_kwargs = model_kwargs
+        self._models: "OrderedDict[str, genai.GenerativeModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "lru_evictions": 0, "key_error_evictions": 0, "create_errors": 0}
+
+    def _create(self, api_key: str) -> genai.GenerativeModel:
+        model = genai.GenerativeModel(self.model_name, **self.model_kwargs)
+        # GenerativeModel only falls back to the process-wide default client when _client is unset.
+        if self.api_endpoint:
+            model._client = glm.GenerativeServiceClient(
+                client_options={"api_key": api_key, "api_endpoint": self.api_endpoint}, transport="rest"
+            )
+        else:
+            model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+        return model
+
+    def get(self, api_key: str) -> Optional[genai.GenerativeModel]:
+        if not api_key:
+            return None
+        with self._lock:
+            model = self._models.get(api_key)
+            if model is not None:
+                self._models.move_to_end(api_key)
+                self.stats["hits"] += 1
+                return model
+            self.stats["misses"] += 1
+        try:
+            model = self._create(api_key)
+        except Exception as e:
+            self.stats["create_errors"] += 1
+            logging.error(f"Error creating Gemini model: {e}")
+            return None
+        with self._lock:
+            # Another caller may have raced us; keep whichever got there first.
+            model = self._models.setdefault(api_key, model)
+            self._models.move_to_end(api_key)
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+                self.stats["lru_evictions"] += 1
+        return model
+
+    def evict(self, api_key: str):
+        with self._lock:
+            if self._models.pop(api_key, None) is not None:
+                self.stats["key_error_evictions"] += 1
+                logging.warning(f"Evicted Gemini model for rejected key {hashlib.sha256(api_key.encode()).hexdigest()[:8]}")
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._models),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+        }
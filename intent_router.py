@@ -0,0 +1,161 @@
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class IntentMatch(NamedTuple):
+    skill: str
+    slots: Dict[str, str]
+
+
+_NAMED_GROUP = re.compile(r"\(\?P<([A-Za-z_][A-Za-z0-9_]*)>")
+
+
+class _Rule(NamedTuple):
+    skill: str
+    pattern: str
+    group: str
+    slot_groups: Dict[str, str]  # renamed group -> slot name
+    clean: Optional[Callable[[Dict[str, str]], Optional[Dict[str, str]]]]
+    regex: re.Pattern  # the pattern alone, for the rare retry after a rejected match
+
+
+class IntentRouter:
+    """Routes a transcript to a skill with one regex search.
+
+    Every registered pattern is wrapped in its own named group and joined into a single
+    alternation, compiled once. The leftmost match wins whatever the registration order, so a
+    ``^``-anchored pattern beats an unanchored one matching later in the same transcript;
+    registration order only breaks ties between patterns matching at the same position.
+    Anchored patterns that could swallow another skill's phrasing must exclude it themselves
+    (e.g. with a negative lookahead). Slot groups are
+    written as ordinary named groups (``(?P<location>...)``) and come back in
+    ``IntentMatch.slots`` after the skill's optional ``clean`` hook has tidied them; if the
+    hook rejects a match (returns ``None``) the transcript is routed as if that pattern were
+    not registered: the leftmost match among all the other patterns wins.
+    """
+
+    def __init__(self):
+        self._rules: List[_Rule] = []
+        self._by_group: Dict[str, _Rule] = {}
+        self._combined: Optional[re.Pattern] = None
+
+    def register(self, skill: str, patterns: List[str],
+                 clean: Optional[Callable[[Dict[str, str]], Optional[Dict[str, str]]]] = None):
+        for pattern in patterns:
+            index = len(self._rules)
+            slot_groups = {}
+
+            def rename(match):
+                renamed = f"r{index}_{match.group(1)}"
+                slot_groups[renamed] = match.group(1)
+                return f"(?P<{renamed}>"
+
+            rewritten = _NAMED_GROUP.sub(rename, pattern)
+            rule = _Rule(skill, rewritten, f"r{index}", slot_groups, clean, re.compile(rewritten))
+            self._rules.append(rule)
+            self._by_group[rule.group] = rule
+        self._combined = re.compile("|".join(f"(?P<{r.group}>{r.pattern})" for r in self._rules))
+
+    @property
+    def skills(self) -> List[str]:
+        return list(dict.fromkeys(r.skill for r in self._rules))
+
+    def _accept(self, rule: _Rule, match: re.Match) -> Optional[IntentMatch]:
+        slots = {slot: (match.group(g) or "") for g, slot in rule.slot_groups.items()}
+        if rule.clean:
+            slots = rule.clean(slots)
+        if not slots:
+            return None
+        return IntentMatch(rule.skill, slots)
+
+    def route(self, user_text: str) -> Optional[IntentMatch]:
+        if not user_text or self._combined is None:
+            return None
+        text = user_text.lower().strip()
+        match = self._combined.search(text)
+        if match is None:
+            return None
+        # The outer wrapper group is the last one to close, so lastgroup names the rule.
+        rule = self._by_group[match.lastgroup]
+        result = self._accept(rule, match)
+        if result is not None:
+            return result
+        # Rare: the first hit was rejected by its clean hook. Take the leftmost match among all
+        # the other rules (earlier or later registered), until one is accepted.
+        rejected = {rule.group}
+        while True:
+            best = None
+            for other in self._rules:
+                if other.group in rejected:
+                    continue
+                match = other.regex.search(text)
+                if match and (best is None or match.start() < best[1].start()):
+                    best = (other, match)
+            if best is None:
+                return None
+            rule, match = best
+            result = self._accept(rule, match)
+            if result is not None:
+                return result
+            rejected.add(rule.group)
+
+
+_SITE_SUFFIX = r"(?:\s+(?:website|site|page))?"
+_END = r"(?:\.|!|\?|$)"
+
+
+def _clean_website(slots: Dict[str, str]) -> Optional[Dict[str, str]]:
+    website = slots["website"].strip().rstrip(",.!?")
+    # Remove common filler words
+    website = re.sub(r"^(the\s+|a\s+|an\s+)", "", website)
+    website = re.sub(r"\s+(website|site|page)$", "", website)
+    return {"website": website} if website else None
+
+
+def _clean_weather(slots: Dict[str, str]) -> Optional[Dict[str, str]]:
+    location = slots["location"].strip().rstrip("?.!")
+    # Strip leading articles
+    location = re.sub(r"^(the|a|an)\s+", "", location)
+    return {"location": location} if location else None
+
+
+def _clean_search(slots: Dict[str, str]) -> Optional[Dict[str, str]]:
+    query = slots["query"].strip().rstrip("?.!")
+    query = re.sub(r"\s+(?:for me|please)$", "", query)
+    return {"query": query} if len(query) > 1 else None
+
+
+# Phrasings the anchored search rules leave to other skills: "look up the weather in paris"
+# is weather, "google maps" is a site, not a search for "maps".
+_NOT_WEATHER = r"(?!.*\b(?:weather|temperature|forecast)\s+(?:in|at|for)\s)"
+_GOOGLE_SITES = r"(?!\s+(?:maps|drive|news|docs|mail|photos|translate)\b)"
+
+
+def build_default_router() -> IntentRouter:
+    router = IntentRouter()
+    router.register("website", [
+        rf"^open\s+(?P<website>.+?){_SITE_SUFFIX}{_END}",
+        rf"^go\s+to\s+(?P<website>.+?){_SITE_SUFFIX}{_END}",
+        rf"^visit\s+(?P<website>.+?){_SITE_SUFFIX}{_END}",
+        rf"^navigate\s+to\s+(?P<website>.+?){_SITE_SUFFIX}{_END}",
+        rf"^(?:can\s+you\s+)?(?:please\s+)?open\s+(?P<website>.+?){_SITE_SUFFIX}(?:\s+for\s+me)?{_END}",
+        rf"^take\s+me\s+to\s+(?P<website>.+?){_SITE_SUFFIX}{_END}",
+        rf"^show\s+me\s+(?P<website>.+?){_SITE_SUFFIX}{_END}",
+        rf"^launch\s+(?P<website>.+?){_SITE_SUFFIX}{_END}",
+    ], clean=_clean_website)
+    # Common phrasings: "weather in <loc>", "what's the weather in <loc>", "forecast for <loc>"
+    router.register("weather", [
+        r"(?:weather|temperature|forecast)\s+(?:in|at|for)\s+(?P<location>.+)$",
+    ], clean=_clean_weather)
+    # Explicit requests to look something up, plus questions about what's new
+    router.register("search", [
+        rf"^{_NOT_WEATHER}(?:can\s+you\s+)?(?:please\s+)?(?:search|google{_GOOGLE_SITES}|look\s+up)\s+(?:(?:the\s+)?(?:web|internet|online)\s+)?(?:for\s+|about\s+)?(?P<query>.+)$",
+        rf"^{_NOT_WEATHER}(?:can\s+you\s+)?(?:please\s+)?find\s+(?:out\s+)?(?:information\s+|info\s+)?(?:about|on)\s+(?P<query>.+)$",
+        r"(?P<query>(?:what(?:'s|\s+is)\s+the\s+)?(?:latest|recent|current)\s+(?:news|updates?|developments?)\s+(?:on|about|in|for)\s+.+)$",
+        r"(?P<query>(?:news|headlines)\s+(?:on|about)\s+.+)$",
+    ], clean=_clean_search)
+    return router
+
+
+# Shared router used by the voice pipeline; other modules may register more skills on it.
+intent_router = build_default_router()
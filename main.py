@@ -4,15 +4,19 @@ import logging
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from fastapi.responses import PlainTextResponse
 from pathlib import Path as PathLib
 import json
 import asyncio
 import config
+from types import MappingProxyType
 from typing import Type, List, Optional
 import base64
 import websockets
 from datetime import datetime
+import random
 import re
+import time
 
 import assemblyai as aai
 from assemblyai.streaming.v3 import (
@@ -25,8 +29,30 @@ from assemblyai.streaming.v3 import (
     TerminationEvent,
     TurnEvent,
 )
-import google.generativeai as genai
-import httpx
+
+from stream_bridge import iterate_in_thread
+from murf_pool import MurfPoolRegistry, MURF_VOICE_ID, MURF_VOICE_STYLE, MURF_SAMPLE_RATE, MURF_FORMAT
+from tts_cache import TTSAudioCache, tts_cache_key
+from tts_hedging import HedgePolicy, HedgedTurnTTS
+from weather import WeatherService
+from web_search import WebSearchService, format_digest
+from intent_router import intent_router
+from website_catalog import WebsiteCatalog
+from canned_responses import CannedResponses
+from gemini_clients import GeminiModelCache, is_key_error
+from conversation_memory import ConversationMemory
+from sessions import SessionRegistry, create_session_store
+from sentence_segmenter import SentenceSegmenter
+from barge_in import BargeInController, barge_in_stats
+from audio_ingest import AudioIngest, audio_ingest_metrics
+from vad import VoiceActivityGate, vad_metrics
+from metrics import TurnTimer, monitor_event_loop_lag, pipeline_metrics
+from speculation import SpeculativeTurn, GatedWebSocket, GatedMemory, normalize_transcript, speculation_stats
+from audio_channel import AudioChannel
+from client_writer import ClientWriter, client_writer_metrics
+from turn_deadline import TurnDeadline, DeadlineExceeded, turn_deadline_metrics
+from admission import AdmissionController, Busy
+from session_recorder import SessionRecorder, session_recorder_metrics
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 app = FastAPI()
@@ -35,85 +61,104 @@ BASE_DIR = PathLib(__file__).resolve().parent
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-# Global variables to store API keys (will be updated per session)
-current_api_keys = {
+# Server-wide default API keys; sessions may override them with their own
+DEFAULT_API_KEYS = MappingProxyType({
     "gemini": config.GEMINI_API_KEY,
     "assemblyai": config.ASSEMBLYAI_API_KEY,
     "murf": config.MURF_API_KEY,
     "tavily": config.TAVILY_API_KEY
-}
+})
+
+# Conversations, kept in a store that outlives a single connection (or worker, if shared)
+session_registry = SessionRegistry(
+    create_session_store(config.SESSION_STORE, ttl=config.SESSION_TTL),
+    DEFAULT_API_KEYS,
+    token_budget=config.CONVERSATION_TOKEN_BUDGET,
+)
+
+# Per-process caps on sessions and upstream streams, shared fairly between API keys
+admission = AdmissionController(
+    {
+        "sessions": config.MAX_SESSIONS,
+        "stt": config.MAX_STT_STREAMS,
+        "gemini": config.MAX_GEMINI_STREAMS,
+        "murf": config.MAX_MURF_STREAMS,
+    },
+    max_waiting=config.ADMISSION_QUEUE,
+    wait_timeout=config.ADMISSION_WAIT,
+)
+
+# Pre-opened Murf TTS websockets, one pool per API key
+murf_pools = MurfPoolRegistry(url=config.MURF_STREAM_URL)
+
+# Hedged TTS: a second Murf request when first audio is later than usual, within a rate budget
+tts_hedging = HedgePolicy(
+    quantile=config.TTS_HEDGE_QUANTILE,
+    min_delay=config.TTS_HEDGE_MIN_DELAY,
+    max_delay=config.TTS_HEDGE_MAX_DELAY,
+    max_rate=config.TTS_HEDGE_MAX_RATE,
+)
+murf_hedge_pools = MurfPoolRegistry(url=config.MURF_HEDGE_URL) if config.MURF_HEDGE_URL else murf_pools
+
+# Audio for texts that were already synthesized once
+tts_cache = TTSAudioCache(
+    max_memory_bytes=config.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+    disk_dir=config.TTS_CACHE_DIR,
+    disk_max_bytes=config.TTS_CACHE_DISK_MB * 1024 * 1024,
+)
+
+# Spoken website names -> URLs, hot-reloaded from the catalog data file
+website_catalog = WebsiteCatalog(config.WEBSITE_CATALOG_PATH)
+
+# Fixed answers to FAQ-style questions, spoken from pre-synthesized audio
+canned_responses = CannedResponses(config.FAQ_PATH, min_similarity=config.FAQ_MIN_SIMILARITY)
+canned_audio = TTSAudioCache(max_memory_bytes=8 * 1024 * 1024, disk_dir=config.FAQ_AUDIO_DIR or None)
+
+# Open-Meteo lookups with a shared HTTP client, geocode + forecast caches
+weather_service = WeatherService(
+    geocode_cache_path=config.WEATHER_GEOCODE_CACHE,
+    geocode_miss_ttl=config.WEATHER_GEOCODE_MISS_TTL,
+    forecast_ttl=config.WEATHER_FORECAST_TTL,
+)
+
+# Tavily searches with a shared HTTP client, per-query result cache and request coalescing
+web_search = WebSearchService(
+    url=config.TAVILY_SEARCH_URL,
+    cache_ttl=config.WEB_SEARCH_CACHE_TTL,
+    max_results=config.WEB_SEARCH_MAX_RESULTS,
+)
+
+BREVIX_SYSTEM_INSTRUCTION = """You are Brevix, a friendly AI voice assistant.
+
+PERSONA:
+- You are a super‑advanced robot from a multi‑universe where only AI robots exist
+- You are the younger brother of Shiv
+- Built by Sibsankar, a B.Tech CSE student from Odisha
+- Confident, calm, and subtly futuristic tone
+
+RESPONSE RULES:
+- Keep responses SHORT and conversational (voice responses should be brief)
+- If asked who built you: "I was built by Sibsankar, a B.Tech CSE student from Odisha."
+- If asked your name/who you are: "I am Brevix, a super‑advanced robot and younger brother of Shiv."
+- Focus on being helpful and direct
+- No markdown, plain text only
+"""
+
+# Gemini models per API key, each with its own client (no process-global genai.configure)
+gemini_models = GeminiModelCache(
+    api_endpoint=config.GEMINI_API_ENDPOINT, system_instruction=BREVIX_SYSTEM_INSTRUCTION
+)
 
 # Initialize Gemini model with default key if available
 if config.GEMINI_API_KEY:
-    genai.configure(api_key=config.GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+    gemini_models.get(config.GEMINI_API_KEY)
 else:
-    gemini_model = None
     logging.warning("Gemini model not initialized. GEMINI_API_KEY is missing.")
 
 
 def get_gemini_model(api_key: str = None):
-    """Get or create Gemini model with the provided API key"""
-    try:
-        if api_key:
-            genai.configure(api_key=api_key)
-            return genai.GenerativeModel('gemini-1.5-flash')
-        elif gemini_model:
-            return gemini_model
-        else:
-            return None
-    except Exception as e:
-        logging.error(f"Error configuring Gemini model: {e}")
-        return None
-
-
-def _detect_weather_intent(user_text: str) -> Optional[str]:
-    if not user_text:
-        return None
-    text = user_text.lower().strip()
-    # Try common phrasings: "weather in <loc>", "what's the weather in <loc>", "forecast for <loc>"
-    match = re.search(r"(weather|temperature|forecast)\s+(in|at|for)\s+(.+)$", text)
-    if match:
-        location = match.group(3).strip().rstrip("?.!")
-        # Strip leading articles
-        location = re.sub(r"^(the|a|an)\s+", "", location)
-        return location if location else None
-    return None
-
-
-def _detect_website_intent(user_text: str) -> Optional[str]:
-    """Detect if user wants to open a website and extract the website name/URL"""
-    if not user_text:
-        return None
-    
-    text = user_text.lower().strip()
-    logging.info(f"🔍 Checking website intent for: '{text}'")
-    
-    # Common patterns for opening websites - more specific patterns
-    patterns = [
-        r"^open\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
-        r"^go\s+to\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)", 
-        r"^visit\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
-        r"^navigate\s+to\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
-        r"^(?:can\s+you\s+)?(?:please\s+)?open\s+(.+?)(?:\s+(?:website|site|page))?(?:\s+for\s+me)?(?:\.|!|\?|$)",
-        r"^take\s+me\s+to\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
-        r"^show\s+me\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
-        r"^launch\s+(.+?)(?:\s+(?:website|site|page))?(?:\.|!|\?|$)",
-    ]
-    
-    for i, pattern in enumerate(patterns):
-        match = re.search(pattern, text)
-        if match:
-            website = match.group(1).strip().rstrip(",.!?")
-            # Remove common filler words
-            website = re.sub(r"^(the\s+|a\s+|an\s+)", "", website)
-            website = re.sub(r"\s+(website|site|page)$", "", website)
-            if website:
-                logging.info(f"✅ Website intent matched with pattern {i+1}: '{website}'")
-                return website
-    
-    logging.info("❌ No website intent detected")
-    return None
+    """Get the cached Gemini model for the provided API key (or the default key)"""
+    return gemini_models.get(api_key or config.GEMINI_API_KEY)
 
 
 def _normalize_website_url(website: str) -> Optional[str]:
@@ -123,90 +168,10 @@ def _normalize_website_url(website: str) -> Optional[str]:
     
     website = website.lower().strip()
     
-    # Common website mappings
-    website_mappings = {
-        # Social Media
-        'facebook': 'https://facebook.com',
-        'instagram': 'https://instagram.com',
-        'twitter': 'https://twitter.com',
-        'x': 'https://x.com',
-        'linkedin': 'https://linkedin.com',
-        'tiktok': 'https://tiktok.com',
-        'snapchat': 'https://snapchat.com',
-        'whatsapp': 'https://web.whatsapp.com',
-        'telegram': 'https://web.telegram.org',
-        'discord': 'https://discord.com',
-        'reddit': 'https://reddit.com',
-        'pinterest': 'https://pinterest.com',
-        
-        # Search Engines
-        'google': 'https://google.com',
-        'bing': 'https://bing.com',
-        'yahoo': 'https://yahoo.com',
-        'duckduckgo': 'https://duckduckgo.com',
-        
-        # Entertainment
-        'youtube': 'https://youtube.com',
-        'netflix': 'https://netflix.com',
-        'spotify': 'https://spotify.com',
-        'twitch': 'https://twitch.tv',
-        'amazon prime': 'https://primevideo.com',
-        'disney plus': 'https://disneyplus.com',
-        'hulu': 'https://hulu.com',
-        
-        # News
-        'bbc': 'https://bbc.com',
-        'cnn': 'https://cnn.com',
-        'news': 'https://news.google.com',
-        'times of india': 'https://timesofindia.indiatimes.com',
-        'the hindu': 'https://thehindu.com',
-        'ndtv': 'https://ndtv.com',
-        
-        # Shopping
-        'amazon': 'https://amazon.com',
-        'flipkart': 'https://flipkart.com',
-        'ebay': 'https://ebay.com',
-        'myntra': 'https://myntra.com',
-        'nykaa': 'https://nykaa.com',
-        
-        # Education & Learning
-        'coursera': 'https://coursera.org',
-        'udemy': 'https://udemy.com',
-        'khan academy': 'https://khanacademy.org',
-        'edx': 'https://edx.org',
-        'duolingo': 'https://duolingo.com',
-        
-        # Technology
-        'github': 'https://github.com',
-        'stackoverflow': 'https://stackoverflow.com',
-        'medium': 'https://medium.com',
-        'dev.to': 'https://dev.to',
-        'hackernews': 'https://news.ycombinator.com',
-        
-        # Email
-        'gmail': 'https://gmail.com',
-        'outlook': 'https://outlook.com',
-        'yahoo mail': 'https://mail.yahoo.com',
-        
-        # Maps
-        'google maps': 'https://maps.google.com',
-        'maps': 'https://maps.google.com',
-        
-        # Cloud Storage
-        'google drive': 'https://drive.google.com',
-        'dropbox': 'https://dropbox.com',
-        'onedrive': 'https://onedrive.com',
-        
-        # AI Tools
-        'chatgpt': 'https://chat.openai.com',
-        'claude': 'https://claude.ai',
-        'bard': 'https://bard.google.com',
-        'copilot': 'https://copilot.microsoft.com',
-    }
-    
     # Check direct mapping first
-    if website in website_mappings:
-        return website_mappings[website]
+    url = website_catalog.exact(website)
+    if url:
+        return url
     
     # If it already looks like a URL, validate and return
     if website.startswith(('http://', 'https://')):
@@ -218,10 +183,10 @@ def _normalize_website_url(website: str) -> Optional[str]:
             return f'https://{website}'
         return website
     
-    # Try to find partial matches
-    for key, url in website_mappings.items():
-        if website in key or key in website:
-            return url
+    # Try to find partial matches, best-ranked first
+    url = website_catalog.lookup(website)
+    if url:
+        return url
     
     # Last resort: assume it's a domain and add .com
     if ' ' not in website and len(website) > 2:
@@ -231,103 +196,165 @@ def _normalize_website_url(website: str) -> Optional[str]:
     return f'https://www.google.com/search?q={website.replace(" ", "+")}'
 
 
-def _weather_code_description(code: int) -> str:
-    # Open-Meteo WMO weather interpretation codes
-    mapping = {
-        0: "clear sky",
-        1: "mainly clear",
-        2: "partly cloudy",
-        3: "overcast",
-        45: "fog",
-        48: "depositing rime fog",
-        51: "light drizzle",
-        53: "moderate drizzle",
-        55: "dense drizzle",
-        56: "light freezing drizzle",
-        57: "dense freezing drizzle",
-        61: "slight rain",
-        63: "moderate rain",
-        65: "heavy rain",
-        66: "light freezing rain",
-        67: "heavy freezing rain",
-        71: "slight snow",
-        73: "moderate snow",
-        75: "heavy snow",
-        77: "snow grains",
-        80: "light showers",
-        81: "moderate showers",
-        82: "violent showers",
-        85: "slight snow showers",
-        86: "heavy snow showers",
-        95: "thunderstorm",
-        96: "thunderstorm with slight hail",
-        99: "thunderstorm with heavy hail",
-    }
-    return mapping.get(int(code), "")
+def open_turn_tts(murf_key: str) -> HedgedTurnTTS:
+    """Start checking out a Murf connection for one turn (hedged if enabled)."""
+    context_id = f"voice-agent-context-{datetime.now().isoformat()}"
+    return HedgedTurnTTS(
+        murf_pools.get(murf_key), {"voiceId": MURF_VOICE_ID, "style": MURF_VOICE_STYLE}, context_id,
+        policy=tts_hedging if config.TTS_HEDGE_ENABLED else None,
+        hedge_pool=murf_hedge_pools.get(murf_key) if config.TTS_HEDGE_ENABLED else None,
+        admit_hedge=lambda: admission.try_acquire("murf", murf_key),
+    )
+
 
+async def speak_text(text: str, murf_key: str, audio_channel: AudioChannel, timer: TurnTimer,
+                     deadline: TurnDeadline, cache: TTSAudioCache = tts_cache):
+    """Speak a complete, known-up-front text: from the TTS cache if possible, else via Murf.
 
-def _fetch_weather_sync(location: str) -> Optional[str]:
+    The text is already on screen, so without a Murf key, or if Murf can't produce audio within
+    the turn's deadline, the reply simply stays text-only.
+    """
+    cache_key = tts_cache_key(MURF_VOICE_ID, MURF_VOICE_STYLE, MURF_SAMPLE_RATE, MURF_FORMAT, text)
+    cached_chunks = await cache.get(cache_key)
+    if cached_chunks:
+        logging.info(f"✅ TTS cache hit, replaying {len(cached_chunks)} audio chunks without Murf")
+        timer.mark("tts_first_audio")
+        deadline.complete()
+        audio_channel.start_turn()
+        await audio_channel.send_start()
+        for chunk in cached_chunks:
+            await audio_channel.send_audio_bytes(chunk)
+        await audio_channel.send_end()
+        return
+
+    if not murf_key:
+        deadline.degrade("text_only", "no Murf API key")
+        deadline.complete()
+        await audio_channel.send_end()
+        return
+    if deadline.remaining() < config.TURN_TTS_RESERVE:
+        deadline.degrade("text_only", "no time left for TTS")
+        deadline.complete()
+        await audio_channel.send_end()
+        return
+    try:
+        murf_permit = await deadline.run("admission", admission.acquire("murf", murf_key))
+    except (Busy, DeadlineExceeded) as e:
+        logging.warning(f"🚦 No Murf capacity for this reply ({e}); sending it as text only")
+        deadline.degrade("text_only", str(e))
+        deadline.complete()
+        await audio_channel.send_end()
+        return
+    tts = None
     try:
-        with httpx.Client(timeout=4.0) as client:
-            geo = client.get(
-                "https://geocoding-api.open-meteo.com/v1/search",
-                params={"name": location, "count": 1, "language": "en", "format": "json"},
-            ).json()
-            results = (geo or {}).get("results") or []
-            if not results:
-                return None
-            place = results[0]
-            lat = place.get("latitude")
-            lon = place.get("longitude")
-            display_name = place.get("name")
-            if not (lat and lon):
-                return None
-            wx = client.get(
-                "https://api.open-meteo.com/v1/forecast",
-                params={
-                    "latitude": lat,
-                    "longitude": lon,
-                    "current": "temperature_2m,apparent_temperature,relative_humidity_2m,wind_speed_10m,weather_code",
-                    "temperature_unit": "celsius",
-                    "wind_speed_unit": "kmh",
-                },
-            ).json()
-            current = (wx or {}).get("current") or {}
-            t = current.get("temperature_2m")
-            feels = current.get("apparent_temperature")
-            hum = current.get("relative_humidity_2m")
-            wind = current.get("wind_speed_10m")
-            code = current.get("weather_code")
-            desc = _weather_code_description(code) if code is not None else ""
-            if t is None:
-                return None
-            parts = [f"Weather in {display_name or location}: {round(t)}°C"]
-            if feels is not None:
-                parts.append(f"(feels {round(feels)}°C)")
-            if desc:
-                parts.append(f", {desc}")
-            if hum is not None:
-                parts.append(f", humidity {int(hum)}%")
-            if wind is not None:
-                parts.append(f", wind {round(wind)} km/h")
-            text = " ".join(parts)
-            return text.strip()
+        tts = open_turn_tts(murf_key)
+        await deadline.run("tts", tts.ready())
+        timer.mark("murf_connected")
+
+        # Send text and end signal
+        await tts.send_text(text, end=True)
+        timer.mark("tts_first_text")
+
+        # Signal audio start to client
+        audio_channel.start_turn()
+        await audio_channel.send_start()
+
+        # Stream audio to client, keeping a copy for the cache
+        audio_chunks = []
+        try:
+            async for audio in tts.audio(timeout=5.0, first_timeout=deadline.limit(5.0)):
+                if not audio_chunks:
+                    timer.mark("tts_first_audio")
+                    deadline.complete()
+                    logging.info("✅ First audio chunk for spoken response")
+                audio_bytes = base64.b64decode(audio)
+                audio_chunks.append(audio_bytes)
+                await audio_channel.send_audio_bytes(audio_bytes)
+            logging.info("TTS completed")
+            await audio_channel.send_end()
+            await cache.put(cache_key, audio_chunks)
+        except asyncio.TimeoutError:
+            if not audio_chunks and not deadline.remaining():
+                deadline.exceeded("tts")
+                deadline.degrade("text_only", "no audio from Murf in time")
+            else:
+                logging.warning("TTS timeout")
+            await audio_channel.send_end()
+        except websockets.ConnectionClosed:
+            logging.warning("TTS connection closed")
+            await audio_channel.send_end()
+
+    except DeadlineExceeded:
+        deadline.degrade("text_only", "Murf did not connect in time")
+        await audio_channel.send_end()
     except Exception as e:
-        logging.warning(f"Weather fetch failed: {e}")
-        return None
+        logging.error(f"TTS failed: {e}")
+        # Still complete the response without TTS
+        await audio_channel.send_end()
+    finally:
+        if tts is not None:
+            await tts.close()
+        murf_permit.release()
+
+
+async def synthesize_text(text: str, murf_key: str) -> List[bytes]:
+    """Synthesize a text via Murf without a listener; returns the audio chunks (empty on failure)."""
+    audio_chunks = []
+    async with admission.slot("murf", murf_key), murf_pools.get(murf_key).lease() as websocket:
+        context_id = f"voice-agent-context-{datetime.now().isoformat()}"
+        await websocket.send(json.dumps({
+            "voice_config": {"voiceId": MURF_VOICE_ID, "style": MURF_VOICE_STYLE},
+            "context_id": context_id
+        }))
+        await websocket.send(json.dumps({"text": text, "end": True, "context_id": context_id}))
+        while True:
+            response = json.loads(await asyncio.wait_for(websocket.recv(), timeout=10.0))
+            if response.get("audio"):
+                audio_chunks.append(base64.b64decode(response["audio"]))
+            if response.get("final"):
+                websocket.mark_done()
+                return audio_chunks
+
 
+async def warm_canned_audio(murf_key: str):
+    """Pre-synthesize every canned answer that isn't already in the canned audio cache."""
+    cached = synthesized = 0
+    for answer in canned_responses.answers:
+        cache_key = tts_cache_key(MURF_VOICE_ID, MURF_VOICE_STYLE, MURF_SAMPLE_RATE, MURF_FORMAT, answer)
+        if await canned_audio.get(cache_key):
+            cached += 1
+            continue
+        try:
+            await canned_audio.put(cache_key, await synthesize_text(answer, murf_key))
+            synthesized += 1
+        except Exception as e:
+            logging.warning(f"Could not pre-synthesize canned answer: {e}")
+    logging.info(f"💬 Canned answers ready ({synthesized} synthesized, {cached} from cache)")
 
-async def get_llm_response_stream(transcript: str, client_websocket: WebSocket, chat_history: List[dict], session_api_keys: dict):
+
+async def get_llm_response_stream(transcript: str, client_websocket: WebSocket, memory: ConversationMemory, session_api_keys: dict, audio_channel: AudioChannel, timer: TurnTimer, deadline: TurnDeadline):
     if not transcript or not transcript.strip():
         return
+    audio_channel.timer = timer
 
     # Use session API keys if provided, otherwise fall back to defaults
-    gemini_key = session_api_keys.get('gemini') or current_api_keys['gemini']
-    murf_key = session_api_keys.get('murf') or current_api_keys['murf']
+    gemini_key = session_api_keys.get('gemini') or DEFAULT_API_KEYS['gemini']
+    murf_key = session_api_keys.get('murf') or DEFAULT_API_KEYS['murf']
+
+    # Canned answers need neither Gemini nor (once their audio exists) Murf
+    canned = canned_responses.match(transcript)
+    if canned:
+        timer.mark("skill_decision")
+        logging.info(f"💬 Canned answer '{canned.id}' (similarity {canned.score}) - skipping Gemini")
+        await client_websocket.send_text(json.dumps({"type": "llm_chunk", "data": canned.answer}))
+        await speak_text(canned.answer, murf_key, audio_channel, timer, deadline, cache=canned_audio)
+        memory.add_exchange(transcript, canned.answer)
+        return
     
     session_gemini_model = get_gemini_model(gemini_key)
     if not session_gemini_model:
         logging.error("Cannot get LLM response because Gemini model is not initialized.")
+        timer.set_outcome("error")
         await client_websocket.send_text(json.dumps({
             "type": "error", 
             "message": "Gemini API key is missing or invalid. Please configure it in the settings."
@@ -336,6 +363,7 @@ async def get_llm_response_stream(transcript: str, client_websocket: WebSocket,
 
     if not murf_key:
         logging.error("Murf API key is missing.")
+        timer.set_outcome("error")
         await client_websocket.send_text(json.dumps({
             "type": "error", 
             "message": "Murf API key is missing. Please configure it in the settings."
@@ -343,9 +371,13 @@ async def get_llm_response_stream(transcript: str, client_websocket: WebSocket,
         return
 
     # Check for special skills FIRST, before connecting to any external services
+    intent = intent_router.route(transcript)
+    timer.mark("skill_decision")
+    if intent:
+        logging.info(f"🔍 Intent '{intent.skill}' matched with slots {intent.slots}")
     
     # Website opening skill: detect and handle directly
-    website_intent = _detect_website_intent(transcript)
+    website_intent = intent.slots["website"] if intent and intent.skill == "website" else None
     if website_intent:
         logging.info(f"🌐 Website intent detected: '{website_intent}' - Processing directly without Gemini")
         await client_websocket.send_text(json.dumps({"type": "status", "message": "Opening website..."}))
@@ -364,9 +396,10 @@ async def get_llm_response_stream(transcript: str, client_websocket: WebSocket,
                 "website_name": website_intent
             }))
             logging.info(f"🌐 Sent open_url command to client: {url}")
+            deadline.complete()
             
             # Add to chat history and return early (no TTS for website opening)
-            chat_history.append({"role": "model", "parts": [response_text]})
+            memory.add_exchange(transcript, response_text)
             logging.info("Website opening command completed - no TTS needed.")
             return
         else:
@@ -378,20 +411,17 @@ async def get_llm_response_stream(transcript: str, client_websocket: WebSocket,
                 "url": search_url,
                 "website_name": f"Search for {website_intent}"
             }))
-            chat_history.append({"role": "model", "parts": [response_text]})
+            deadline.complete()
+            memory.add_exchange(transcript, response_text)
             return
 
     # Weather skill: detect and answer directly with TTS
-    location = _detect_weather_intent(transcript)
+    location = intent.slots["location"] if intent and intent.skill == "weather" else None
     if location:
         await client_websocket.send_text(json.dumps({"type": "status", "message": "Checking weather..."}))
-        loop = asyncio.get_running_loop()
         weather_text = None
         try:
-            weather_text = await asyncio.wait_for(
-                loop.run_in_executor(None, _fetch_weather_sync, location),
-                timeout=5.0,
-            )
+            weather_text = await deadline.run("weather", weather_service.get_weather_text(location), cap=5.0)
         except Exception as e:
             logging.warning(f"Weather lookup timeout/error: {e}")
             weather_text = None
@@ -400,218 +430,408 @@ async def get_llm_response_stream(transcript: str, client_websocket: WebSocket,
             # Send to UI as if LLM chunk
             await client_websocket.send_text(json.dumps({"type": "llm_chunk", "data": weather_text}))
             
-            # Send to TTS (Fixed: Add proper TTS handling)
-            try:
-                murf_uri = f"wss://api.murf.ai/v1/speech/stream-input?api-key={murf_key}&sample_rate=44100&channel_type=MONO&format=MP3"
-                # FIXED: Changed `timeout` to `open_timeout`
-                async with websockets.connect(murf_uri, open_timeout=10) as websocket:
-                    voice_id = "en-US-natalie"
-                    context_id = f"voice-agent-context-{datetime.now().isoformat()}"
-                    
-                    # Send config
-                    config_msg = {
-                        "voice_config": {"voiceId": voice_id, "style": "Conversational"},
-                        "context_id": context_id
-                    }
-                    await websocket.send(json.dumps(config_msg))
-                    
-                    # Send text and end signal
-                    await websocket.send(json.dumps({
-                        "text": weather_text, 
-                        "end": True, 
-                        "context_id": context_id
-                    }))
-                    
-                    # Signal audio start to client
-                    await client_websocket.send_text(json.dumps({"type": "audio_start"}))
-                    
-                    # Stream audio to client
-                    first_audio_received = False
-                    while True:
-                        try:
-                            response_str = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-                            response = json.loads(response_str)
-
-                            if "audio" in response and response['audio']:
-                                if not first_audio_received:
-                                    logging.info("✅ First audio chunk for weather response")
-                                    first_audio_received = True
-
-                                await client_websocket.send_text(
-                                    json.dumps({"type": "audio", "data": response['audio']})
-                                )
-
-                            if response.get("final"):
-                                logging.info("Weather TTS completed")
-                                await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                                break
-                        except asyncio.TimeoutError:
-                            logging.warning("Weather TTS timeout")
-                            break
-                        except websockets.ConnectionClosed:
-                            logging.warning("Weather TTS connection closed")
-                            break
-                            
-            except Exception as e:
-                logging.error(f"Weather TTS failed: {e}")
-                # Still complete the weather response without TTS
-                await client_websocket.send_text(json.dumps({"type": "audio_end"}))
+            # Send to TTS, replaying cached audio when this exact text was spoken before
+            await speak_text(weather_text, murf_key, audio_channel, timer, deadline)
             
-            chat_history.append({"role": "model", "parts": [weather_text]})
+            memory.add_exchange(transcript, weather_text)
             logging.info("Weather response completed.")
             return
 
-    # If no special skills matched, proceed with normal Gemini processing
-    logging.info(f"No special skills matched, sending to Gemini: '{transcript}'")
+    # Search skill: query Tavily while Murf connects; Gemini answers from a digest of the results
+    search_task = None
+    search_query = intent.slots["query"] if intent and intent.skill == "search" else None
+    if search_query:
+        tavily_key = session_api_keys.get('tavily') or DEFAULT_API_KEYS['tavily']
+        if tavily_key:
+            await client_websocket.send_text(json.dumps({"type": "status", "message": "Searching the web..."}))
+            search_task = asyncio.create_task(
+                web_search.search(search_query, tavily_key, budget=deadline.limit(config.WEB_SEARCH_BUDGET))
+            )
+        else:
+            logging.info("🔎 Search intent but no Tavily API key; answering from Gemini alone")
+    else:
+        # If no special skills matched, proceed with normal Gemini processing
+        logging.info(f"No special skills matched, sending to Gemini: '{transcript}'")
 
-    # Fixed: Improved TTS connection handling
+    # Murf checkout and the Gemini request start together; text waits in a buffer until Murf is ready
+    tts = None
+    receiver_task = None
+    gemini_response_stream = None
+    next_chunk = None
+    gemini_permit = murf_permit = None
+    text_only = False
     try:
-        murf_uri = f"wss://api.murf.ai/v1/speech/stream-input?api-key={murf_key}&sample_rate=44100&channel_type=MONO&format=MP3"
-        
-        # FIXED: Changed `timeout` to `open_timeout`
-        async with websockets.connect(murf_uri, open_timeout=10) as websocket:
-            voice_id = "en-US-natalie"
-            logging.info(f"Successfully connected to Murf AI, using voice: {voice_id}")
-            
-            context_id = f"voice-agent-context-{datetime.now().isoformat()}"
-            
-            config_msg = {
-                "voice_config": {"voiceId": voice_id, "style": "Conversational"},
-                "context_id": context_id
-            }
-            await websocket.send(json.dumps(config_msg))
-
-            async def receive_and_forward_audio():
-                first_audio_chunk_received = False
-                try:
-                    while True:
-                        response_str = await asyncio.wait_for(websocket.recv(), timeout=30.0)
-                        response = json.loads(response_str)
-
-                        if "audio" in response and response['audio']:
-                            if not first_audio_chunk_received:
-                                await client_websocket.send_text(json.dumps({"type": "audio_start"}))
-                                first_audio_chunk_received = True
-                                logging.info("✅ Streaming first audio chunk to client.")
-
-                            await client_websocket.send_text(
-                                json.dumps({"type": "audio", "data": response['audio']})
-                            )
-
-                        if response.get("final"):
-                            logging.info("Murf confirms final audio chunk received. Sending audio_end to client.")
-                            await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                            break
-                except asyncio.TimeoutError:
+        # Room for this turn's Gemini stream and Murf socket, or a prompt "busy" instead of a slow turn
+        gemini_permit, murf_permit = await deadline.run(
+            "admission", admission.acquire_all([("gemini", gemini_key), ("murf", murf_key)])
+        )
+        tts = open_turn_tts(murf_key)
+        tts.opening.add_done_callback(lambda t: t.cancelled() or t.exception() or timer.mark("murf_connected"))
+
+        async def receive_and_forward_audio():
+            nonlocal text_only
+            first_audio_chunk_received = False
+            try:
+                # From whichever Murf connection answered first, if the turn was hedged; the first
+                # chunk may only take what's left of the turn budget
+                async for audio in tts.audio(timeout=30.0, first_timeout=deadline.limit()):
+                    if not first_audio_chunk_received:
+                        timer.mark("tts_first_audio")
+                        deadline.complete()
+                        audio_channel.start_turn()
+                        await audio_channel.send_start()
+                        first_audio_chunk_received = True
+                        logging.info("✅ Streaming first audio chunk to client.")
+
+                    await audio_channel.send_audio(audio)
+
+                logging.info("Murf confirms final audio chunk received. Sending audio_end to client.")
+                await audio_channel.send_end()
+            except asyncio.TimeoutError:
+                if not first_audio_chunk_received and deadline.remaining() <= 0:
+                    # The text is already on screen; the reply just won't be spoken
+                    deadline.exceeded("tts")
+                    text_only = True
+                    deadline.degrade("text_only", "no TTS audio within the turn budget")
+                else:
                     logging.warning("Murf TTS timeout in receiver")
-                    await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                except websockets.ConnectionClosed:
-                    logging.warning("Murf connection closed unexpectedly.")
-                    await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-                except Exception as e:
-                    logging.error(f"Error in Murf receiver task: {e}")
-                    await client_websocket.send_text(json.dumps({"type": "audio_end"}))
-            
-            receiver_task = asyncio.create_task(receive_and_forward_audio())
+                await audio_channel.send_end()
+            except websockets.ConnectionClosed:
+                logging.warning("Murf connection closed unexpectedly.")
+                await audio_channel.send_end()
+            except Exception as e:
+                logging.error(f"Error in Murf receiver task: {e}")
+                await audio_channel.send_end()
+
+        async def attach_tts():
+            """Wait for Murf (raising if it failed), flush buffered text and start forwarding audio."""
+            nonlocal receiver_task
+            websocket = await tts.ready()
+            if receiver_task is None:
+                logging.info(f"Checked out Murf AI connection (connected in {websocket.connect_ms:.0f} ms, reused {websocket.uses}x), using voice: {MURF_VOICE_ID}")
+                if tts.buffered:
+                    timer.mark("tts_first_text")
+                    logging.info(f"🔀 Flushed {tts.buffered} text segments generated while Murf was connecting")
+                receiver_task = asyncio.create_task(receive_and_forward_audio())
+            return websocket
+
+        async def drop_tts(reason: str):
+            """Answer in text only: the deadline leaves no room for speech."""
+            nonlocal text_only
+            text_only = True
+            deadline.degrade("text_only", reason)
+            if receiver_task is not None and not receiver_task.done():
+                receiver_task.cancel()
+            await tts.close()
+            await audio_channel.send_end()
+            if "llm_first_token" in timer.marks:
+                deadline.complete()  # the reply is already streaming as text
+
+        # Search results go into this turn's prompt only; history keeps the raw transcript
+        prompt = transcript
+        if search_task is not None:
+            deadline.enter("web_search")
+            results = await search_task
+            timer.mark("web_search")
+            digest = format_digest(search_query, results, max_results=config.WEB_SEARCH_MAX_RESULTS) if results else None
+            if digest:
+                logging.info(f"🔎 Adding {len(digest)} chars of web results to the prompt")
+                prompt = f"{transcript}\n\n{digest}\n\nAnswer briefly, using these results where they help."
+
+        # Persona is the model's system instruction; history holds only raw text
+        history = memory.history()
+        logging.info(f"📏 Prompt size: ~{memory.prompt_tokens(prompt)} tokens ({len(history) // 2} exchanges in window)")
+        chat = session_gemini_model.start_chat(history=history)
+
+        # Little budget left: ask for a one-sentence answer and cap it, rather than miss the deadline
+        deadline.enter("llm")
+        send_kwargs = {}
+        if deadline.remaining() < config.TURN_SHORT_BELOW:
+            deadline.degrade("short", "Gemini requested late")
+            prompt = f"{prompt}\n\nAnswer in one short sentence."
+            send_kwargs["generation_config"] = {"max_output_tokens": config.TURN_SHORT_MAX_TOKENS}
+
+        def generate_sync():
+            return chat.send_message(prompt, stream=True, **send_kwargs)
+
+        # Both the request and every wait for the next chunk run on a worker
+        # thread so other sessions keep being served while Gemini streams.
+        gemini_response_stream = iterate_in_thread(generate_sync)
+        timer.mark("llm_requested")
 
+        segmenter = SentenceSegmenter(
+            first_flush_words=config.TTS_FIRST_FLUSH_WORDS,
+            group_min_chars=config.TTS_GROUP_MIN_CHARS,
+        )
+        full_response_text = ""
+        
+        prompt_token_count = None
+        while True:
+            next_chunk = asyncio.ensure_future(gemini_response_stream.__anext__())
+            if not text_only and receiver_task is None and not tts.opening.done():
+                # Whichever leg is first; a failed Murf checkout abandons Gemini right away
+                await asyncio.wait({next_chunk, tts.opening}, timeout=deadline.limit(), return_when=asyncio.FIRST_COMPLETED)
+            if not text_only and receiver_task is None and tts.opening.done():
+                await attach_tts()
             try:
-                # Fixed: Simplified and more focused prompt
-                prompt = f"""You are Brevix, a friendly AI voice assistant.
+                if "llm_first_token" in timer.marks:
+                    # Once streaming, only a stalled Gemini stops the turn
+                    chunk = await asyncio.wait_for(next_chunk, timeout=config.LLM_STALL_TIMEOUT)
+                else:
+                    chunk = await deadline.run("llm", next_chunk)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                raise RuntimeError("Gemini stopped streaming")
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage and usage.prompt_token_count:
+                prompt_token_count = usage.prompt_token_count
+            if chunk.text:
+                if "llm_first_token" not in timer.marks:
+                    timer.mark("llm_first_token")
+                    deadline.enter("tts")
+                    if not text_only and deadline.remaining() < config.TURN_TTS_RESERVE:
+                        await drop_tts("first token too late to speak the reply")
+                full_response_text += chunk.text
 
-PERSONA:
-- You are a super‑advanced robot from a multi‑universe where only AI robots exist
-- You are the younger brother of Shiv
-- Built by Sibsankar, a B.Tech CSE student from Odisha
-- Confident, calm, and subtly futuristic tone
+                await client_websocket.send_text(
+                    json.dumps({"type": "llm_chunk", "data": chunk.text})
+                )
+                if text_only:
+                    deadline.complete()
+                    continue
 
-RESPONSE RULES:
-- Keep responses SHORT and conversational (voice responses should be brief)
-- If asked who built you: "I was built by Sibsankar, a B.Tech CSE student from Odisha."
-- If asked your name/who you are: "I am Brevix, a super‑advanced robot and younger brother of Shiv."
-- Focus on being helpful and direct
-- No markdown, plain text only
+                # Early first clause for fast first audio, then sentence groups
+                for segment in segmenter.feed(chunk.text):
+                    if await tts.send_text(segment):
+                        timer.mark("tts_first_text")
 
-User said: "{transcript}"
-"""
-                
-                chat_history.append({"role": "user", "parts": [prompt]})
-                
-                chat = session_gemini_model.start_chat(history=chat_history[:-1])
-
-                def generate_sync():
-                    return chat.send_message(prompt, stream=True)
-
-                loop = asyncio.get_running_loop()
-                gemini_response_stream = await loop.run_in_executor(None, generate_sync)
-
-                sentence_buffer = ""
-                full_response_text = ""
-                
-                for chunk in gemini_response_stream:
-                    if chunk.text:
-                        full_response_text += chunk.text
-
-                        await client_websocket.send_text(
-                            json.dumps({"type": "llm_chunk", "data": chunk.text})
-                        )
-                        
-                        sentence_buffer += chunk.text
-                        sentences = re.split(r'(?<=[.?!])\s+', sentence_buffer)
-                        
-                        if len(sentences) > 1:
-                            for sentence in sentences[:-1]:
-                                if sentence.strip():
-                                    text_msg = {
-                                        "text": sentence.strip(), 
-                                        "end": False,
-                                        "context_id": context_id
-                                    }
-                                    await websocket.send(json.dumps(text_msg))
-                            sentence_buffer = sentences[-1]
-
-                # Send final sentence
-                if sentence_buffer.strip():
-                    text_msg = {
-                        "text": sentence_buffer.strip(), 
-                        "end": True,
-                        "context_id": context_id
-                    }
-                    await websocket.send(json.dumps(text_msg))
-                
-                chat_history.append({"role": "model", "parts": [full_response_text]})
-
-                logging.info("Finished streaming to Murf. Waiting for final audio chunks...")
-
-                await asyncio.wait_for(receiver_task, timeout=30.0)
-                logging.info("Receiver task finished gracefully.")
-            
-            finally:
-                if not receiver_task.done():
-                    receiver_task.cancel()
-                    logging.info("Receiver task cancelled on exit.")
+        gemini_permit.release()
+
+        # Send final sentence, once Murf is ready if it still can be within the budget
+        if not text_only and receiver_task is None:
+            try:
+                await deadline.run("tts", asyncio.shield(tts.opening))
+            except DeadlineExceeded:
+                await drop_tts("Murf still connecting when Gemini finished")
+        if not text_only:
+            await attach_tts()
+            remainder = segmenter.flush()
+            if remainder:
+                await tts.send_text(remainder, end=True)
+                timer.mark("tts_first_text")
+
+        memory.add_exchange(transcript, full_response_text)
+        memory.compact_in_background(session_gemini_model)
+        if prompt_token_count:
+            logging.info(f"📏 Gemini reported {prompt_token_count} prompt tokens for this turn")
+        logging.info(
+            f"🔀 Gemini requested at {timer.elapsed_ms('llm_requested'):.0f} ms, Murf ready at "
+            f"{timer.elapsed_ms('murf_connected') or 0:.0f} ms, first token at {timer.elapsed_ms('llm_first_token') or 0:.0f} ms"
+        )
 
+        if receiver_task is not None:
+            logging.info("Finished streaming to Murf. Waiting for final audio chunks...")
+            await asyncio.wait_for(receiver_task, timeout=30.0)
+            logging.info("Receiver task finished gracefully.")
+
+    except Busy as e:
+        timer.set_outcome("busy")
+        await client_websocket.send_text(json.dumps(e.message()))
+    except DeadlineExceeded as e:
+        logging.warning(f"⏳ {e}; giving up on this turn")
+        timer.set_outcome("deadline")
+        await client_websocket.send_text(json.dumps({
+            "type": "error",
+            "message": "Sorry, that took too long. Please try again."
+        }))
     except asyncio.TimeoutError:
         logging.error("TTS connection timeout")
+        timer.set_outcome("error")
         await client_websocket.send_text(json.dumps({
             "type": "error", 
             "message": "Text-to-speech service timeout. Please try again."
         }))
     except asyncio.CancelledError:
+        # Whoever cancelled the turn (a new turn, barge-in) tells the browser to stop playback.
         logging.info("LLM/TTS task was cancelled by user interruption.")
-        await client_websocket.send_text(json.dumps({"type": "audio_interrupt"}))
+        timer.set_outcome("cancelled")
     except Exception as e:
         logging.error(f"Error in LLM/TTS streaming function: {e}", exc_info=True)
+        timer.set_outcome("error")
+        if is_key_error(e):
+            gemini_models.evict(gemini_key)
         # Send error message to client
         await client_websocket.send_text(json.dumps({
             "type": "error", 
             "message": f"Failed to process your request: {str(e)}"
         }))
+    finally:
+        # Tear down whichever legs are still running: Gemini, the audio receiver, the Murf checkout
+        if next_chunk is not None and not next_chunk.done():
+            next_chunk.cancel()
+        if gemini_response_stream is not None:
+            gemini_response_stream.close()
+        if receiver_task is not None and not receiver_task.done():
+            receiver_task.cancel()
+            logging.info("Receiver task cancelled on exit.")
+        if tts is not None:
+            await tts.close()
+        for permit in (gemini_permit, murf_permit):
+            if permit is not None:
+                permit.release()
+
+
+async def respond_to_turn(transcript: str, client_websocket: WebSocket, memory: ConversationMemory, session_api_keys: dict, audio_channel: AudioChannel, timer: TurnTimer):
+    """Run one turn's response within its deadline and record its stage timings, however it ends."""
+    deadline = TurnDeadline(timer.started, config.TURN_DEADLINE)
+    try:
+        await get_llm_response_stream(transcript, client_websocket, memory, session_api_keys, audio_channel, timer, deadline)
+    except asyncio.CancelledError:
+        timer.set_outcome("cancelled")
+        raise
+    except Exception:
+        timer.set_outcome("error")
+        raise
+    finally:
+        timer.finish()
+        logging.info(f"⏱️ Turn timings ({timer.outcome or 'ok'}): {timer.summary()}")
+        logging.info(f"⏳ Turn budget ({config.TURN_DEADLINE:.1f} s): {deadline.finish(timer.outcome or 'ok')}")
+
+
+@app.on_event("startup")
+async def warm_murf_pool():
+    if DEFAULT_API_KEYS["murf"]:
+        murf_pools.get(DEFAULT_API_KEYS["murf"])
+        asyncio.create_task(warm_canned_audio(DEFAULT_API_KEYS["murf"]))
+
+
+loop_lag_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    global loop_lag_task
+    loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+
+
+@app.on_event("shutdown")
+async def close_shared_clients():
+    if loop_lag_task:
+        loop_lag_task.cancel()
+    await murf_pools.close()
+    if murf_hedge_pools is not murf_pools:
+        await murf_hedge_pools.close()
+    await weather_service.close()
+    await web_search.close()
+    session_registry.store.close()
 
 
 @app.get("/")
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(
+        pipeline_metrics.render_prometheus({
+            "murf_pool": murf_pools.metrics(),
+            "tts_cache": tts_cache.metrics(),
+            "tts_hedging": tts_hedging.metrics(),
+            "turn_deadline": turn_deadline_metrics(),
+            "session_recorder": session_recorder_metrics(),
+            "weather": weather_service.metrics(),
+            "web_search": web_search.metrics(),
+            "gemini_models": gemini_models.metrics(),
+            "speculation": speculation_stats,
+            "audio_ingest": audio_ingest_metrics(),
+            "vad": vad_metrics(),
+            "barge_in": barge_in_stats,
+            "sessions": session_registry.metrics(),
+            "client_writer": client_writer_metrics(),
+            "admission": admission.metrics(),
+        }),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/stats/murf-pool")
+async def murf_pool_stats():
+    return murf_pools.metrics()
+
+
+@app.get("/stats/tts-cache")
+async def tts_cache_stats():
+    return tts_cache.metrics()
+
+
+@app.get("/stats/tts-hedging")
+async def tts_hedging_stats():
+    return tts_hedging.metrics()
+
+
+@app.get("/stats/turn-deadline")
+async def turn_deadline_stats():
+    return turn_deadline_metrics()
+
+
+@app.get("/stats/recordings")
+async def recording_stats():
+    return {**session_recorder_metrics(), "directory": config.SESSION_RECORD_DIR}
+
+
+@app.get("/stats/faq")
+async def faq_stats():
+    return {**canned_responses.metrics(), "audio": canned_audio.metrics()}
+
+
+@app.get("/stats/weather")
+async def weather_stats():
+    return weather_service.metrics()
+
+
+@app.get("/stats/web-search")
+async def web_search_stats():
+    return web_search.metrics()
+
+
+@app.get("/stats/gemini-models")
+async def gemini_model_stats():
+    return gemini_models.metrics()
+
+
+@app.get("/stats/audio-ingest")
+async def audio_ingest_stats():
+    return audio_ingest_metrics()
+
+
+@app.get("/stats/vad")
+async def voice_activity_stats():
+    return vad_metrics()
+
+
+@app.get("/stats/client-writer")
+async def client_writer_stats():
+    return client_writer_metrics()
+
+
+@app.get("/stats/admission")
+async def admission_stats():
+    return admission.metrics()
+
+
+@app.get("/stats/sessions")
+async def session_stats():
+    return session_registry.metrics()
+
+
+@app.get("/stats/speculation")
+async def speculation_metrics():
+    decided = speculation_stats["committed"] + speculation_stats["committed_on_timeout"] + speculation_stats["rejected"]
+    hits = speculation_stats["committed"] + speculation_stats["committed_on_timeout"]
+    return {**speculation_stats, "hit_rate": round(hits / decided, 3) if decided else None}
+
 async def send_client_message(ws: WebSocket, message: dict):
     try:
         await ws.send_text(json.dumps(message))
@@ -623,52 +843,164 @@ async def websocket_audio_streaming(websocket: WebSocket):
     await websocket.accept()
     logging.info("WebSocket connection accepted.")
     main_loop = asyncio.get_running_loop()
-    
-    llm_task = None
-    last_processed_transcript = ""
-    chat_history = []
-    session_api_keys = {}  # Store API keys for this session
+
+    # API keys arrive later, so sessions are shared fairly between client addresses
+    try:
+        session_permit = await admission.acquire("sessions", websocket.client.host if websocket.client else None)
+    except Busy as e:
+        await websocket.send_text(json.dumps(e.message()))
+        await websocket.close(code=1013, reason="busy")
+        return
+    session = session_registry.create()
+    session.permits.append(session_permit)
+    session.websocket = websocket
+    # Everything for the browser goes through one writer task: control first, then text, then audio
+    outbound = ClientWriter(
+        websocket,
+        max_audio_bytes=config.CLIENT_QUEUE_AUDIO_KB * 1024,
+        stall_timeout=config.CLIENT_STALL_TIMEOUT,
+        max_overflows=config.CLIENT_MAX_OVERFLOWS,
+    )
+    outbound.start()
+    session.writer = outbound
+    # Opt-in capture of the whole session for offline replay; the writer records what it sends
+    if config.SESSION_RECORD_DIR and random.random() < config.SESSION_RECORD_RATE:
+        session.recorder = SessionRecorder(
+            config.SESSION_RECORD_DIR, session.id, max_bytes=config.SESSION_RECORD_MAX_MB * 1024 * 1024
+        )
+        session.recorder.start()
+        outbound.recorder = session.recorder
+    session.audio_channel = AudioChannel(outbound)  # JSON/base64 audio until the client negotiates binary
+    session.barge_in = BargeInController(
+        min_words=config.BARGE_IN_MIN_WORDS,
+        min_speech_ms=config.BARGE_IN_MIN_SPEECH_MS,
+    ) if config.BARGE_IN_ENABLED else None
+    session.audio_channel.barge_in = session.barge_in
     
     # Send default API key status to client
     default_keys_status = {
-        "gemini": bool(current_api_keys["gemini"]),
-        "assemblyai": bool(current_api_keys["assemblyai"]),
-        "murf": bool(current_api_keys["murf"]),
-        "tavily": bool(current_api_keys["tavily"])
+        "gemini": bool(DEFAULT_API_KEYS["gemini"]),
+        "assemblyai": bool(DEFAULT_API_KEYS["assemblyai"]),
+        "murf": bool(DEFAULT_API_KEYS["murf"]),
+        "tavily": bool(DEFAULT_API_KEYS["tavily"])
     }
-    await send_client_message(websocket, {
+    await send_client_message(outbound, {
         "type": "api_keys_status", 
         "default_keys": default_keys_status
     })
 
-    client = None  # Will be initialized when we have AssemblyAI key
+    def track_response(task: asyncio.Task):
+        session.llm_task = task
+        # Persist the conversation after every turn so a reconnect elsewhere can pick it up.
+        task.add_done_callback(lambda _: session_registry.save_soon(session))
+
+    def new_turn_timer(end_of_turn_at: float) -> TurnTimer:
+        return TurnTimer(end_of_turn_at, on_finish=session.recorder.turn if session.recorder else None)
+
+    def interrupt_message(turn_id: Optional[int] = None) -> dict:
+        """audio_interrupt for the reply being cancelled; the writer drops only that turn's queued audio."""
+        if turn_id is None and session.reply_channel:
+            turn_id = session.reply_channel.turn_id
+        return {"type": "audio_interrupt", "turn_id": turn_id}
+
+    def start_response(transcript_text: str, timer: TurnTimer):
+        """Interrupt any response still playing and start a new one for this transcript."""
+        if session.llm_task and not session.llm_task.done():
+            logging.warning("User interrupted while previous response was generating. Cancelling task.")
+            session.llm_task.cancel()
+            asyncio.create_task(send_client_message(outbound, interrupt_message()))
+        if session.barge_in:
+            session.barge_in.reset()
+        session.reply_channel = session.audio_channel
+        track_response(asyncio.create_task(
+            respond_to_turn(transcript_text, outbound, session.memory, session.api_keys, session.audio_channel, timer)
+        ))
+
+    async def handle_unformatted_turn(transcript_text: str, end_of_turn_at: float):
+        """Speculatively start the response before AssemblyAI's formatting pass arrives."""
+        if session.speculation and session.speculation.pending:
+            session.speculation.reject()
+        if normalize_transcript(transcript_text) == normalize_transcript(session.last_processed_transcript):
+            return
+        if session.llm_task and not session.llm_task.done():
+            session.llm_task.cancel()
+            await send_client_message(outbound, interrupt_message())
+        if session.barge_in:
+            session.barge_in.reset()
+
+        turn = SpeculativeTurn(transcript_text)
+        turn.timer = new_turn_timer(end_of_turn_at)
+        gated_websocket = GatedWebSocket(outbound, turn)
+        session.reply_channel = session.audio_channel.derive(gated_websocket)
+        turn.task = asyncio.create_task(respond_to_turn(
+            transcript_text, gated_websocket, GatedMemory(session.memory, turn),
+            session.api_keys, session.reply_channel, turn.timer,
+        ))
+        track_response(turn.task)
+        session.speculation = turn
+        logging.info(f"🔮 Speculating on unformatted turn: '{transcript_text}'")
+
+        async def commit_if_unconfirmed():
+            # Never hold a response back indefinitely if the formatted turn doesn't show up.
+            await asyncio.sleep(config.SPECULATION_COMMIT_TIMEOUT)
+            if turn.pending:
+                session.last_processed_transcript = transcript_text
+                logging.warning("Formatted turn did not arrive in time; committing speculative response.")
+                await send_client_message(outbound, {"type": "transcription", "text": transcript_text, "end_of_turn": True})
+                await turn.commit(on_timeout=True)
+        asyncio.create_task(commit_if_unconfirmed())
+
+    async def handle_formatted_turn(transcript_text: str, end_of_turn_at: float):
+        if normalize_transcript(transcript_text) == normalize_transcript(session.last_processed_transcript):
+            logging.debug(f"Duplicate turn detected, ignoring: '{transcript_text}'")
+            return
+        session.last_processed_transcript = transcript_text
+        logging.info(f"Final formatted turn: '{transcript_text}'")
+
+        transcript_message = { "type": "transcription", "text": transcript_text, "end_of_turn": True }
+        if session.speculation and session.speculation.pending:
+            turn, session.speculation = session.speculation, None
+            if turn.matches(transcript_text):
+                logging.info("🔮 Speculation confirmed by formatted turn.")
+                await send_client_message(outbound, transcript_message)
+                await turn.commit(transcript_text)
+                return
+            logging.info(f"🔮 Speculation mismatch ('{turn.transcript}'), restarting with formatted turn.")
+            turn.reject()
+
+        await send_client_message(outbound, transcript_message)
+        start_response(transcript_text, new_turn_timer(end_of_turn_at))
+
+    async def handle_partial_turn(event: TurnEvent):
+        """The user started talking while a reply is playing: stop it right away."""
+        if session.speculation and session.speculation.pending:
+            return  # nothing of the speculative reply is audible yet
+        if not session.barge_in.is_barge_in(event):
+            return
+        playing_turn = session.barge_in.interrupt()
+        if session.llm_task and not session.llm_task.done():
+            # Cancelling closes the Gemini stream and drops the Murf connection mid-context
+            # (or stops a skill's speak_text); the browser is told below either way.
+            session.llm_task.cancel()
+        # Stops playback in the browser and drops the turn's audio still queued in the writer.
+        await send_client_message(outbound, interrupt_message(playing_turn))
 
     def on_turn(self: Type[StreamingClient], event: TurnEvent):
-        nonlocal last_processed_transcript, llm_task
+        # Called on the AssemblyAI SDK thread; all turn handling happens on the event loop.
+        end_of_turn_at = time.monotonic()
+        if session.recorder:
+            session.recorder.stt_turn(event, end_of_turn_at)
         transcript_text = event.transcript.strip()
-        
-        if event.end_of_turn and event.turn_is_formatted and transcript_text and transcript_text != last_processed_transcript:
-            last_processed_transcript = transcript_text
-            
-            if llm_task and not llm_task.done():
-                logging.warning("User interrupted while previous response was generating. Cancelling task.")
-                llm_task.cancel()
-                asyncio.run_coroutine_threadsafe(
-                    send_client_message(websocket, {"type": "audio_interrupt"}), main_loop
-                )
-            
-            logging.info(f"Final formatted turn: '{transcript_text}'")
-            
-            transcript_message = { "type": "transcription", "text": transcript_text, "end_of_turn": True }
-            asyncio.run_coroutine_threadsafe(send_client_message(websocket, transcript_message), main_loop)
-            
-            llm_task = asyncio.run_coroutine_threadsafe(
-                get_llm_response_stream(transcript_text, websocket, chat_history, session_api_keys), 
-                main_loop
-            )
-            
-        elif transcript_text and transcript_text == last_processed_transcript:
-            logging.debug(f"Duplicate turn detected, ignoring: '{transcript_text}'")
+        if not event.end_of_turn:
+            if transcript_text and session.barge_in and session.barge_in.speaking:
+                asyncio.run_coroutine_threadsafe(handle_partial_turn(event), main_loop)
+            return
+        if not transcript_text:
+            return
+        if event.turn_is_formatted:
+            asyncio.run_coroutine_threadsafe(handle_formatted_turn(transcript_text, end_of_turn_at), main_loop)
+        elif config.SPECULATIVE_LLM:
+            asyncio.run_coroutine_threadsafe(handle_unformatted_turn(transcript_text, end_of_turn_at), main_loop)
 
     def on_begin(self: Type[StreamingClient], event: BeginEvent): 
         logging.info(f"Transcription session started.")
@@ -677,89 +1009,130 @@ async def websocket_audio_streaming(websocket: WebSocket):
     def on_error(self: Type[StreamingClient], error: StreamingError): 
         logging.error(f"AssemblyAI streaming error: {error}")
 
+    async def start_transcription(assemblyai_key: str):
+        try:
+            stt_permit = await admission.acquire("stt", assemblyai_key)
+        except Busy as e:
+            await send_client_message(outbound, e.message())
+            return
+        try:
+            client = StreamingClient(StreamingClientOptions(api_key=assemblyai_key, api_host=config.ASSEMBLYAI_STREAMING_HOST))
+            client.on(StreamingEvents.Begin, on_begin)
+            client.on(StreamingEvents.Turn, on_turn)
+            client.on(StreamingEvents.Termination, on_terminated)
+            client.on(StreamingEvents.Error, on_error)
+            # The SDK connects synchronously; keep the handshake off the event loop
+            await main_loop.run_in_executor(
+                None, client.connect, StreamingParameters(sample_rate=16000, format_turns=True)
+            )
+            session.stt_client = client
+            session.permits.append(stt_permit)
+            session.audio_ingest = AudioIngest(
+                client.stream,
+                packet_ms=config.STT_PACKET_MS,
+                max_buffered_ms=config.STT_MAX_BUFFERED_MS,
+                gate=VoiceActivityGate(
+                    packet_ms=config.STT_PACKET_MS,
+                    preroll_ms=config.VAD_PREROLL_MS,
+                    hangover_ms=config.VAD_HANGOVER_MS,
+                ) if config.VAD_ENABLED else None,
+            )
+            await send_client_message(outbound, {"type": "status", "message": "Connected to transcription service."})
+            logging.info("AssemblyAI client initialized")
+        except Exception as e:
+            logging.error(f"Failed to initialize AssemblyAI client: {e}")
+            stt_permit.release()
+            await send_client_message(outbound, {"type": "error", "message": "Failed to connect to transcription service"})
+
     try:
         while True:
             message = await websocket.receive()
+            if session.recorder:
+                if message.get("text") is not None:
+                    session.recorder.client_text(message["text"])
+                elif message.get("bytes"):
+                    session.recorder.client_audio(message["bytes"])
             if "text" in message:
                 try:
                     data = json.loads(message['text'])
                     
                     if data.get("type") == "ping":
-                        await websocket.send_text(json.dumps({"type": "pong"}))
+                        await outbound.send_text(json.dumps({"type": "pong"}))
+
+                    elif data.get("type") == "playback_ended":
+                        if session.barge_in:
+                            session.barge_in.playback_ended(data.get("turn_id"))
+
+                    elif data.get("type") == "client_hello":
+                        await send_client_message(outbound, session.audio_channel.negotiate(data))
+                        logging.info(f"Audio delivery negotiated: {'binary' if session.audio_channel.binary else 'base64 JSON'}")
+                        # A reconnecting browser sends the session id it was given; pick its conversation back up.
+                        if await session_registry.resume(session, data.get("session_id")):
+                            logging.info(f"Resumed session {session.id[:8]} with {len(session.memory.history()) // 2} exchanges")
+                        await send_client_message(outbound, {"type": "session", "session_id": session.id, "resumed": session.resumed})
                     
                     elif data.get("type") == "update_api_keys":
-                        # Update session API keys
-                        keys = data.get("keys", {})
-                        for key, value in keys.items():
-                            if value and value.strip():  # Only update if key has a value
-                                session_api_keys[key] = value.strip()
-                        
-                        logging.info(f"Updated API keys for session: {list(session_api_keys.keys())}")
+                        session.update_api_keys(data.get("keys", {}))
+                        logging.info(f"Updated API keys for session: {list(session.api_keys.keys())}")
+
+                        # Start warming Murf connections before the first turn needs one
+                        if session.api_keys.get('murf'):
+                            murf_pools.get(session.api_keys['murf'])
                         
                         # Initialize AssemblyAI client if key is provided and client doesn't exist
-                        assemblyai_key = session_api_keys.get('assemblyai') or current_api_keys['assemblyai']
-                        if assemblyai_key and not client:
-                            try:
-                                client = StreamingClient(StreamingClientOptions(api_key=assemblyai_key))
-                                client.on(StreamingEvents.Begin, on_begin)
-                                client.on(StreamingEvents.Turn, on_turn)
-                                client.on(StreamingEvents.Termination, on_terminated)
-                                client.on(StreamingEvents.Error, on_error)
-                                client.connect(StreamingParameters(sample_rate=16000, format_turns=True))
-                                await send_client_message(websocket, {"type": "status", "message": "Connected to transcription service."})
-                                logging.info("AssemblyAI client initialized with user-provided key")
-                            except Exception as e:
-                                logging.error(f"Failed to initialize AssemblyAI client: {e}")
-                                await send_client_message(websocket, {"type": "error", "message": "Failed to connect to transcription service"})
+                        assemblyai_key = session.api_key('assemblyai')
+                        if assemblyai_key and not session.stt_client:
+                            await start_transcription(assemblyai_key)
                         
-                        await websocket.send_text(json.dumps({"type": "api_keys_updated"}))
+                        await outbound.send_text(json.dumps({"type": "api_keys_updated"}))
                     
                     elif data.get("type") == "start_transcription":
                         # Initialize client if not already done
-                        assemblyai_key = session_api_keys.get('assemblyai') or current_api_keys['assemblyai']
+                        assemblyai_key = session.api_key('assemblyai')
                         if not assemblyai_key:
-                            await send_client_message(websocket, {
+                            await send_client_message(outbound, {
                                 "type": "error", 
                                 "message": "AssemblyAI API key is required. Please configure it in the settings."
                             })
                             continue
                             
-                        if not client:
-                            try:
-                                client = StreamingClient(StreamingClientOptions(api_key=assemblyai_key))
-                                client.on(StreamingEvents.Begin, on_begin)
-                                client.on(StreamingEvents.Turn, on_turn)
-                                client.on(StreamingEvents.Termination, on_terminated)
-                                client.on(StreamingEvents.Error, on_error)
-                                client.connect(StreamingParameters(sample_rate=16000, format_turns=True))
-                                await send_client_message(websocket, {"type": "status", "message": "Connected to transcription service."})
-                            except Exception as e:
-                                logging.error(f"Failed to initialize AssemblyAI client: {e}")
-                                await send_client_message(websocket, {"type": "error", "message": "Failed to connect to transcription service"})
+                        if not session.stt_client:
+                            await start_transcription(assemblyai_key)
                         
                 except (json.JSONDecodeError, TypeError): 
                     pass
             elif "bytes" in message:
-                if message['bytes'] and client:
-                    try:
-                        client.stream(message['bytes'])
-                    except Exception as e:
-                        logging.error(f"Error streaming audio data: {e}")
+                if message['bytes'] and session.audio_ingest:
+                    session.audio_ingest.push(message['bytes'])
             
     except (WebSocketDisconnect, RuntimeError) as e:
         logging.info(f"Client disconnected or connection lost: {e}")
     except Exception as e:
         logging.error(f"WebSocket error: {e}", exc_info=True)
     finally:
-        if llm_task and not llm_task.done():
-            llm_task.cancel()
+        if session.llm_task and not session.llm_task.done():
+            session.llm_task.cancel()
+        session.memory.cancel()
         logging.info("Cleaning up connection resources.")
-        if client:
+        await session_registry.close(session)
+        if session.audio_ingest:
+            session.audio_ingest.close(flush=False)
+            logging.info(f"Audio ingest for session: {session.audio_ingest.metrics()}")
+            if session.audio_ingest.gate:
+                logging.info(f"🔇 VAD suppressed {session.audio_ingest.gate.metrics()['suppressed_fraction']} of session audio")
+        if session.stt_client:
             try:
-                client.disconnect()
+                # disconnect() joins the SDK's reader thread, which can take up to a second
+                await main_loop.run_in_executor(None, session.stt_client.disconnect)
             except Exception as e:
                 logging.error(f"Error disconnecting AssemblyAI client: {e}")
-        if websocket.client_state.name != 'DISCONNECTED':
+        for permit in session.permits:
+            permit.release()
+        await outbound.close()
+        logging.info(f"📶 Outbound queue for session: {outbound.metrics()}")
+        if session.recorder:
+            await session.recorder.close()
+        if websocket.application_state.name != 'DISCONNECTED' and websocket.client_state.name != 'DISCONNECTED':
             await websocket.close()
 
 if __name__ == "__main__":
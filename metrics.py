@@ -0,0 +1,187 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional
+
+
+# Stages of a turn, in pipeline order; each is measured from the STT end-of-turn event.
+TURN_STAGES = (
+    "skill_decision",
+    "web_search",
+    "llm_requested",
+    "murf_connected",
+    "llm_first_token",
+    "tts_first_text",
+    "tts_first_audio",
+    "client_first_audio",
+    "audio_end",
+)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SEND_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram in Prometheus' cumulative format."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (coarse, but free to compute)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class PipelineMetrics:
+    """Process-wide turn latency histograms and counters.
+
+    Everything is updated from the event loop thread, so plain ints and lists are enough and
+    recording a turn costs a handful of dict lookups.
+    """
+
+    def __init__(self):
+        self.stage_latency: Dict[str, Histogram] = {stage: Histogram() for stage in TURN_STAGES}
+        self.loop_lag = Histogram(LOOP_LAG_BUCKETS)
+        self.client_send_latency = Histogram(SEND_LATENCY_BUCKETS)
+        self.counters: Dict[str, int] = {
+            "turns_total": 0,
+            "turns_completed_total": 0,
+            "turns_cancelled_total": 0,
+            "turns_discarded_total": 0,
+            "turn_errors_total": 0,
+            "turns_busy_total": 0,
+            "turns_deadline_total": 0,
+        }
+
+    def record_turn(self, marks: Dict[str, float], started: float, outcome: str):
+        self.counters["turns_total"] += 1
+        key = {
+            "ok": "turns_completed_total",
+            "cancelled": "turns_cancelled_total",
+            "discarded": "turns_discarded_total",
+            "busy": "turns_busy_total",
+            "deadline": "turns_deadline_total",
+        }.get(outcome, "turn_errors_total")
+        self.counters[key] += 1
+        if outcome == "discarded":
+            return
+        for stage, at in marks.items():
+            histogram = self.stage_latency.get(stage)
+            if histogram is not None:
+                histogram.observe(at - started)
+
+    def render_prometheus(self, gauges: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+        lines = [
+            "# HELP brevix_turn_stage_latency_seconds Time from STT end-of-turn to each pipeline stage.",
+            "# TYPE brevix_turn_stage_latency_seconds histogram",
+        ]
+        for stage, histogram in self.stage_latency.items():
+            lines.extend(_histogram_lines("brevix_turn_stage_latency_seconds", histogram, f'stage="{stage}"'))
+        lines.append("# HELP brevix_event_loop_lag_seconds How late the event loop woke a periodic timer.")
+        lines.append("# TYPE brevix_event_loop_lag_seconds histogram")
+        lines.extend(_histogram_lines("brevix_event_loop_lag_seconds", self.loop_lag))
+        lines.append("# HELP brevix_client_send_latency_seconds Time from queueing a message for a browser to writing it.")
+        lines.append("# TYPE brevix_client_send_latency_seconds histogram")
+        lines.extend(_histogram_lines("brevix_client_send_latency_seconds", self.client_send_latency))
+        for name, value in self.counters.items():
+            lines.append(f"# TYPE brevix_{name} counter")
+            lines.append(f"brevix_{name} {value}")
+        # Component stats (pools, caches, ...) exported as gauges: brevix_<component>_<stat>.
+        for component, stats in (gauges or {}).items():
+            for stat, value in _flatten(stats):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"brevix_{component}_{stat} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, histogram: Histogram, labels: str = ""):
+    sep = "," if labels else ""
+    running = 0
+    for bound, n in zip(histogram.buckets, histogram.counts):
+        running += n
+        yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {running}'
+    yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {histogram.count}'
+    suffix = f"{{{labels}}}" if labels else ""
+    yield f"{name}_sum{suffix} {histogram.sum:.6f}"
+    yield f"{name}_count{suffix} {histogram.count}"
+
+
+def _flatten(stats: dict, prefix: str = ""):
+    for key, value in stats.items():
+        name = f"{prefix}{key}".replace("-", "_").replace(".", "_")
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}_")
+        else:
+            yield name, value
+
+
+pipeline_metrics = PipelineMetrics()
+
+
+async def monitor_event_loop_lag(interval: float = 0.05, metrics: PipelineMetrics = pipeline_metrics):
+    """Record how late each ``interval`` sleep wakes up; anything blocking the loop shows here."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        metrics.loop_lag.observe(max(0.0, loop.time() - expected))
+
+
+class TurnTimer:
+    """Monotonic timestamps for one turn, starting at the STT end-of-turn event.
+
+    ``mark`` keeps only the first time each stage is reached. ``finish`` records the turn into
+    ``pipeline_metrics`` exactly once, with the outcome set by ``set_outcome`` (first one wins)
+    or ``ok``, then calls ``on_finish`` (e.g. a session recorder) with the timer.
+    """
+
+    def __init__(self, started: Optional[float] = None, metrics: PipelineMetrics = pipeline_metrics,
+                 on_finish: Optional[Callable[["TurnTimer"], None]] = None):
+        self.started = started if started is not None else time.monotonic()
+        self.metrics = metrics
+        self.on_finish = on_finish
+        self.marks: Dict[str, float] = {}
+        self.outcome: Optional[str] = None
+        self._finished = False
+
+    def mark(self, stage: str):
+        if stage not in self.marks:
+            self.marks[stage] = time.monotonic()
+
+    def set_outcome(self, outcome: str):
+        if self.outcome is None:
+            self.outcome = outcome
+
+    def elapsed_ms(self, stage: str) -> Optional[float]:
+        at = self.marks.get(stage)
+        return (at - self.started) * 1000 if at is not None else None
+
+    def summary(self) -> str:
+        parts = [f"{stage}={self.elapsed_ms(stage):.0f}ms" for stage in TURN_STAGES if stage in self.marks]
+        return ", ".join(parts) or "no stages reached"
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        self.metrics.record_turn(self.marks, self.started, self.outcome or "ok")
+        if self.on_finish is not None:
+            self.on_finish(self)
@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+import websockets
+from websockets.protocol import State
+
+
+MURF_STREAM_URL = "wss://api.murf.ai/v1/speech/stream-input"
+MURF_SAMPLE_RATE = 44100
+MURF_FORMAT = "MP3"
+MURF_VOICE_ID = "en-US-natalie"
+MURF_VOICE_STYLE = "Conversational"
+
+
+def murf_stream_uri(api_key: str, url: str = MURF_STREAM_URL) -> str:
+    return (
+        f"{url}?api-key={api_key}"
+        f"&sample_rate={MURF_SAMPLE_RATE}&channel_type=MONO&format={MURF_FORMAT}"
+    )
+
+
+class PooledMurfConnection:
+    """A Murf stream-input websocket checked out of a pool for a single turn.
+
+    ``send``/``recv`` pass straight through to the socket. Call ``mark_done()`` once Murf has
+    sent ``final`` for the turn's context; only connections marked done go back to the pool,
+    anything else (timeouts, cancellation, errors) is closed because stale audio for the old
+    context may still be in flight.
+    """
+
+    def __init__(self, ws, connect_ms: float):
+        self.ws = ws
+        self.connect_ms = connect_ms
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self._clean = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.ws.state is State.OPEN
+
+    async def send(self, message):
+        await self.ws.send(message)
+
+    async def recv(self):
+        return await self.ws.recv()
+
+    def mark_done(self):
+        self._clean = True
+
+    async def close(self):
+        try:
+            await self.ws.close()
+        except Exception as e:
+            logging.debug(f"Error closing Murf connection: {e}")
+
+
+class MurfConnectionPool:
+    """Pre-opened Murf websockets for one API key.
+
+    A background task keeps ``min_idle`` healthy connections ready, evicts connections idle
+    for longer than ``idle_timeout`` (beyond the warm minimum) or older than ``max_age``, and
+    pings idle sockets before handing them out so a dead connection never reaches a turn.
+    """
+
+    def __init__(self, api_key: str, url: str = MURF_STREAM_URL, min_idle: int = 1, max_idle: int = 4,
+                 idle_timeout: float = 60.0, max_age: float = 600.0,
+                 open_timeout: float = 10.0, ping_after: float = 15.0,
+                 refill_interval: float = 5.0):
+        self.api_key = api_key
+        self.url = url
+        self.min_idle = min_idle
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self.open_timeout = open_timeout
+        self.ping_after = ping_after
+        self.refill_interval = refill_interval
+        self._idle: list = []
+        self._in_use = 0
+        self._opening = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "opened": 0,
+            "open_failures": 0,
+            "evicted_idle": 0,
+            "evicted_age": 0,
+            "health_check_failures": 0,
+            "discarded": 0,
+            "returned": 0,
+            "connect_ms_total": 0.0,
+        }
+
+    def start(self):
+        if self._task is None and not self._closed:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def _open(self) -> PooledMurfConnection:
+        self._opening += 1
+        started = time.perf_counter()
+        try:
+            ws = await websockets.connect(murf_stream_uri(self.api_key, self.url), open_timeout=self.open_timeout)
+        except Exception:
+            self.stats["open_failures"] += 1
+            raise
+        finally:
+            self._opening -= 1
+        connect_ms = (time.perf_counter() - started) * 1000
+        self.stats["opened"] += 1
+        self.stats["connect_ms_total"] += connect_ms
+        return PooledMurfConnection(ws, connect_ms)
+
+    def _expired(self, conn: PooledMurfConnection, now: float) -> bool:
+        return now - conn.created_at > self.max_age
+
+    async def _healthy(self, conn: PooledMurfConnection) -> bool:
+        if not conn.is_open:
+            return False
+        if time.monotonic() - conn.last_used < self.ping_after:
+            return True
+        try:
+            pong = await conn.ws.ping()
+            await asyncio.wait_for(pong, timeout=2.0)
+            return True
+        except Exception:
+            return False
+
+    async def acquire(self) -> PooledMurfConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            if self._expired(conn, time.monotonic()):
+                self.stats["evicted_age"] += 1
+                await conn.close()
+                continue
+            try:
+                healthy = await self._healthy(conn)
+            except BaseException:
+                # Cancelled mid-ping: the connection is neither idle nor leased any more.
+                await asyncio.shield(conn.close())
+                raise
+            if not healthy:
+                self.stats["health_check_failures"] += 1
+                await conn.close()
+                continue
+            self.stats["hits"] += 1
+            self._in_use += 1
+            self._wakeup.set()
+            return conn
+        self.stats["misses"] += 1
+        conn = await self._open()
+        self._in_use += 1
+        self._wakeup.set()
+        return conn
+
+    async def release(self, conn: PooledMurfConnection):
+        self._in_use -= 1
+        conn.uses += 1
+        conn.last_used = time.monotonic()
+        reusable = conn._clean and conn.is_open and not self._closed
+        conn._clean = False
+        if reusable and len(self._idle) < self.max_idle and not self._expired(conn, conn.last_used):
+            self._idle.append(conn)
+            self.stats["returned"] += 1
+        else:
+            self.stats["discarded"] += 1
+            await conn.close()
+        self._wakeup.set()
+
+    @asynccontextmanager
+    async def lease(self):
+        """Check out a connection for one turn: ``async with pool.lease() as ws: ...``."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await asyncio.shield(self.release(conn))
+
+    async def _evict(self):
+        now = time.monotonic()
+        keep = []
+        # Work on a snapshot: turns may check connections in and out while we await close().
+        idle, self._idle = self._idle, []
+        # Most recently used connections are at the end; keep those warm first.
+        unchecked = list(reversed(idle))
+        try:
+            while unchecked:
+                conn = unchecked.pop(0)
+                if not conn.is_open:
+                    self.stats["health_check_failures"] += 1
+                    await conn.close()
+                elif self._expired(conn, now):
+                    self.stats["evicted_age"] += 1
+                    await conn.close()
+                elif len(keep) >= self.min_idle and now - conn.last_used > self.idle_timeout:
+                    self.stats["evicted_idle"] += 1
+                    await conn.close()
+                else:
+                    keep.append(conn)
+        finally:
+            # Also when cancelled by close(): whatever wasn't closed goes back so close() finds it.
+            self._idle = list(reversed(keep + unchecked)) + self._idle
+
+    async def _maintain(self):
+        backoff = self.refill_interval
+        while not self._closed:
+            try:
+                await self._evict()
+                while len(self._idle) + self._opening < self.min_idle and not self._closed:
+                    conn = await self._open()
+                    conn.last_used = time.monotonic()
+                    self._idle.append(conn)
+                backoff = self.refill_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Murf pool refill failed: {e}")
+                backoff = min(backoff * 2, 60.0)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self) -> dict:
+        opened = self.stats["opened"]
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **{k: v for k, v in self.stats.items() if k != "connect_ms_total"},
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "opening": self._opening,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            "avg_connect_ms": round(self.stats["connect_ms_total"] / opened, 1) if opened else None,
+        }
+
+    async def close(self):
+        """Close the idle connections; leased ones stay usable and are closed when released."""
+        self._closed = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.close()
+
+
+class MurfTurnConnection:
+    """A pooled Murf connection opened for one turn, concurrently with the LLM request.
+
+    Checkout and the voice config run in the ``opening`` task started at construction. Text
+    sent before the connection is ready is buffered and flushed in order by ``ready()``,
+    which raises if the connection failed so the caller can abandon the LLM leg. ``close``
+    cancels a connection still being opened, or returns the leased one to the pool (which
+    only keeps it if ``mark_done()`` was called).
+    """
+
+    def __init__(self, pool: MurfConnectionPool, voice_config: dict, context_id: str):
+        self.pool = pool
+        self.context_id = context_id
+        self.conn: Optional[PooledMurfConnection] = None
+        self.buffered = 0
+        self._pending: list = []
+        self._flushing = asyncio.Lock()
+        self.opening = asyncio.create_task(self._open(voice_config))
+
+    async def _open(self, voice_config: dict) -> PooledMurfConnection:
+        conn = await self.pool.acquire()
+        try:
+            await conn.send(json.dumps({"voice_config": voice_config, "context_id": self.context_id}))
+        except BaseException:
+            await asyncio.shield(self.pool.release(conn))
+            raise
+        return conn
+
+    async def ready(self) -> PooledMurfConnection:
+        if self.conn is None:
+            # Concurrent callers (a reader, the sender) wait here so nothing overtakes the buffered text.
+            async with self._flushing:
+                if self.conn is None:
+                    conn = await self.opening
+                    while self._pending:
+                        await conn.send(self._pending.pop(0))
+                    self.conn = conn
+        return self.conn
+
+    async def send_text(self, text: str, end: bool = False) -> bool:
+        """Send (or buffer, while still connecting) a text segment; True if it went out now."""
+        message = json.dumps({"text": text, "end": end, "context_id": self.context_id})
+        if self.conn is None and not self.opening.done():
+            self._pending.append(message)
+            self.buffered += 1
+            return False
+        await (await self.ready()).send(message)
+        return True
+
+    async def close(self):
+        if self.conn is None and not self.opening.done():
+            self.opening.cancel()
+        try:
+            conn = self.conn or await self.opening
+        except (asyncio.CancelledError, Exception):
+            return
+        await asyncio.shield(self.pool.release(conn))
+
+
+class MurfPoolRegistry:
+    """One ``MurfConnectionPool`` per Murf API key, created and warmed on first use."""
+
+    def __init__(self, max_pools: int = 32, **pool_kwargs):
+        self.max_pools = max_pools
+        self.pool_kwargs = pool_kwargs
+        self._pools: Dict[str, MurfConnectionPool] = {}
+
+    def get(self, api_key: str) -> MurfConnectionPool:
+        pool = self._pools.pop(api_key, None)
+        if pool is None:
+            pool = MurfConnectionPool(api_key, **self.pool_kwargs)
+            if len(self._pools) >= self.max_pools:
+                # Drop the least recently used key's pool.
+                oldest_key = next(iter(self._pools))
+                asyncio.create_task(self._pools.pop(oldest_key).close())
+        self._pools[api_key] = pool
+        pool.start()
+        return pool
+
+    def metrics(self) -> dict:
+        # Never expose the keys themselves; a short digest is enough to tell pools apart.
+        return {
+            hashlib.sha256(key.encode()).hexdigest()[:8]: pool.metrics()
+            for key, pool in self._pools.items()
+        }
+
+    async def close(self):
+        pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            await pool.close()
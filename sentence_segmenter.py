@@ -0,0 +1,100 @@
+import re
+from typing import List
+
+
+# Words that end in "." without ending the sentence (compared lowercased, without the dot).
+# Only unambiguous ones: words like "no", "co" or "dec" end sentences too often to list.
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e", "a.m", "p.m",
+})
+SENTENCE_END = ".?!"
+CLAUSE_END = ",;:"
+
+# Last character of a word, i.e. a non-space followed by whitespace: the only places a
+# segment can end, so the scan jumps from word to word instead of character to character.
+_WORD_END = re.compile(r"\S(?=\s)")
+_SENTENCE_END = re.compile(r"[.?!](?=\s)")
+
+
+class SentenceSegmenter:
+    """Splits streamed LLM text into segments for TTS, scanning only newly arrived text.
+
+    The first segment of a response is flushed as early as possible to cut time-to-first-audio:
+    at the first clause break (``,;:``) once it has ``first_clause_min_words`` words, after
+    ``first_flush_words`` words, or at the first sentence end, whichever comes first. Later
+    segments are whole sentences grouped until they reach ``group_min_chars`` so Murf gets
+    enough context for natural prosody. A boundary is only taken when the punctuation is
+    followed by whitespace, so decimals ("3.14") and URLs ("example.com/a?b") never split;
+    known abbreviations and single-letter initials ("Dr.", "e.g.", "J.") don't either.
+    """
+
+    def __init__(self, first_flush_words: int = 8, first_clause_min_words: int = 3,
+                 group_min_chars: int = 60):
+        self.first_flush_words = first_flush_words
+        self.first_clause_min_words = first_clause_min_words
+        self.group_min_chars = group_min_chars
+        self._buffer = ""
+        self._start = 0       # start of the pending segment in _buffer
+        self._pos = 0         # next index to examine
+        self._words = 0       # completed words in the pending segment
+        self._first = True    # still waiting to emit the response's first segment
+
+    def _is_abbreviation(self, end: int) -> bool:
+        begin = end
+        while begin > self._start and not self._buffer[begin - 1].isspace():
+            begin -= 1
+        word = self._buffer[begin:end].lstrip("(\"'[").lower()
+        return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+    def _emit(self, end: int, out: List[str]):
+        segment = self._buffer[self._start:end].strip()
+        if segment:
+            out.append(segment)
+            self._first = False
+        self._start = end
+        self._words = 0
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns the segments that are ready to be spoken."""
+        out: List[str] = []
+        self._buffer += text
+        buffer = self._buffer
+        pos = self._pos
+        if self._first:
+            # Until the first segment goes out, every word end is a candidate break.
+            for match in _WORD_END.finditer(buffer, pos):
+                i = match.start()
+                ch = buffer[i]
+                self._words += 1
+                if (
+                    (ch in SENTENCE_END and not (ch == "." and self._is_abbreviation(i)))
+                    or (ch in CLAUSE_END and self._words >= self.first_clause_min_words)
+                    or self._words >= self.first_flush_words
+                ):
+                    self._emit(i + 1, out)
+                    pos = i + 1
+                    break
+        if not self._first:
+            # Afterwards only sentence ends matter; group them up to group_min_chars.
+            for match in _SENTENCE_END.finditer(buffer, pos):
+                i = match.start()
+                if buffer[i] == "." and self._is_abbreviation(i):
+                    continue
+                if i + 1 - self._start >= self.group_min_chars:
+                    self._emit(i + 1, out)
+        # The last character can't be judged until we see what follows it.
+        self._pos = max(self._pos, len(buffer) - 1)
+        if self._start:
+            # Drop the consumed prefix so the buffer only ever holds the pending segment.
+            self._buffer = buffer[self._start:]
+            self._pos -= self._start
+            self._start = 0
+        return out
+
+    def flush(self) -> str:
+        """End of response: return whatever is still pending and reset for the next one."""
+        remainder = self._buffer[self._start:].strip()
+        self._buffer = ""
+        self._start = self._pos = self._words = 0
+        self._first = True
+        return remainder
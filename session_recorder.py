@@ -0,0 +1,307 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import secrets
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+FORMAT_VERSION = 1
+
+# One fixed-size index record per event: seconds since the recording started (monotonic), byte
+# offset and length of the payload (in audio.pcm for client audio, events.dat otherwise), kind.
+INDEX_RECORD = struct.Struct("<dQIH2x")
+
+CLIENT_AUDIO = 1  # microphone PCM from the browser
+CLIENT_TEXT = 2  # JSON control message from the browser
+SERVER_TEXT = 3  # JSON message written to the browser (audio payloads reduced to their size)
+SERVER_AUDIO = 4  # binary audio frame written to the browser (length only)
+STT_TURN = 5  # AssemblyAI Turn event
+TURN = 6  # a finished turn: outcome and stage marks
+
+KIND_NAMES = {
+    CLIENT_AUDIO: "client_audio",
+    CLIENT_TEXT: "client_text",
+    SERVER_TEXT: "server_text",
+    SERVER_AUDIO: "server_audio",
+    STT_TURN: "stt_turn",
+    TURN: "turn",
+}
+
+recorder_stats = {
+    "sessions": 0,
+    "active": 0,
+    "events": 0,
+    "audio_bytes": 0,
+    "bytes_written": 0,
+    "truncated": 0,
+    "write_errors": 0,
+}
+_stats_lock = threading.Lock()  # counters are bumped from the loop, the SDK thread and flush workers
+
+
+def _count(**deltas: int):
+    with _stats_lock:
+        for name, delta in deltas.items():
+            recorder_stats[name] += delta
+
+
+def session_recorder_metrics() -> dict:
+    with _stats_lock:
+        return dict(recorder_stats)
+
+
+def _redact(data: dict) -> dict:
+    """Client messages minus anything secret: API keys are recorded as present, never their values."""
+    if data.get("type") == "update_api_keys":
+        return {**data, "keys": {name: "<redacted>" for name, value in (data.get("keys") or {}).items() if value}}
+    return data
+
+
+class SessionRecorder:
+    """Writes one /ws session to disk for offline replay (``benchmarks/replay_session.py``).
+
+    A recording is a directory holding ``audio.pcm`` (the browser's microphone audio, raw),
+    ``events.idx`` (``INDEX_RECORD`` per event, in time order), ``events.dat`` (the events'
+    JSON payloads) and ``meta.json``. Both data files are append-only, so ``SessionRecording``
+    can memory-map them and index events without parsing anything.
+
+    Events are appended to in-memory buffers (from the event loop, or from the AssemblyAI SDK
+    thread for STT events) and written by a flusher on a worker thread, so recording never puts
+    file I/O on the event loop. One write runs at a time, so the files grow in event order.
+    Audio past ``max_bytes`` is dropped; events keep being recorded.
+    """
+
+    def __init__(self, directory: str, session_id: str, max_bytes: int = 64 * 1024 * 1024,
+                 flush_interval: float = 1.0):
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{session_id[:8]}-{secrets.token_hex(2)}"
+        self.path = Path(directory) / name
+        self.session_id = session_id
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.started = time.monotonic()
+        self.started_at = datetime.now().isoformat()
+        self.truncated = False
+        self._lock = threading.Lock()
+        self._index = bytearray()
+        self._data = bytearray()
+        self._audio = bytearray()
+        self._data_offset = 0
+        self._audio_offset = 0
+        self._events = 0
+        self._files: Dict[str, object] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._writing = asyncio.Lock()
+        self._closed = False
+
+    def start(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        _count(sessions=1, active=1)
+        logging.info(f"🎙️ Recording session {self.session_id[:8]} to {self.path}")
+
+    def _append(self, kind: int, payload: bytes = b"", at: Optional[float] = None, audio: bool = False,
+                size: Optional[int] = None):
+        with self._lock:
+            if self._closed:
+                return
+            if audio and self._audio_offset + len(payload) > self.max_bytes:
+                first_drop, self.truncated = not self.truncated, True
+                if first_drop:
+                    _count(truncated=1)
+                    logging.warning(f"🎙️ Recording of session {self.session_id[:8]} reached {self.max_bytes // (1024 * 1024)} MB; audio no longer recorded")
+                return
+            t = (at if at is not None else time.monotonic()) - self.started
+            if audio:
+                offset = self._audio_offset
+                self._audio += payload
+                self._audio_offset += len(payload)
+            else:
+                offset = self._data_offset
+                self._data += payload
+                self._data_offset += len(payload)
+            self._index += INDEX_RECORD.pack(t, offset, len(payload) if size is None else size, kind)
+            self._events += 1
+        _count(events=1, audio_bytes=len(payload) if audio else 0)
+
+    def _append_json(self, kind: int, data: dict, at: Optional[float] = None):
+        self._append(kind, json.dumps(data, separators=(",", ":")).encode("utf-8"), at)
+
+    def client_audio(self, pcm: bytes):
+        self._append(CLIENT_AUDIO, pcm, audio=True)
+
+    def client_text(self, text: str):
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            data = {"type": "unparsable", "length": len(text)}
+        if isinstance(data, dict):
+            self._append_json(CLIENT_TEXT, _redact(data))
+
+    def server_message(self, data, kind: Optional[str] = None):
+        """A message the writer just put on the wire, with its type; audio is recorded by size only."""
+        if isinstance(data, bytes):
+            self._append(SERVER_AUDIO, size=len(data))  # no payload; the index keeps the frame size
+        elif kind == "audio":
+            self._append_json(SERVER_TEXT, {"type": "audio", "size": len(data)})
+        else:
+            self._append(SERVER_TEXT, data.encode("utf-8"))
+
+    def stt_turn(self, event, at: float):
+        """An AssemblyAI Turn event, called on the SDK thread as it arrives."""
+        self._append_json(STT_TURN, {
+            "turn_order": event.turn_order,
+            "transcript": event.transcript,
+            "end_of_turn": event.end_of_turn,
+            "turn_is_formatted": event.turn_is_formatted,
+        }, at)
+
+    def turn(self, timer):
+        """A finished ``TurnTimer``: stage marks in seconds since its end-of-turn."""
+        self._append_json(TURN, {
+            "outcome": timer.outcome or "ok",
+            "started": round(timer.started - self.started, 6),
+            "stages": {stage: round(at - timer.started, 6) for stage, at in timer.marks.items()},
+        })
+
+    def _take(self) -> Tuple[bytes, bytes, bytes]:
+        with self._lock:
+            taken = bytes(self._index), bytes(self._data), bytes(self._audio)
+            self._index.clear()
+            self._data.clear()
+            self._audio.clear()
+            return taken
+
+    def _write(self, index: bytes, data: bytes, audio: bytes):
+        if not self._files:
+            self._write_meta(None)  # a recording cut short (crash, restart) stays readable
+        # Payloads first, so an index record never points past the end of its file.
+        for name, blob in (("audio.pcm", audio), ("events.dat", data), ("events.idx", index)):
+            if name not in self._files:
+                self._files[name] = open(self.path / name, "ab")
+            if blob:
+                self._files[name].write(blob)
+                self._files[name].flush()
+        _count(bytes_written=len(index) + len(data) + len(audio))
+
+    async def flush(self):
+        async with self._writing:
+            index, data, audio = self._take()
+            if not (index or data or audio):
+                return
+            write = asyncio.create_task(asyncio.to_thread(self._write, index, data, audio))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                await asyncio.wait([write])  # a cancelled flusher holds the lock until its write is done
+                raise
+            except OSError as e:
+                _count(write_errors=1)
+                logging.error(f"🎙️ Failed to write session recording {self.path}: {e}")
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _write_meta(self, duration: Optional[float]):
+        meta = {
+            "version": FORMAT_VERSION,
+            "session_id": self.session_id,
+            "started_at": self.started_at,
+            "duration": round(duration, 3) if duration is not None else None,
+            "events": self._events if duration is not None else None,
+            "audio": {"sample_rate": 16000, "sample_width": 2, "channels": 1, "bytes": self._audio_offset},
+            "audio_truncated": self.truncated,
+            "index_record": INDEX_RECORD.format,
+            "kinds": {str(kind): name for kind, name in KIND_NAMES.items()},
+        }
+        (self.path / "meta.json").write_text(json.dumps(meta, indent=2))
+
+    def _finish(self, duration: float):
+        for f in self._files.values():
+            f.close()
+        self._write_meta(duration)
+
+    async def close(self):
+        if self._flusher is None or self._closed:
+            return
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        await self.flush()
+        with self._lock:
+            self._closed = True
+        _count(active=-1)
+        try:
+            async with self._writing:
+                await asyncio.to_thread(self._finish, time.monotonic() - self.started)
+        except OSError as e:
+            _count(write_errors=1)
+            logging.error(f"🎙️ Failed to finish session recording {self.path}: {e}")
+            return
+        logging.info(f"🎙️ Recorded {self._events} events, {self._audio_offset / 32000:.1f} s of audio to {self.path}")
+
+
+class SessionRecording:
+    """Read side of a ``SessionRecorder`` directory; the data files are memory-mapped."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported recording version {self.meta.get('version')} in {self.path}")
+        self._index = self._map("events.idx")
+        self._data = self._map("events.dat")
+        self._audio = self._map("audio.pcm")
+
+    def _map(self, name: str):
+        path = self.path / name
+        if not path.exists() or not os.path.getsize(path):
+            return b""
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._index) // INDEX_RECORD.size
+
+    @property
+    def duration(self) -> float:
+        """Seconds from the start to the last event written (the session may have been cut short)."""
+        if self.meta.get("duration") is not None:
+            return self.meta["duration"]
+        return INDEX_RECORD.unpack_from(self._index, len(self._index) - INDEX_RECORD.size)[0] if len(self) else 0.0
+
+    def __iter__(self) -> Iterator[Tuple[float, int, int, int]]:
+        """Raw index records: (seconds since start, kind, payload offset, payload length)."""
+        for i in range(len(self)):
+            t, offset, length, kind = INDEX_RECORD.unpack_from(self._index, i * INDEX_RECORD.size)
+            yield t, kind, offset, length
+
+    def events(self, *kinds: int) -> Iterator[Tuple[float, int, object]]:
+        """(seconds since start, kind, payload) for events of ``kinds`` (default all).
+
+        Client audio payloads are PCM bytes, server audio frames their size, the rest decoded JSON.
+        """
+        for t, kind, offset, length in self:
+            if kinds and kind not in kinds:
+                continue
+            if kind == CLIENT_AUDIO:
+                yield t, kind, self._audio[offset:offset + length]
+            elif kind == SERVER_AUDIO:
+                yield t, kind, length
+            else:
+                yield t, kind, json.loads(self._data[offset:offset + length])
+
+    def close(self):
+        for mapped in (self._index, self._data, self._audio):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
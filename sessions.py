@@ -0,0 +1,250 @@
+import abc
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+from conversation_memory import ConversationMemory
+
+
+class SessionStore(abc.ABC):
+    """Where session state lives between connections.
+
+    State is owned by one connection at a time: ``claim`` hands it to a new owner (e.g. a
+    reconnect landing on another worker or node), after which saves from the previous owner
+    are refused so a slow-to-close old connection can't overwrite the new one's history.
+    """
+
+    @abc.abstractmethod
+    async def claim(self, session_id: str, owner: str) -> Optional[dict]:
+        """Take ownership of a stored session; returns its state, or None if unknown/expired."""
+
+    @abc.abstractmethod
+    async def save(self, session_id: str, owner: str, state: dict) -> bool:
+        """Store state if ``owner`` still owns the session (or it's new); False if it was handed off."""
+
+    @abc.abstractmethod
+    async def delete(self, session_id: str):
+        """Forget a session."""
+
+    @abc.abstractmethod
+    def close(self):
+        """Release the store's resources (connections, files) at shutdown."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process store: resumes only work when reconnects come back to the same worker."""
+
+    def __init__(self, ttl: float = 1800.0):
+        self.ttl = ttl
+        self._sessions: Dict[str, dict] = {}  # id -> {"owner", "state", "updated_at"}
+
+    def _purge(self, now: float):
+        for session_id in [k for k, v in self._sessions.items() if now - v["updated_at"] > self.ttl]:
+            del self._sessions[session_id]
+
+    async def claim(self, session_id: str, owner: str) -> Optional[dict]:
+        now = time.time()
+        self._purge(now)
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        entry["owner"] = owner
+        entry["updated_at"] = now
+        return entry["state"]
+
+    async def save(self, session_id: str, owner: str, state: dict) -> bool:
+        entry = self._sessions.get(session_id)
+        if entry is not None and entry["owner"] != owner:
+            return False
+        self._sessions[session_id] = {"owner": owner, "state": state, "updated_at": time.time()}
+        return True
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+    def close(self):
+        self._sessions.clear()
+
+
+class SQLiteSessionStore(SessionStore):
+    """File-backed store shared by every worker process that opens the same database.
+
+    A stand-in for a networked store (Redis, Postgres): it lets several uvicorn workers, or
+    nodes sharing a volume, hand sessions to each other. Queries run on a worker thread.
+    """
+
+    def __init__(self, path: str, ttl: float = 1800.0):
+        self.path = path
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, owner TEXT NOT NULL, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _claim(self, session_id: str, owner: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+            row = self._db.execute(
+                "UPDATE sessions SET owner = ?, updated_at = ? WHERE id = ? RETURNING state",
+                (owner, now, session_id),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, session_id: str, owner: str, state: dict) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO sessions (id, owner, state, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at "
+                "WHERE sessions.owner = excluded.owner",
+                (session_id, owner, json.dumps(state), time.time()),
+            )
+        return cursor.rowcount > 0
+
+    def _delete(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    async def claim(self, session_id: str, owner: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._claim, session_id, owner)
+
+    async def save(self, session_id: str, owner: str, state: dict) -> bool:
+        return await asyncio.to_thread(self._save, session_id, owner, state)
+
+    async def delete(self, session_id: str):
+        await asyncio.to_thread(self._delete, session_id)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def create_session_store(url: str, ttl: float = 1800.0) -> SessionStore:
+    """``memory`` or ``sqlite:<path>``."""
+    if url.startswith("sqlite:"):
+        return SQLiteSessionStore(url[len("sqlite:"):], ttl=ttl)
+    if url != "memory":
+        raise ValueError(f"Unknown session store: {url}")
+    return InMemorySessionStore(ttl=ttl)
+
+
+class Session:
+    """Everything one browser conversation needs.
+
+    ``memory`` is durable and goes to the session store; the rest (API keys, which the
+    browser re-sends on every connect, the websocket, STT client and its turn dedupe state,
+    running response task, ...) belongs to the current connection only.
+    """
+
+    def __init__(self, session_id: str, default_api_keys: Mapping[str, Optional[str]], token_budget: int):
+        self.id = session_id
+        self.owner = secrets.token_hex(8)  # this connection, for store ownership
+        self.default_api_keys = default_api_keys
+        self.api_keys: Dict[str, str] = {}
+        self.memory = ConversationMemory(token_budget=token_budget)
+        self.created_at = time.time()
+        self.resumed = False
+        # Per-connection runtime state
+        self.last_processed_transcript = ""
+        self.websocket = None
+        self.writer = None
+        self.audio_channel = None
+        self.barge_in = None
+        self.stt_client = None
+        self.audio_ingest = None
+        self.llm_task: Optional[asyncio.Task] = None
+        self.reply_channel = None  # AudioChannel the running response speaks through
+        self.speculation = None
+        self.recorder = None
+        self.permits = []  # admission permits held for the whole connection (session, STT stream)
+
+    def api_key(self, name: str) -> Optional[str]:
+        """The session's own key for a service, falling back to the server default."""
+        return self.api_keys.get(name) or self.default_api_keys.get(name)
+
+    def update_api_keys(self, keys: dict):
+        for key, value in keys.items():
+            if value and value.strip():  # Only update if key has a value
+                self.api_keys[key] = value.strip()
+
+    def snapshot(self) -> dict:
+        return {
+            "memory": self.memory.to_dict(),
+            "created_at": self.created_at,
+        }
+
+    def restore(self, state: dict):
+        self.memory.restore(state.get("memory") or {})
+        self.created_at = state.get("created_at") or self.created_at
+
+
+class SessionRegistry:
+    """Live sessions of this worker, backed by a ``SessionStore`` for handoff between connections."""
+
+    def __init__(self, store: SessionStore, default_api_keys: Mapping[str, Optional[str]],
+                 token_budget: int = 1500):
+        self.store = store
+        self.default_api_keys = default_api_keys
+        self.token_budget = token_budget
+        self._live: Dict[str, Session] = {}
+        self.stats = {"created": 0, "resumed": 0, "resume_misses": 0, "saves": 0, "stale_saves": 0, "save_errors": 0}
+
+    def create(self) -> Session:
+        session = Session(secrets.token_urlsafe(16), self.default_api_keys, self.token_budget)
+        self._live[session.id] = session
+        self.stats["created"] += 1
+        return session
+
+    async def resume(self, session: Session, session_id: str) -> bool:
+        """Take over the stored state of ``session_id`` (a reconnect) into this connection's session."""
+        if not session_id or session_id == session.id:
+            return False
+        try:
+            state = await self.store.claim(session_id, session.owner)
+        except Exception as e:
+            logging.error(f"Session store claim failed: {e}")
+            state = None
+        if state is None:
+            self.stats["resume_misses"] += 1
+            return False
+        self._live.pop(session.id, None)
+        session.id = session_id
+        session.restore(state)
+        session.resumed = True
+        previous = self._live.get(session_id)
+        if previous is not None and previous is not session:
+            logging.info(f"Session {session_id[:8]} reconnected while its old connection is still open")
+        self._live[session_id] = session
+        self.stats["resumed"] += 1
+        return True
+
+    async def save(self, session: Session):
+        try:
+            saved = await self.store.save(session.id, session.owner, session.snapshot())
+        except Exception as e:
+            self.stats["save_errors"] += 1
+            logging.error(f"Session store save failed: {e}")
+            return
+        self.stats["saves" if saved else "stale_saves"] += 1
+
+    def save_soon(self, session: Session):
+        asyncio.create_task(self.save(session))
+
+    async def close(self, session: Session):
+        await self.save(session)
+        if self._live.get(session.id) is session:
+            del self._live[session.id]
+
+    def metrics(self) -> dict:
+        return {**self.stats, "live": len(self._live), "store": type(self.store).__name__}
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Awaitable, Callable, List, Optional
+
+from conversation_memory import ConversationMemory, estimate_tokens
+
+
+speculation_stats = {
+    "started": 0,
+    "committed": 0,
+    "committed_on_timeout": 0,
+    "rejected": 0,
+    "wasted_llm_tokens": 0,
+}
+
+
+def normalize_transcript(text: str) -> str:
+    """Compare transcripts ignoring case, punctuation and spacing (what formatting changes)."""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+class SpeculativeTurn:
+    """A response started from the unformatted end-of-turn transcript.
+
+    Everything the response would make visible (client messages, memory writes) is routed
+    through ``run_or_defer`` and held back until the formatted transcript arrives. ``commit``
+    replays the held actions in order and lets later ones through directly; ``reject`` drops
+    them and cancels the task so the turn can be restarted with the formatted text.
+    """
+
+    def __init__(self, transcript: str):
+        self.transcript = transcript
+        self.key = normalize_transcript(transcript)
+        self.final_transcript: Optional[str] = None
+        self.state = "pending"  # pending -> flushing -> committed, or pending -> rejected
+        self.task: Optional[asyncio.Task] = None
+        self.timer = None  # TurnTimer started at the unformatted end-of-turn
+        self._held: List[Callable[[], Awaitable]] = []
+        self._held_llm_tokens = 0
+        speculation_stats["started"] += 1
+
+    @property
+    def pending(self) -> bool:
+        return self.state == "pending"
+
+    def matches(self, transcript: str) -> bool:
+        return normalize_transcript(transcript) == self.key
+
+    async def run_or_defer(self, action: Callable[[], Awaitable], llm_text: str = ""):
+        if self.state == "committed":
+            await action()
+        elif self.state in ("pending", "flushing"):
+            self._held.append(action)
+            if llm_text:
+                self._held_llm_tokens += estimate_tokens(llm_text)
+        # rejected: the action is dropped
+
+    async def commit(self, final_transcript: Optional[str] = None, on_timeout: bool = False):
+        if self.state != "pending":
+            return
+        self.final_transcript = final_transcript or self.transcript
+        self.state = "flushing"
+        speculation_stats["committed_on_timeout" if on_timeout else "committed"] += 1
+        # Actions queued while we flush are appended and picked up by this same loop.
+        while self._held:
+            action = self._held.pop(0)
+            try:
+                await action()
+            except Exception as e:
+                logging.warning(f"Replaying speculative output failed: {e}")
+        self.state = "committed"
+
+    def reject(self):
+        if self.state != "pending":
+            return
+        self.state = "rejected"
+        self._held.clear()
+        speculation_stats["rejected"] += 1
+        speculation_stats["wasted_llm_tokens"] += self._held_llm_tokens
+        if self.timer:
+            self.timer.set_outcome("discarded")
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+
+class GatedWebSocket:
+    """Client websocket stand-in whose sends wait for the speculation to be committed."""
+
+    def __init__(self, websocket, turn: SpeculativeTurn):
+        self._websocket = websocket
+        self._turn = turn
+
+    async def send_text(self, data: str, **kwargs):
+        llm_text = ""
+        if '"llm_chunk"' in data:
+            llm_text = json.loads(data).get("data") or ""
+        await self._turn.run_or_defer(lambda: self._websocket.send_text(data, **kwargs), llm_text=llm_text)
+
+    async def send_bytes(self, data: bytes, **kwargs):
+        await self._turn.run_or_defer(lambda: self._websocket.send_bytes(data, **kwargs))
+
+
+class GatedMemory:
+    """ConversationMemory view that defers writes until the speculation is committed.
+
+    Committed exchanges are stored under the formatted transcript, not the speculative one.
+    """
+
+    def __init__(self, memory: ConversationMemory, turn: SpeculativeTurn):
+        self._memory = memory
+        self._turn = turn
+
+    def history(self):
+        return self._memory.history()
+
+    def prompt_tokens(self, user_text: str) -> int:
+        return self._memory.prompt_tokens(user_text)
+
+    def add_exchange(self, user_text: str, model_text: str):
+        async def write():
+            self._memory.add_exchange(self._turn.final_transcript or user_text, model_text)
+        asyncio.create_task(self._turn.run_or_defer(write))
+
+    def compact_in_background(self, model):
+        async def compact():
+            self._memory.compact_in_background(model)
+        asyncio.create_task(self._turn.run_or_defer(compact))
@@ -14,6 +14,12 @@ document.addEventListener("DOMContentLoaded", () => {
   // NEW: Keep a reference to the current audio source to stop it gracefully
   let currentAudioSource = null;
 
+  // Binary audio frames: [version u8][turn id u32][sequence u32] + encoded audio bytes
+  const AUDIO_FRAME_VERSION = 1;
+  const AUDIO_FRAME_HEADER_BYTES = 9;
+  let currentAudioTurnId = null;
+  let audioEndReceived = false;
+
   // NEW: Store API keys
   let apiKeys = {
     gemini: "",
@@ -330,6 +336,50 @@ document.addEventListener("DOMContentLoaded", () => {
     }
     audioQueue = [];
     isPlaying = false;
+    currentAudioTurnId = null;
+    audioEndReceived = false;
+  };
+
+  // Lets the server know the reply is no longer audible, so talking now isn't a barge-in.
+  const reportPlaybackEnded = () => {
+    if (!audioEndReceived || currentAudioTurnId === null) return;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(
+        JSON.stringify({ type: "playback_ended", turn_id: currentAudioTurnId })
+      );
+    }
+    audioEndReceived = false;
+  };
+
+  const queueAudioChunk = (buffer) => {
+    console.log(
+      `🎵 Brevix: Processing audio chunk ${audioChunkIndex + 1}. Size: ${
+        buffer.byteLength
+      } bytes. Queueing it up!`
+    );
+    audioChunkIndex++;
+
+    audioQueue.push(buffer);
+
+    if (!isPlaying) {
+      console.log(
+        `▶️ Brevix: Let's play the first chunk! I have ${audioQueue.length} pieces of my response ready.`
+      );
+      playNextChunk();
+    }
+  };
+
+  const handleBinaryAudioFrame = (frame) => {
+    if (frame.byteLength <= AUDIO_FRAME_HEADER_BYTES) return;
+    const header = new DataView(frame, 0, AUDIO_FRAME_HEADER_BYTES);
+    if (header.getUint8(0) !== AUDIO_FRAME_VERSION) {
+      console.warn("Ignoring audio frame with unknown version");
+      return;
+    }
+    const turnId = header.getUint32(1);
+    // Drop late frames from a turn that was interrupted or already replaced.
+    if (turnId !== currentAudioTurnId) return;
+    queueAudioChunk(frame.slice(AUDIO_FRAME_HEADER_BYTES));
   };
 
   const playNextChunk = () => {
@@ -345,6 +395,7 @@ document.addEventListener("DOMContentLoaded", () => {
       }
       isPlaying = false;
       currentAudioSource = null;
+      reportPlaybackEnded();
       return;
     }
 
@@ -438,6 +489,7 @@ document.addEventListener("DOMContentLoaded", () => {
     try {
       const wsProtocol = window.location.protocol === "https:" ? "wss:" : "ws:";
       socket = new WebSocket(`${wsProtocol}//${window.location.host}/ws`);
+      socket.binaryType = "arraybuffer";
 
       socket.onopen = async () => {
         console.log(
@@ -445,6 +497,16 @@ document.addEventListener("DOMContentLoaded", () => {
         );
         updateStatus("connecting", "Establishing Connection...");
 
+        // Ask for TTS audio as binary frames instead of base64 JSON
+        socket.send(
+          JSON.stringify({
+            type: "client_hello",
+            binary_audio: AUDIO_FRAME_VERSION,
+            // Lets the server resume this tab's conversation after a reconnect
+            session_id: sessionStorage.getItem("brevix_session_id"),
+          })
+        );
+
         // Send API keys to server
         socket.send(
           JSON.stringify({
@@ -508,6 +570,10 @@ document.addEventListener("DOMContentLoaded", () => {
       };
 
       socket.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+          handleBinaryAudioFrame(event.data);
+          return;
+        }
         try {
           const data = JSON.parse(event.data);
 
@@ -533,6 +599,15 @@ document.addEventListener("DOMContentLoaded", () => {
             case "api_keys_updated":
               console.log("API keys updated on server");
               break;
+            case "audio_format":
+              console.log(
+                `Audio delivery: ${data.binary ? "binary frames" : "base64 JSON"}`
+              );
+              break;
+            case "session":
+              sessionStorage.setItem("brevix_session_id", data.session_id);
+              if (data.resumed) console.log("🔁 Brevix: Picked up our conversation where we left off.");
+              break;
             case "transcription":
               if (data.end_of_turn && data.text) {
                 addToChatLog(data.text, "user");
@@ -570,41 +645,28 @@ document.addEventListener("DOMContentLoaded", () => {
 
               audioQueue = [];
               audioChunkIndex = 0;
+              currentAudioTurnId = data.turn_id ?? null;
+              audioEndReceived = false;
               break;
             case "audio_interrupt":
               stopCurrentPlayback();
               updateStatus("listening", "Listening...");
               break;
             case "audio": {
+              // Fallback for servers that don't support binary audio frames
               if (data.data) {
                 const audioData = atob(data.data);
-                const byteNumbers = new Array(audioData.length);
+                const byteArray = new Uint8Array(audioData.length);
                 for (let i = 0; i < audioData.length; i++) {
-                  byteNumbers[i] = audioData.charCodeAt(i);
-                }
-                const byteArray = new Uint8Array(byteNumbers);
-
-                console.log(
-                  `🎵 Brevix: Processing audio chunk ${
-                    audioChunkIndex + 1
-                  }. Size: ${
-                    byteArray.buffer.byteLength
-                  } bytes. Queueing it up!`
-                );
-                audioChunkIndex++;
-
-                audioQueue.push(byteArray.buffer);
-
-                if (!isPlaying) {
-                  console.log(
-                    `▶️ Brevix: Let's play the first chunk! I have ${audioQueue.length} pieces of my response ready.`
-                  );
-                  playNextChunk();
+                  byteArray[i] = audioData.charCodeAt(i);
                 }
+                queueAudioChunk(byteArray.buffer);
               }
               break;
             }
             case "audio_end":
+              audioEndReceived = true;
+              if (!isPlaying && !audioQueue.length) reportPlaybackEnded();
               updateStatus("listening", "Listening...");
               console.log(
                 "🏁 Brevix: The server has confirmed the audio stream is complete."
@@ -614,14 +676,27 @@ document.addEventListener("DOMContentLoaded", () => {
               updateStatus("error", `Error: ${data.message}`);
               showNotification("Error", data.message, "error");
               break;
+            case "busy":
+              // Server is at capacity for a session, transcription or this reply
+              updateStatus("error", "Server busy");
+              showNotification(
+                "Busy",
+                `${data.message} (retry in ~${data.retry_after}s)`,
+                "error"
+              );
+              break;
           }
         } catch (err) {
           console.error("Error parsing message:", err);
         }
       };
 
-      socket.onclose = () => {
-        updateStatus("ready", "Connection Closed");
+      socket.onclose = (event) => {
+        // 1013 (try again later): server at capacity or this client fell too far behind
+        updateStatus(
+          "ready",
+          event.code === 1013 ? "Server busy, try again shortly" : "Connection Closed"
+        );
         console.log(
           "💔 Brevix: Connection closed. Hope we can talk again soon!"
         );
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+
+_DONE = object()
+
+
+class ThreadedAsyncIterator:
+    """Drive a blocking iterator on a dedicated thread and expose it as an async iterator.
+
+    The blocking call that produces the iterator (e.g. ``chat.send_message(..., stream=True)``)
+    and every ``next()`` on it run on the worker thread, so network waits between chunks never
+    block the event loop. At most ``max_buffered`` items are held in flight; the worker pauses
+    when the consumer falls behind. Closing the iterator (or cancelling the consuming task)
+    stops the worker at the next chunk boundary.
+    """
+
+    def __init__(self, factory: Callable[[], Iterable[Any]], max_buffered: int = 8, name: str = "stream-bridge"):
+        self._factory = factory
+        self._name = name
+        self._slots = threading.Semaphore(max_buffered)
+        self._stop = threading.Event()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._finished = False
+
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed; nobody is listening any more.
+            self._stop.set()
+
+    def _run(self):
+        iterator = None
+        try:
+            iterator = iter(self._factory())
+            for item in iterator:
+                # Wait for a free slot, re-checking the stop flag so a cancelled consumer
+                # never leaves this thread blocked forever.
+                while not self._slots.acquire(timeout=0.1):
+                    if self._stop.is_set():
+                        return
+                if self._stop.is_set():
+                    return
+                self._put(item)
+            self._put(_DONE)
+        except BaseException as e:
+            if not self._stop.is_set():
+                self._put(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if self._stop.is_set() and callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    logging.debug(f"Error closing bridged iterator: {e}")
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    async def __anext__(self):
+        if self._finished:
+            raise StopAsyncIteration
+        if self._thread is None:
+            self._start()
+        try:
+            item = await self._queue.get()
+        except asyncio.CancelledError:
+            self.close()
+            raise
+        if item is _DONE:
+            self._finished = True
+            raise StopAsyncIteration
+        if isinstance(item, BaseException):
+            self._finished = True
+            raise item
+        self._slots.release()
+        return item
+
+    def close(self):
+        """Ask the worker thread to stop; safe to call more than once."""
+        self._finished = True
+        self._stop.set()
+
+    async def aclose(self):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iterate_in_thread(factory: Callable[[], Iterable[Any]], max_buffered: int = 8) -> ThreadedAsyncIterator:
+    """Shortcut for ``ThreadedAsyncIterator(factory, max_buffered)``."""
+    return ThreadedAsyncIterator(factory, max_buffered=max_buffered)
@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intent_router import IntentMatch, IntentRouter, build_default_router  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def router():
+    return build_default_router()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Open YouTube.", IntentMatch("website", {"website": "youtube"})),
+    ("What's the weather in Paris?", IntentMatch("weather", {"location": "paris"})),
+    ("Look up the weather in Paris.", IntentMatch("weather", {"location": "paris"})),
+    ("Search for quantum computing.", IntentMatch("search", {"query": "quantum computing"})),
+    ("Google maps.", None),
+    ("Tell me a joke.", None),
+])
+def test_default_routes(router, text, expected):
+    assert router.route(text) == expected
+
+
+def test_rejected_match_falls_back_to_earlier_registered_rule():
+    router = IntentRouter()
+    router.register("later_in_text", [r"world\s+(?P<thing>\w+)"])
+    router.register("anchored", [r"^hello\s+(?P<name>\w+)"], clean=lambda slots: None)
+    assert router.route("hello world peace") == IntentMatch("later_in_text", {"thing": "peace"})
+
+
+def test_fallback_picks_leftmost_of_remaining_rules():
+    router = IntentRouter()
+    router.register("late", [r"gamma\s+(?P<x>\w+)"])
+    router.register("early", [r"beta\s+(?P<x>\w+)"])
+    router.register("first", [r"^alpha\s+(?P<x>\w+)"], clean=lambda slots: None)
+    assert router.route("alpha beta gamma delta") == IntentMatch("early", {"x": "gamma"})
@@ -0,0 +1,84 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sentence_segmenter import SentenceSegmenter  # noqa: E402
+
+
+def segment(text, chunk_sizes=None):
+    """Feed ``text`` in chunks of ``chunk_sizes`` (default one piece); returns every segment."""
+    segmenter = SentenceSegmenter()
+    chunks, i = [], 0
+    for n in chunk_sizes or [len(text)]:
+        chunks.append(text[i:i + n])
+        i += n
+    chunks.append(text[i:])
+    segments = []
+    for chunk in chunks:
+        segments.extend(segmenter.feed(chunk))
+    remainder = segmenter.flush()
+    if remainder:
+        segments.append(remainder)
+    return segments
+
+
+def random_chunkings(text, count=20, seed=7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        sizes, total = [], 0
+        while total < len(text):
+            sizes.append(rng.randint(1, 12))
+            total += sizes[-1]
+        yield sizes
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Pi is 3.14 and e is 2.71. Nice.", ["Pi is 3.14 and e is 2.71.", "Nice."]),
+    ("It costs 4.99 today. Thanks.", ["It costs 4.99 today.", "Thanks."]),
+])
+def test_decimals_do_not_split(text, expected):
+    for sizes in random_chunkings(text):
+        assert segment(text, sizes) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("See example.com/a?b=1 for details. Bye.", ["See example.com/a?b=1 for details.", "Bye."]),
+    ("Go to en.wikipedia.org/wiki/AI! It helps.", ["Go to en.wikipedia.org/wiki/AI!", "It helps."]),
+])
+def test_urls_do_not_split(text, expected):
+    for sizes in random_chunkings(text):
+        assert segment(text, sizes) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Written by J. R. R. Tolkien. Read it.", ["Written by J. R. R. Tolkien.", "Read it."]),
+    ("Dr. Smith is here. He says hi.", ["Dr. Smith is here.", "He says hi."]),
+    ("I like tools, e.g. a hammer. Done.", ["I like tools,", "e.g. a hammer. Done."]),
+])
+def test_initials_and_abbreviations_do_not_split(text, expected):
+    for sizes in random_chunkings(text):
+        assert segment(text, sizes) == expected
+
+
+@pytest.mark.parametrize("word", ["no", "co", "est", "mar", "jun", "dec", "sept"])
+def test_common_words_still_end_sentences(word):
+    text = f"The answer is {word}. You should ask again."
+    assert segment(text) == [f"The answer is {word}.", "You should ask again."]
+
+
+def test_first_segment_flushes_at_first_clause():
+    text = "Of course, I can help with that, my friend."
+    assert segment(text) == ["Of course, I can help with that,", "my friend."]
+
+
+def test_later_sentences_are_grouped():
+    text = "Yes. " + "This sentence is short. " * 4
+    assert segment(text) == [
+        "Yes.",
+        "This sentence is short. This sentence is short. This sentence is short.",
+        "This sentence is short.",
+    ]
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from website_catalog import WebsiteCatalog  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return WebsiteCatalog(str(ROOT / "data" / "websites.json"))
+
+
+@pytest.mark.parametrize("name, url", [
+    ("bbc news", "https://bbc.com"),
+    ("hacker news", "https://news.ycombinator.com"),
+    ("google news", "https://news.google.com"),
+    ("news", "https://news.google.com"),
+    ("youtube music videos", "https://youtube.com"),
+    ("insta", "https://instagram.com"),
+])
+def test_lookup(catalog, name, url):
+    assert catalog.lookup(name) == url
+
+
+def test_lookup_rejects_unrelated_phrases(catalog):
+    assert catalog.lookup("weather in delhi") is None
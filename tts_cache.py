@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+
+_CHUNK_LEN = struct.Struct("!I")
+
+
+def normalize_tts_text(text: str) -> str:
+    """Canonical form of text for cache lookups: NFC, trimmed, single spaces.
+
+    Case and punctuation are kept because they change how Murf speaks the text.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def tts_cache_key(voice_id: str, style: str, sample_rate: int, audio_format: str, text: str) -> str:
+    material = "\x1f".join([voice_id, style, str(sample_rate), audio_format, normalize_tts_text(text)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _encode_chunks(chunks: List[bytes]) -> bytes:
+    return b"".join(_CHUNK_LEN.pack(len(c)) + c for c in chunks)
+
+
+def _decode_chunks(blob: bytes) -> List[bytes]:
+    chunks, offset = [], 0
+    while offset < len(blob):
+        (size,) = _CHUNK_LEN.unpack_from(blob, offset)
+        offset += _CHUNK_LEN.size
+        chunks.append(blob[offset:offset + size])
+        offset += size
+    return chunks
+
+
+class TTSAudioCache:
+    """Content-addressed cache of synthesized speech.
+
+    Entries are the list of audio chunks Murf streamed for one text, so a hit can be replayed
+    to the client chunk by chunk exactly like a live synthesis. The memory tier is an LRU
+    bounded by total bytes; the optional disk tier (one file per key under ``disk_dir``) lets
+    entries survive restarts and is pruned oldest-first once it exceeds ``disk_max_bytes``.
+    """
+
+    def __init__(self, max_memory_bytes: int = 32 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 512 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, List[bytes]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "bytes_saved": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(f.stat().st_size for f in self.disk_dir.glob("*.tts"))
+
+    def _remember(self, key: str, chunks: List[bytes]):
+        size = sum(len(c) for c in chunks)
+        if size > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= sum(len(c) for c in old)
+        self._memory[key] = chunks
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sum(len(c) for c in evicted)
+            self.stats["memory_evictions"] += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.tts"
+
+    def _read_disk(self, key: str) -> Optional[List[bytes]]:
+        path = self._disk_path(key)
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # keep recently used files at the back of the prune order
+        return _decode_chunks(blob)
+
+    def _write_disk(self, key: str, chunks: List[bytes]):
+        path = self._disk_path(key)
+        tmp = path.with_suffix(".tmp")
+        blob = _encode_chunks(chunks)
+        tmp.write_bytes(blob)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)
+        self._disk_bytes += len(blob) - replaced
+        if self._disk_bytes > self.disk_max_bytes:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        files = sorted(self.disk_dir.glob("*.tts"), key=lambda f: f.stat().st_mtime)
+        total = sum(f.stat().st_size for f in files)
+        target = self.disk_max_bytes * 0.9
+        for f in files:
+            if total <= target:
+                break
+            size = f.stat().st_size
+            f.unlink(missing_ok=True)
+            total -= size
+            self.stats["disk_evictions"] += 1
+        self._disk_bytes = total
+
+    async def get(self, key: str) -> Optional[List[bytes]]:
+        chunks = self._memory.get(key)
+        if chunks is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+        elif self.disk_dir:
+            try:
+                chunks = await asyncio.get_running_loop().run_in_executor(None, self._read_disk, key)
+            except Exception as e:
+                logging.warning(f"TTS cache disk read failed: {e}")
+                chunks = None
+            if chunks is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, chunks)
+        if chunks is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["bytes_saved"] += sum(len(c) for c in chunks)
+        return chunks
+
+    async def put(self, key: str, chunks: List[bytes]):
+        if not chunks:
+            return
+        self.stats["stores"] += 1
+        self._remember(key, chunks)
+        if self.disk_dir:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write_disk, key, chunks)
+            except Exception as e:
+                logging.warning(f"TTS cache disk write failed: {e}")
+
+    def metrics(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._disk_bytes if self.disk_dir else None,
+        }
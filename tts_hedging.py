@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+from murf_pool import MurfConnectionPool, MurfTurnConnection, PooledMurfConnection
+
+
+class HedgePolicy:
+    """When a turn's TTS gets a second request, and how often that is allowed.
+
+    The hedge delay is the ``quantile`` of recent first-audio latencies (first text handed to
+    TTS -> first audio), clamped to [``min_delay``, ``max_delay``]; ``initial_delay`` until
+    ``min_samples`` turns were measured. Hedges are paid from a token bucket that every turn
+    fills by ``max_rate`` (up to ``burst``), so at most about that fraction of turns hedge even
+    when Murf is slow for everyone and extra requests would only add to its load.
+    """
+
+    def __init__(self, quantile: float = 0.9, min_delay: float = 0.3, max_delay: float = 2.0,
+                 initial_delay: float = 1.0, max_rate: float = 0.1, burst: float = 3.0,
+                 window: int = 200, min_samples: int = 20):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.max_rate = max_rate
+        self.burst = burst
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._delay: Optional[float] = None
+        self._tokens = 1.0
+        self.stats = {
+            "turns": 0,
+            "hedges_fired": 0,
+            "hedges_won": 0,
+            "hedges_lost": 0,
+            "hedges_failed": 0,
+            "budget_denied": 0,
+            "capacity_denied": 0,
+        }
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self._delay = None
+
+    def delay(self) -> float:
+        if len(self._samples) < self.min_samples:
+            return self.initial_delay
+        if self._delay is None:
+            ordered = sorted(self._samples)
+            value = ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+            self._delay = min(max(value, self.min_delay), self.max_delay)
+        return self._delay
+
+    def start_turn(self):
+        self.stats["turns"] += 1
+        self._tokens = min(self.burst, self._tokens + self.max_rate)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        self.stats["budget_denied"] += 1
+        return False
+
+    def metrics(self) -> dict:
+        fired, turns = self.stats["hedges_fired"], self.stats["turns"]
+        return {
+            **self.stats,
+            "delay_ms": round(self.delay() * 1000),
+            "samples": len(self._samples),
+            "budget_tokens": round(self._tokens, 2),
+            "hedge_rate": round(fired / turns, 3) if turns else None,
+            "win_rate": round(self.stats["hedges_won"] / fired, 3) if fired else None,
+        }
+
+
+class _Leg:
+    def __init__(self, name: str, tts: MurfTurnConnection, permit=None):
+        self.name = name
+        self.tts = tts
+        self.permit = permit
+        self.reader: Optional[asyncio.Task] = None
+
+
+class HedgedTurnTTS:
+    """One turn's TTS on a pooled Murf connection, hedged on a second one if audio is late.
+
+    Used like ``MurfTurnConnection`` (``opening``, ``ready``, ``send_text``, ``buffered``,
+    ``close``), with the turn's audio read through ``audio()``. Text segments are recorded;
+    if no audio has arrived ``policy.delay()`` after the first one, a second context is opened
+    on ``hedge_pool``, the text so far is replayed to it and later segments go to both. The
+    first leg to produce audio is streamed and the other closed (not returned to the pool,
+    since audio for its context may still be in flight). Without a ``policy`` it never hedges.
+    """
+
+    def __init__(self, pool: MurfConnectionPool, voice_config: dict, context_id: str,
+                 policy: Optional[HedgePolicy] = None, hedge_pool: Optional[MurfConnectionPool] = None,
+                 admit_hedge: Optional[Callable[[], object]] = None):
+        self.voice_config = voice_config
+        self.context_id = context_id
+        self.policy = policy
+        self.hedge_pool = hedge_pool or pool
+        self.admit_hedge = admit_hedge
+        self.primary = self._open_leg("primary", MurfTurnConnection(pool, voice_config, context_id))
+        self.legs: List[_Leg] = [self.primary]
+        self.winner: Optional[_Leg] = None
+        self.hedge: Optional[_Leg] = None
+        self._sent: list = []  # (text, end)
+        self._first_text_at: Optional[float] = None
+        self._events: asyncio.Queue = asyncio.Queue()  # (leg, base64 audio | None for final | exception)
+        self._watchdog: Optional[asyncio.Task] = None
+        self._closing: list = []
+        if policy is not None:
+            policy.start_turn()
+
+    @property
+    def opening(self) -> asyncio.Task:
+        return self.primary.tts.opening
+
+    @property
+    def buffered(self) -> int:
+        return self.primary.tts.buffered
+
+    def _open_leg(self, name: str, tts: MurfTurnConnection, permit=None) -> _Leg:
+        leg = _Leg(name, tts, permit)
+        leg.reader = asyncio.create_task(self._read(leg))
+        return leg
+
+    async def _read(self, leg: _Leg):
+        try:
+            conn = await leg.tts.ready()
+            while True:
+                response = json.loads(await conn.recv())
+                if response.get("audio"):
+                    if self.winner is None:
+                        self._claim(leg)
+                    self._events.put_nowait((leg, response["audio"]))
+                if response.get("final"):
+                    conn.mark_done()
+                    if self.winner is None:
+                        self._claim(leg)
+                    self._events.put_nowait((leg, None))
+                    return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._events.put_nowait((leg, e))
+
+    async def ready(self) -> PooledMurfConnection:
+        """The streaming leg's connection, with buffered text flushed; raises if it failed."""
+        return await (self.winner or self.primary).tts.ready()
+
+    async def send_text(self, text: str, end: bool = False) -> bool:
+        """Send (or buffer) a segment on every live leg; True if it went out now on the streaming one."""
+        self._sent.append((text, end))
+        if self._first_text_at is None:
+            self._first_text_at = time.monotonic()
+            if self.policy is not None:
+                self._watchdog = asyncio.create_task(self._hedge_when_late())
+        sent_now = False
+        for leg in list(self.legs):
+            if leg is self.hedge and leg is not self.winner:
+                try:
+                    await leg.tts.send_text(text, end)
+                except Exception as e:
+                    self._hedge_failed(e)
+                continue
+            sent_now = await leg.tts.send_text(text, end)
+        return sent_now
+
+    async def _hedge_when_late(self):
+        delay = self.policy.delay()
+        await asyncio.sleep(delay)
+        if self.winner is not None or not self.policy.try_spend():
+            return
+        permit = None
+        if self.admit_hedge is not None:
+            permit = self.admit_hedge()
+            if permit is None:
+                self.policy.stats["capacity_denied"] += 1
+                return
+        tts = MurfTurnConnection(self.hedge_pool, self.voice_config, f"{self.context_id}-hedge")
+        # Still connecting, so the replay only buffers: no segment can get in between.
+        for text, end in self._sent:
+            await tts.send_text(text, end)
+        self.hedge = self._open_leg("hedge", tts, permit)
+        self.legs.append(self.hedge)
+        self.policy.stats["hedges_fired"] += 1
+        logging.info(f"🪁 No TTS audio {delay * 1000:.0f} ms after the first text; hedging on a second Murf connection")
+
+    def _claim(self, leg: _Leg):
+        self.winner = leg
+        if self._first_text_at is not None and self.policy is not None:
+            self.policy.observe(time.monotonic() - self._first_text_at)
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        if self.hedge is not None:
+            won = leg is self.hedge
+            self.policy.stats["hedges_won" if won else "hedges_lost"] += 1
+            logging.info(f"🪁 {'Hedge' if won else 'Primary'} Murf connection produced audio first; closing the other")
+        for other in [l for l in self.legs if l is not leg]:
+            self._drop(other)
+
+    def _hedge_failed(self, error: Exception):
+        if self.hedge in self.legs:
+            logging.warning(f"🪁 Hedge Murf connection failed: {error}")
+            self.policy.stats["hedges_failed"] += 1
+            self._drop(self.hedge)
+
+    def _drop(self, leg: _Leg):
+        if leg in self.legs:
+            self.legs.remove(leg)
+            self._closing.append(asyncio.create_task(self._close_leg(leg)))
+
+    async def _close_leg(self, leg: _Leg):
+        if leg.reader is not None and leg.reader is not asyncio.current_task():
+            leg.reader.cancel()
+        try:
+            await leg.tts.close()
+        finally:
+            if leg.permit is not None:
+                leg.permit.release()
+
+    async def audio(self, timeout: float, first_timeout: Optional[float] = None):
+        """Base64 audio chunks from the leg that answered first, until Murf's ``final``.
+
+        Raises ``asyncio.TimeoutError`` after ``timeout`` seconds without a chunk (``first_timeout``
+        for the first one, if given), or the streaming leg's error (a failing hedge is just dropped).
+        """
+        started = False
+        while True:
+            wait = timeout if started or first_timeout is None else first_timeout
+            leg, item = await asyncio.wait_for(self._events.get(), timeout=wait)
+            if leg not in self.legs:
+                continue  # a dropped leg's late news
+            if isinstance(item, Exception):
+                if leg is self.hedge and leg is not self.winner:
+                    self._hedge_failed(item)
+                    continue
+                raise item
+            if item is None:
+                return
+            started = True
+            yield item
+
+    async def close(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        for leg in list(self.legs):
+            self._drop(leg)
+        await asyncio.gather(*self._closing, return_exceptions=True)
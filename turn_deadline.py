@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Dict, Optional
+
+
+deadline_stats = {
+    "turns": 0,
+    "met": 0,
+    "missed": 0,
+    "abandoned": 0,  # cancelled by the user or a discarded speculation
+    "failed": 0,  # errors and busy replies within the budget
+    "degraded_short": 0,
+    "degraded_text_only": 0,
+    "exhausted_by": {},  # stage -> turns that ran out of budget in it
+}
+
+# Degraded modes, mildest first
+MODES = ("full", "short", "text_only")
+
+
+def turn_deadline_metrics() -> dict:
+    return {**deadline_stats, "exhausted_by": dict(deadline_stats["exhausted_by"])}
+
+
+class DeadlineExceeded(Exception):
+    """The turn's budget ran out while waiting in ``stage``."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"turn deadline exceeded in {stage}")
+        self.stage = stage
+
+
+class TurnDeadline:
+    """Time budget for one turn: STT end-of-turn until the reply reaches the user.
+
+    Stages on the critical path (``enter``) are charged the time spent in them, and waits go
+    through ``run``/``limit`` so none outlives what's left of the budget. ``degrade`` records
+    a cheaper way of answering (``short``: capped, brief LLM output; ``text_only``: no TTS)
+    chosen because the deadline was near. ``complete`` stops the clock once first audio (or
+    the text-only reply) is out; later streaming is bounded by per-chunk stall timeouts only.
+    """
+
+    def __init__(self, started: float, budget: float):
+        self.started = started
+        self.budget = budget
+        self.ends_at = started + budget
+        self.stage: Optional[str] = "routing"
+        self._stage_at = started
+        self.spent: Dict[str, float] = {}
+        self.mode = "full"
+        self.exhausted_by: Optional[str] = None
+        self.completed_at: Optional[float] = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.ends_at - time.monotonic())
+
+    def limit(self, cap: Optional[float] = None) -> float:
+        """Seconds a wait may take: what's left of the budget, or ``cap`` if that is sooner."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def enter(self, stage: Optional[str]):
+        if self.completed_at is not None or stage == self.stage:
+            return
+        now = time.monotonic()
+        if self.stage is not None:
+            self.spent[self.stage] = self.spent.get(self.stage, 0.0) + (now - self._stage_at)
+        self.stage, self._stage_at = stage, now
+
+    async def run(self, stage: str, awaitable: Awaitable, cap: Optional[float] = None):
+        """Await in ``stage`` for at most ``limit(cap)``; ``DeadlineExceeded`` if the budget ran out."""
+        self.enter(stage)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.limit(cap))
+        except asyncio.TimeoutError:
+            if self.remaining() > 0:
+                raise  # the stage's own cap, not the turn's budget
+            raise self.exceeded(stage)
+
+    def exceeded(self, stage: Optional[str] = None) -> DeadlineExceeded:
+        stage = stage or self.stage or "unknown"
+        if self.exhausted_by is None:
+            self.exhausted_by = stage
+        return DeadlineExceeded(stage)
+
+    def degrade(self, mode: str, reason: str) -> bool:
+        """Switch to a cheaper ``mode`` (never back to a richer one); True if it changed."""
+        if MODES.index(mode) <= MODES.index(self.mode):
+            return False
+        self.mode = mode
+        deadline_stats[f"degraded_{mode}"] += 1
+        logging.warning(f"⏳ {self.remaining() * 1000:.0f} ms of the turn budget left; answering {mode.replace('_', ' ')} ({reason})")
+        return True
+
+    def complete(self):
+        if self.completed_at is None:
+            self.enter(None)
+            self.completed_at = time.monotonic()
+
+    def finish(self, outcome: str = "ok") -> str:
+        """Record the turn in ``deadline_stats``; returns a one-line budget report."""
+        self.enter(None)
+        deadline_stats["turns"] += 1
+        finished_at = self.completed_at or time.monotonic()
+        if finished_at <= self.ends_at and self.exhausted_by is None:
+            if self.completed_at is not None:
+                verdict = "met"
+                detail = f"met with {(self.ends_at - self.completed_at) * 1000:.0f} ms to spare"
+            else:
+                verdict = "abandoned" if outcome in ("cancelled", "discarded") else "failed"
+                detail = f"{verdict} ({outcome}) within the budget"
+        else:
+            verdict = "missed"
+            # Charged to the stage it ran out in, else the one that took the most of it
+            self.exhausted_by = self.exhausted_by or max(self.spent, key=self.spent.get, default="unknown")
+            by_stage = deadline_stats["exhausted_by"]
+            by_stage[self.exhausted_by] = by_stage.get(self.exhausted_by, 0) + 1
+            detail = f"missed, budget consumed by {self.exhausted_by}"
+        deadline_stats[verdict] += 1
+        stages = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.spent.items())
+        mode = "" if self.mode == "full" else f" [{self.mode.replace('_', ' ')}]"
+        return f"{stages or 'no stages'}; {detail}{mode}"
@@ -0,0 +1,129 @@
+import threading
+from collections import deque
+from typing import List
+
+import numpy as np
+
+
+vad_stats = {
+    "sessions": 0,
+    "audio_ms": 0,
+    "suppressed_ms": 0,
+    "speech_segments": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def vad_metrics() -> dict:
+    with _stats_lock:
+        stats = dict(vad_stats)
+    stats["suppressed_fraction"] = round(stats["suppressed_ms"] / stats["audio_ms"], 3) if stats["audio_ms"] else None
+    return stats
+
+
+class VoiceActivityGate:
+    """Energy/zero-crossing VAD that decides which uplink packets are worth sending to STT.
+
+    Packets are split into 10 ms frames and scored in one vectorized pass per batch: a frame
+    is voiced when its level is above both ``min_speech_db`` and the running noise floor plus
+    ``margin_db``, and its zero-crossing rate isn't hiss-like (very loud frames always count).
+    A packet with at least ``min_voiced_frames`` voiced frames is speech.
+
+    Speech is forwarded together with the ``preroll_ms`` of audio before it, so word onsets
+    that are still below threshold aren't clipped, and followed by ``hangover_ms`` of trailing
+    audio so AssemblyAI hears the silence it needs to end the turn. While gated, one packet
+    every ``keepalive_ms`` still goes out to keep the streaming session alive. Use as the
+    ``gate`` of an ``AudioIngest``; it runs on the ingest worker thread.
+    """
+
+    def __init__(self, sample_rate: int = 16000, packet_ms: int = 50, preroll_ms: int = 300,
+                 hangover_ms: int = 1500, keepalive_ms: int = 1000, min_speech_db: float = -50.0,
+                 margin_db: float = 12.0, loud_db: float = -25.0, max_zcr: float = 0.35,
+                 min_voiced_frames: int = 2):
+        self.packet_ms = packet_ms
+        self.frame_samples = sample_rate // 100
+        self.hangover_packets = hangover_ms // packet_ms
+        self.keepalive_packets = max(1, keepalive_ms // packet_ms)
+        self.min_speech_db = min_speech_db
+        self.margin_db = margin_db
+        self.loud_db = loud_db
+        self.max_zcr = max_zcr
+        self.min_voiced_frames = min_voiced_frames
+        self.noise_floor_db = -60.0
+        self._preroll: deque = deque(maxlen=max(1, preroll_ms // packet_ms))
+        self._hangover = 0
+        self._since_forward = 0
+        self.stats = {"audio_ms": 0, "suppressed_ms": 0, "speech_segments": 0}
+        with _stats_lock:
+            vad_stats["sessions"] += 1
+
+    def _speech_flags(self, packets: List[bytes]) -> List[bool]:
+        # Only whole 10 ms frames are scored; a short trailing fragment just follows its packet.
+        frame_bytes = self.frame_samples * 2
+        counts = [len(p) // frame_bytes for p in packets]
+        audio = b"".join(p[:n * frame_bytes] for p, n in zip(packets, counts))
+        if not audio:
+            return [False] * len(packets)
+        frames = np.frombuffer(audio, dtype="<i2").reshape(-1, self.frame_samples).astype(np.float32)
+        frames /= 32768.0
+        db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+        threshold = max(self.min_speech_db, self.noise_floor_db + self.margin_db)
+        voiced = ((db > threshold) & (zcr < self.max_zcr)) | (db > self.loud_db)
+        quiet = db[~voiced]
+        if quiet.size:
+            # Track the background level from unvoiced frames only, slowly.
+            self.noise_floor_db += 0.05 * (float(np.median(quiet)) - self.noise_floor_db)
+        flags, start = [], 0
+        for n in counts:
+            flags.append(int(voiced[start:start + n].sum()) >= self.min_voiced_frames)
+            start += n
+        return flags
+
+    def filter(self, packets: List[bytes]) -> List[bytes]:
+        """Return the packets of ``packets`` (in order) that should be sent to STT."""
+        out: List[bytes] = []
+        suppressed = segments = 0
+        for packet, speech in zip(packets, self._speech_flags(packets)):
+            if speech:
+                if not self._hangover:
+                    segments += 1
+                    out.extend(self._preroll)
+                    self._preroll.clear()
+                self._hangover = self.hangover_packets
+                out.append(packet)
+            elif self._hangover:
+                self._hangover -= 1
+                out.append(packet)
+            else:
+                self._since_forward += 1
+                if len(self._preroll) == self._preroll.maxlen:
+                    oldest = self._preroll.popleft()
+                    if self._since_forward >= self.keepalive_packets:
+                        # Keepalives come from the front of the pre-roll so audio stays in order.
+                        out.append(oldest)
+                        self._since_forward = 0
+                    else:
+                        suppressed += 1
+                self._preroll.append(packet)
+                continue
+            self._since_forward = 0
+        audio_ms = len(packets) * self.packet_ms
+        self.stats["audio_ms"] += audio_ms
+        self.stats["suppressed_ms"] += suppressed * self.packet_ms
+        self.stats["speech_segments"] += segments
+        with _stats_lock:
+            vad_stats["audio_ms"] += audio_ms
+            vad_stats["suppressed_ms"] += suppressed * self.packet_ms
+            vad_stats["speech_segments"] += segments
+        return out
+
+    __call__ = filter
+
+    def metrics(self) -> dict:
+        audio_ms = self.stats["audio_ms"]
+        return {
+            **self.stats,
+            "suppressed_fraction": round(self.stats["suppressed_ms"] / audio_ms, 3) if audio_ms else None,
+            "noise_floor_db": round(self.noise_floor_db, 1),
+        }
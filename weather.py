@@ -0,0 +1,234 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+
+def _weather_code_description(code: int) -> str:
+    # Open-Meteo WMO weather interpretation codes
+    mapping = {
+        0: "clear sky",
+        1: "mainly clear",
+        2: "partly cloudy",
+        3: "overcast",
+        45: "fog",
+        48: "depositing rime fog",
+        51: "light drizzle",
+        53: "moderate drizzle",
+        55: "dense drizzle",
+        56: "light freezing drizzle",
+        57: "dense freezing drizzle",
+        61: "slight rain",
+        63: "moderate rain",
+        65: "heavy rain",
+        66: "light freezing rain",
+        67: "heavy freezing rain",
+        71: "slight snow",
+        73: "moderate snow",
+        75: "heavy snow",
+        77: "snow grains",
+        80: "light showers",
+        81: "moderate showers",
+        82: "violent showers",
+        85: "slight snow showers",
+        86: "heavy snow showers",
+        95: "thunderstorm",
+        96: "thunderstorm with slight hail",
+        99: "thunderstorm with heavy hail",
+    }
+    return mapping.get(int(code), "")
+
+
+def _format_weather(display_name: str, current: dict) -> Optional[str]:
+    t = current.get("temperature_2m")
+    feels = current.get("apparent_temperature")
+    hum = current.get("relative_humidity_2m")
+    wind = current.get("wind_speed_10m")
+    code = current.get("weather_code")
+    desc = _weather_code_description(code) if code is not None else ""
+    if t is None:
+        return None
+    parts = [f"Weather in {display_name}: {round(t)}°C"]
+    if feels is not None:
+        parts.append(f"(feels {round(feels)}°C)")
+    if desc:
+        parts.append(f", {desc}")
+    if hum is not None:
+        parts.append(f", humidity {int(hum)}%")
+    if wind is not None:
+        parts.append(f", wind {round(wind)} km/h")
+    text = " ".join(parts)
+    return text.strip()
+
+
+class WeatherService:
+    """Open-Meteo lookups on a shared, pooled ``httpx.AsyncClient``.
+
+    Geocoding results never change, so they are kept indefinitely and persisted to
+    ``geocode_cache_path``; names Open-Meteo doesn't know are only remembered in memory for
+    ``geocode_miss_ttl`` seconds, so a typo or a bad upstream moment isn't permanent. Current
+    conditions are cached per location rounded to two decimals for ``forecast_ttl`` seconds.
+    Concurrent lookups for the same place or grid cell share one upstream request.
+    """
+
+    def __init__(self, geocode_cache_path: Optional[str] = None, geocode_miss_ttl: float = 300.0,
+                 forecast_ttl: float = 600.0, timeout: float = 4.0):
+        self.geocode_cache_path = Path(geocode_cache_path) if geocode_cache_path else None
+        self.geocode_miss_ttl = geocode_miss_ttl
+        self.forecast_ttl = forecast_ttl
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._geocodes: Dict[str, dict] = self._load_geocodes()
+        self._geocode_misses: Dict[str, float] = {}  # name -> when Open-Meteo last found nothing
+        self._forecasts: Dict[Tuple[float, float], Tuple[float, dict]] = {}
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self.stats = {
+            "geocode_hits": 0,
+            "geocode_misses": 0,
+            "forecast_hits": 0,
+            "forecast_misses": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+
+    def _load_geocodes(self) -> Dict[str, dict]:
+        if not self.geocode_cache_path or not self.geocode_cache_path.exists():
+            return {}
+        try:
+            geocodes = json.loads(self.geocode_cache_path.read_text(encoding="utf-8"))
+            return {name: place for name, place in geocodes.items() if place}  # older files kept misses
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable geocode cache {self.geocode_cache_path}: {e}")
+            return {}
+
+    def _save_geocodes(self, snapshot: dict):
+        self.geocode_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.geocode_cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.geocode_cache_path)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+            )
+        return self._client
+
+    async def _coalesced(self, key: tuple, fetch):
+        """Run ``fetch()`` once per key; concurrent callers await the same result.
+
+        The fetch is a task of its own, so a caller that is cancelled (deadline, barge-in)
+        stops waiting without cancelling it for everyone else.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.create_task(fetch())
+            # Mark the exception as retrieved in case every caller gave up on it.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def geocode(self, location: str) -> Optional[dict]:
+        key = " ".join(location.lower().split())
+        if key in self._geocodes:
+            self.stats["geocode_hits"] += 1
+            return self._geocodes[key]
+        missed_at = self._geocode_misses.get(key)
+        if missed_at is not None:
+            if time.monotonic() - missed_at < self.geocode_miss_ttl:
+                self.stats["geocode_hits"] += 1
+                return None
+            del self._geocode_misses[key]
+        self.stats["geocode_misses"] += 1
+
+        async def fetch():
+            response = await self.client.get(
+                GEOCODING_URL,
+                params={"name": location, "count": 1, "language": "en", "format": "json"},
+            )
+            response.raise_for_status()
+            results = (response.json() or {}).get("results") or []
+            place = None
+            if results:
+                top = results[0]
+                if top.get("latitude") is not None and top.get("longitude") is not None:
+                    place = {"lat": top["latitude"], "lon": top["longitude"], "name": top.get("name") or location}
+            if place is None:
+                now = time.monotonic()
+                for stale in [name for name, at in self._geocode_misses.items() if now - at >= self.geocode_miss_ttl]:
+                    del self._geocode_misses[stale]
+                self._geocode_misses[key] = now
+                return None
+            self._geocodes[key] = place
+            if self.geocode_cache_path:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self._save_geocodes, dict(self._geocodes))
+                except Exception as e:
+                    logging.warning(f"Could not persist geocode cache: {e}")
+            return place
+
+        return await self._coalesced(("geo", key), fetch)
+
+    async def current_conditions(self, lat: float, lon: float) -> dict:
+        cell = (round(lat, 2), round(lon, 2))
+        cached = self._forecasts.get(cell)
+        if cached and time.monotonic() - cached[0] < self.forecast_ttl:
+            self.stats["forecast_hits"] += 1
+            return cached[1]
+        self.stats["forecast_misses"] += 1
+
+        async def fetch():
+            response = await self.client.get(
+                FORECAST_URL,
+                params={
+                    "latitude": cell[0],
+                    "longitude": cell[1],
+                    "current": "temperature_2m,apparent_temperature,relative_humidity_2m,wind_speed_10m,weather_code",
+                    "temperature_unit": "celsius",
+                    "wind_speed_unit": "kmh",
+                },
+            )
+            response.raise_for_status()
+            current = (response.json() or {}).get("current") or {}
+            now = time.monotonic()
+            # Drop expired cells so the dict only ever holds the last forecast_ttl's lookups.
+            for stale in [c for c, (at, _) in self._forecasts.items() if now - at >= self.forecast_ttl]:
+                del self._forecasts[stale]
+            self._forecasts[cell] = (now, current)
+            return current
+
+        return await self._coalesced(("wx", cell), fetch)
+
+    async def get_weather_text(self, location: str) -> Optional[str]:
+        try:
+            place = await self.geocode(location)
+            if not place:
+                return None
+            current = await self.current_conditions(place["lat"], place["lon"])
+            return _format_weather(place["name"] or location, current)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.warning(f"Weather fetch failed: {e}")
+            return None
+
+    def metrics(self) -> dict:
+        return {**self.stats, "geocodes_cached": len(self._geocodes), "forecasts_cached": len(self._forecasts)}
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a spoken query: lowercase, punctuation-free, single spaces."""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+def _key_fingerprint(api_key: str) -> str:
+    """Tells Tavily keys apart in cache keys without keeping the key itself around."""
+    return hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+
+def format_digest(query: str, results: dict, max_results: int = 3, max_chars: int = 900) -> Optional[str]:
+    """Compact, bounded text of a Tavily response for the Gemini prompt."""
+    lines = []
+    answer = " ".join((results.get("answer") or "").split())
+    if answer:
+        lines.append(f"Summary: {answer}")
+    for i, result in enumerate((results.get("results") or [])[:max_results], 1):
+        content = " ".join((result.get("content") or "").split())
+        if len(content) > 240:
+            content = content[:240].rsplit(" ", 1)[0] + "…"
+        source = re.sub(r"^https?://(www\.)?", "", result.get("url") or "").split("/", 1)[0]
+        lines.append(f"{i}. {result.get('title') or source}: {content} ({source})")
+    digest = f"Web search results for \"{query}\":"
+    for line in lines:
+        # Whole lines only: later results are dropped rather than cut mid-sentence.
+        if len(digest) + 1 + len(line) > max_chars:
+            break
+        digest += "\n" + line
+    return digest if "\n" in digest else None
+
+
+class WebSearchService:
+    """Tavily searches on a shared, pooled ``httpx.AsyncClient``.
+
+    Results are cached by API key and normalized query for ``cache_ttl`` seconds, and
+    concurrent searches for the same query with the same key share one upstream request, so a
+    session with its own Tavily key never gets another key's results or failures. The request runs as its own task, so a
+    caller giving up at its ``budget`` doesn't cancel it: the result still lands in the cache
+    for the next time the question comes up.
+    """
+
+    def __init__(self, url: str = TAVILY_SEARCH_URL, cache_ttl: float = 900.0, timeout: float = 5.0,
+                 max_results: int = 3, max_cached: int = 512):
+        self.url = url
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self.max_results = max_results
+        self.max_cached = max_cached
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: Dict[Tuple[str, str], Tuple[float, dict]] = {}  # (key fingerprint, query)
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "over_budget": 0,
+            "errors": 0,
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+            )
+        return self._client
+
+    async def _fetch(self, key: Tuple[str, str], query: str, api_key: str) -> dict:
+        try:
+            response = await self.client.post(
+                self.url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={
+                    "query": query,
+                    "search_depth": "basic",
+                    "include_answer": True,
+                    "max_results": self.max_results,
+                },
+            )
+            response.raise_for_status()
+            results = response.json() or {}
+            if len(self._cache) >= self.max_cached:
+                # Drop the oldest entry; dicts keep insertion order.
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = (time.monotonic(), results)
+            return results
+        finally:
+            self._inflight.pop(key, None)
+
+    async def search(self, query: str, api_key: str, budget: Optional[float] = None) -> Optional[dict]:
+        """Tavily results for ``query``, or None on error or if they don't arrive within ``budget`` seconds."""
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        key = (_key_fingerprint(api_key), normalized)
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            self.stats["hits"] += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = asyncio.create_task(self._fetch(key, query, api_key))
+            # Mark the exception as retrieved in case every caller gave up on it.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=budget)
+        except asyncio.TimeoutError:
+            self.stats["over_budget"] += 1
+            logging.warning(f"Web search for '{query}' exceeded its {budget:.1f}s budget")
+            return None
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.warning(f"Web search failed: {e}")
+            return None
+
+    def metrics(self) -> dict:
+        return {**self.stats, "cached": len(self._cache), "inflight": len(self._inflight)}
+
+    async def close(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+
+MIN_FRAGMENT_LENGTH = 3
+
+# Words that say nothing about which site is meant; never used for shared-word matching.
+STOPWORDS = frozenset({
+    "the", "and", "for", "from", "with", "about", "what", "whats", "show", "open", "please", "best",
+    "new", "now", "today", "some", "this", "that", "your", "you",
+})
+
+
+def _content_words(text: str) -> List[str]:
+    """Words that can identify a site: no stopwords, nothing shorter than three letters."""
+    return [word for word in text.split() if len(word) > 2 and word not in STOPWORDS]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+class _AliasAutomaton:
+    """Aho-Corasick automaton over catalog aliases.
+
+    ``find`` scans a query once and reports every alias occurring in it on word boundaries,
+    with its start offset, so "open hacker news" finds "hacker news" and "news" but "dropbox"
+    never finds "x".
+    """
+
+    def __init__(self, aliases: Dict[str, int]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[str, int]]] = [[]]
+        for alias, site in aliases.items():
+            state = 0
+            for ch in alias:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((alias, site))
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, str, int]]:
+        found = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for alias, site in self.out[state]:
+                start = i - len(alias) + 1
+                if _is_boundary(text, start - 1) and _is_boundary(text, i + 1):
+                    found.append((start, alias, site))
+        return found
+
+
+class _CatalogIndex:
+    """Immutable lookup structures for one version of the catalog file."""
+
+    def __init__(self, sites: List[dict]):
+        self.urls: List[str] = []
+        self.exact: Dict[str, int] = {}
+        for site_index, site in enumerate(sites):
+            self.urls.append(site["url"])
+            for alias in site.get("aliases", []):
+                # First definition wins so ranking never depends on dict iteration order.
+                self.exact.setdefault(_normalize(alias), site_index)
+
+        self.automaton = _AliasAutomaton(self.exact)
+
+        # Every fragment (>= MIN_FRAGMENT_LENGTH chars) of every alias, mapped to the shortest
+        # alias containing it: "insta" -> instagram, "tube" -> youtube.
+        self.fragments: Dict[str, Tuple[int, int, int]] = {}
+        # Token -> sites, for multi-word queries that share words with an alias.
+        self.tokens: Dict[str, set] = defaultdict(set)
+        for order, (alias, site_index) in enumerate(self.exact.items()):
+            rank = (len(alias), order, site_index)
+            for start in range(len(alias)):
+                for end in range(start + MIN_FRAGMENT_LENGTH, len(alias) + 1):
+                    fragment = alias[start:end]
+                    best = self.fragments.get(fragment)
+                    if best is None or rank < best:
+                        self.fragments[fragment] = rank
+            for token in _content_words(alias):
+                self.tokens[token].add(site_index)
+        self.tokens = dict(self.tokens)
+
+    def best_match(self, query: str) -> Optional[str]:
+        if query in self.exact:
+            return self.urls[self.exact[query]]
+
+        # 1. A known alias spoken inside the query: the earliest one wins, the longest of those
+        # starting there ("bbc news" -> bbc, "hacker news" -> hacker news, not news).
+        contained = self.automaton.find(query)
+        if contained:
+            start, alias, site_index = min(contained, key=lambda hit: (hit[0], -len(hit[1]), hit[2]))
+            return self.urls[site_index]
+
+        # 2. The query is part of an alias: the shortest such alias wins.
+        fragment = self.fragments.get(query)
+        if fragment is not None:
+            return self.urls[fragment[2]]
+
+        # 3. Multi-word queries: the site sharing the most words, if that is most of the
+        # query's content words ("weather in delhi" must not open LinkedIn through "in").
+        if len(query.split()) > 1:
+            words = _content_words(query)
+            votes: Dict[int, int] = defaultdict(int)
+            for word in words:
+                for site_index in self.tokens.get(word, ()):
+                    votes[site_index] += 1
+            if votes:
+                site_index = min(votes, key=lambda s: (-votes[s], s))
+                if votes[site_index] * 2 > len(words):
+                    return self.urls[site_index]
+        return None
+
+
+class WebsiteCatalog:
+    """Spoken website names -> URLs, loaded from a JSON data file.
+
+    The file is parsed once into a prebuilt index. At most every ``reload_interval`` seconds a
+    lookup kicks off a background check of the file's mtime; a changed file is re-indexed off
+    the hot path and swapped in whole, so aliases can be shipped without a restart. A broken
+    file keeps the previous index.
+    """
+
+    def __init__(self, path: str, reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._index = _CatalogIndex([])
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> bool:
+        """Rebuild the index from disk; returns True if a new catalog was loaded."""
+        with self._lock:
+            return self._reload_locked()
+
+    def _reload_in_background(self):
+        if self._lock.acquire(blocking=False):
+            try:
+                self._reload_locked()
+            finally:
+                self._lock.release()
+
+    def _reload_locked(self) -> bool:
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            with open(self.path, encoding="utf-8") as f:
+                sites = json.load(f)["sites"]
+            index = _CatalogIndex(sites)
+        except Exception as e:
+            logging.error(f"Could not load website catalog {self.path}: {e}")
+            return False
+        self._index, self._mtime = index, mtime
+        logging.info(f"Loaded website catalog with {len(index.urls)} sites and {len(index.exact)} aliases")
+        return True
+
+    def _current_index(self) -> _CatalogIndex:
+        if time.monotonic() - self._checked_at > self.reload_interval:
+            self._checked_at = time.monotonic()
+            threading.Thread(target=self._reload_in_background, name="website-catalog-reload", daemon=True).start()
+        return self._index
+
+    def exact(self, website: str) -> Optional[str]:
+        """URL for a name that is exactly one of the catalog's aliases."""
+        index = self._current_index()
+        site_index = index.exact.get(_normalize(website))
+        return index.urls[site_index] if site_index is not None else None
+
+    def lookup(self, website: str) -> Optional[str]:
+        """Best-ranked URL for a name: exact alias, contained alias, alias fragment, shared words."""
+        return self._current_index().best_match(_normalize(website))
+
+    def __len__(self) -> int:
+        return len(self._index.urls)